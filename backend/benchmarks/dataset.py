@@ -0,0 +1,480 @@
+"""
+Synthetic production-scale dataset for a local Postgres/PostGIS database.
+
+    python -m benchmarks.dataset --scale 10 --truncate
+
+Fills users, stores spread around Venezuelan cities, GTIN-13 products, price
+logs with Zipf-skewed product/store/user popularity, shopping lists with items
+and a daily exchange rate series. Rows are streamed with COPY; --scale 1 is
+about 1M price logs, --scale 10 about 10M. The schema must already exist
+(alembic upgrade head). Every synthetic user's password is "password123".
+"""
+
+import argparse
+import asyncio
+import csv
+import datetime
+import io
+import math
+import random
+import time
+import uuid
+from decimal import Decimal
+
+import asyncpg
+
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
+from src.core.security import get_password_hash
+from src.services.external_product import is_valid_check_digit
+from src.services.store_clusters import rebuild_store_clusters
+
+# Rows per COPY call, also the progress reporting step
+BATCH_SIZE = 250_000
+# Zipf exponent: a few products, stores and users get most of the activity
+POPULARITY_SKEW = 1.1
+PASSWORD = "password123"
+
+# Base sizes, multiplied by --scale
+BASE_USERS = 10_000
+BASE_STORES = 1_500
+BASE_PRODUCTS = 20_000
+BASE_PRICE_LOGS = 1_000_000
+BASE_LISTS = 20_000
+
+# (city, latitude, longitude, relative weight by population)
+CITIES = [
+    ("Caracas", 10.4806, -66.9036, 30),
+    ("Maracaibo", 10.6427, -71.6125, 15),
+    ("Valencia", 10.1620, -68.0077, 12),
+    ("Barquisimeto", 10.0678, -69.3474, 9),
+    ("Maracay", 10.2469, -67.5958, 8),
+    ("Ciudad Guayana", 8.3533, -62.6417, 6),
+    ("Barcelona", 10.1363, -64.6862, 5),
+    ("Maturín", 9.7457, -63.1832, 4),
+    ("Cumaná", 10.4564, -64.1675, 3),
+    ("Mérida", 8.5897, -71.1561, 3),
+    ("San Cristóbal", 7.7669, -72.2250, 4),
+    ("Barinas", 8.6226, -70.2075, 3),
+    ("Ciudad Bolívar", 8.1222, -63.5497, 3),
+    ("Los Teques", 10.3442, -67.0433, 2),
+    ("Punto Fijo", 11.6956, -70.1997, 2),
+    ("Porlamar", 10.9577, -63.8697, 2),
+    ("Coro", 11.4045, -69.6734, 2),
+    ("Acarigua", 9.5545, -69.1956, 2),
+]
+CHAINS = [
+    "Central Madeirense",
+    "Excelsior Gama",
+    "Automercados Plaza's",
+    "Farmatodo",
+    "Locatel",
+    "Unicasa",
+    "Makro",
+    "Forum",
+    "Luvebras",
+    "Tu Gran Bodegón",
+    "Abasto",
+    "Bodega",
+]
+STREETS = ["Av. Bolívar", "Av. Principal", "Calle Comercio", "Av. Libertador", "C.C."]
+
+# category -> (product names, brands, typical USD price)
+CATALOG = {
+    "Víveres": (
+        ["Harina de Maíz", "Arroz", "Pasta Larga", "Caraotas Negras", "Azúcar"],
+        ["P.A.N.", "Mary", "Primor", "Juana", "Montalbán", "Ronco"],
+        1.6,
+    ),
+    "Lácteos": (
+        ["Leche Completa", "Queso Blanco", "Yogurt", "Mantequilla", "Margarina"],
+        ["Campestre", "La Pastoreña", "Mavesa", "Los Andes", "Paisa"],
+        3.2,
+    ),
+    "Bebidas": (
+        ["Refresco", "Jugo de Naranja", "Agua Mineral", "Malta", "Café Molido"],
+        ["Polar", "Frica", "Minalba", "Yukery", "Madrid", "Fama de América"],
+        2.1,
+    ),
+    "Limpieza": (
+        ["Detergente", "Jabón en Barra", "Cloro", "Lavaplatos", "Suavizante"],
+        ["Ace", "Las Llaves", "Nevex", "Axion", "Xedex"],
+        2.8,
+    ),
+    "Cuidado Personal": (
+        [
+            "Papel Higiénico",
+            "Champú",
+            "Crema Dental",
+            "Jabón de Tocador",
+            "Desodorante",
+        ],
+        ["Rosal", "Pantene", "Colgate", "Protex", "Rexona"],
+        3.5,
+    ),
+}
+SIZES = ["250 g", "500 g", "1 kg", "1 L", "2 L", "400 g", "900 g", "12 und"]
+
+
+def zipf_cum_weights(count: int, skew: float = POPULARITY_SKEW) -> list[float]:
+    """Cumulative weights for random.choices, rank 1 being the most popular."""
+    total, weights = 0.0, []
+    for rank in range(1, count + 1):
+        total += 1 / rank**skew
+        weights.append(total)
+    return weights
+
+
+def make_gtin(rng: random.Random) -> str:
+    """A GTIN-13 with the Venezuelan 759 prefix and a valid check digit."""
+    body = "759" + "".join(rng.choices("0123456789", k=9))
+    return next(
+        body + digit for digit in "0123456789" if is_valid_check_digit(body + digit)
+    )
+
+
+def random_uuid(rng: random.Random) -> uuid.UUID:
+    """uuid4 drawn from the seeded generator, so runs are reproducible."""
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def usd_rate_series(days: int, rng: random.Random) -> list[float]:
+    """Daily VES per USD, oldest first: steady devaluation with some noise."""
+    rate, series = 36.0, []
+    for _ in range(days):
+        rate *= 1 + rng.gauss(0.0025, 0.004)
+        series.append(max(rate, 1.0))
+    return series
+
+
+async def copy_records(
+    conn: asyncpg.Connection, table: str, columns: list[str], records, total: int
+) -> None:
+    """Streams `records` into `table` with binary COPY, one batch at a time."""
+    started = time.perf_counter()
+    batch, loaded = [], 0
+    for record in records:
+        batch.append(record)
+        if len(batch) == BATCH_SIZE:
+            await conn.copy_records_to_table(table, records=batch, columns=columns)
+            loaded += len(batch)
+            batch.clear()
+            rate = loaded / (time.perf_counter() - started)
+            print(f"  {table}: {loaded:,}/{total:,} ({rate:,.0f} rows/s)")
+    if batch:
+        await conn.copy_records_to_table(table, records=batch, columns=columns)
+        loaded += len(batch)
+    elapsed = time.perf_counter() - started
+    print(f"{table}: {loaded:,} rows in {elapsed:.1f}s")
+
+
+class DatasetGenerator:
+    def __init__(self, scale: float, days: int, seed: int) -> None:
+        self.rng = random.Random(seed)
+        self.days = days
+        self.now = datetime.datetime.utcnow().replace(microsecond=0)
+        self.users = max(1, int(BASE_USERS * scale))
+        self.stores = max(1, int(BASE_STORES * scale))
+        self.products = max(1, int(BASE_PRODUCTS * scale))
+        self.price_logs = int(BASE_PRICE_LOGS * scale)
+        self.lists = int(BASE_LISTS * scale)
+
+        self.user_ids = [random_uuid(self.rng) for _ in range(self.users)]
+        self.store_ids = [random_uuid(self.rng) for _ in range(self.stores)]
+        self.barcodes: list[str] = []
+        self.base_prices: list[float] = []
+        # Some stores are consistently cheaper than others
+        self.store_markup = [self.rng.uniform(0.85, 1.25) for _ in range(self.stores)]
+        self.usd_rates = usd_rate_series(days, self.rng)
+
+    def _recorded_at(self) -> tuple[datetime.datetime, int]:
+        """A timestamp in the window, biased towards recent days, and its day index."""
+        age_days = self.days * self.rng.random() ** 2
+        day = min(self.days - 1, int(self.days - age_days))
+        return self.now - datetime.timedelta(seconds=age_days * 86400), day
+
+    def user_rows(self):
+        password_hash = get_password_hash(PASSWORD)
+        for n, user_id in enumerate(self.user_ids):
+            created_at = self.now - datetime.timedelta(
+                days=self.rng.uniform(0, self.days)
+            )
+            yield (
+                user_id,
+                f"user{n}",
+                f"user{n}@example.com",
+                password_hash,
+                created_at,
+            )
+
+    def store_csv(self) -> io.BytesIO:
+        # Geography has no binary codec in asyncpg, stores go through CSV COPY
+        text = io.StringIO()
+        writer = csv.writer(text)
+        city_weights = [city[3] for city in CITIES]
+        for store_id in self.store_ids:
+            city, lat, lon, _ = self.rng.choices(CITIES, weights=city_weights)[0]
+            # Roughly a 5 km spread around the city center
+            lat += self.rng.gauss(0, 0.045)
+            lon += self.rng.gauss(0, 0.045)
+            chain = self.rng.choice(CHAINS)
+            street = self.rng.choice(STREETS)
+            writer.writerow(
+                [
+                    store_id,
+                    f"{chain} {city}",
+                    f"{street} {self.rng.randint(1, 200)}, {city}",
+                    f"SRID=4326;POINT({lon:.6f} {lat:.6f})",
+                ]
+            )
+        return io.BytesIO(text.getvalue().encode())
+
+    def product_rows(self):
+        seen = set()
+        categories = list(CATALOG.items())
+        while len(self.barcodes) < self.products:
+            barcode = make_gtin(self.rng)
+            if barcode in seen:
+                continue
+            seen.add(barcode)
+            category, (names, brands, typical_price) = self.rng.choice(categories)
+            brand = self.rng.choice(brands)
+            name = f"{self.rng.choice(names)} {brand} {self.rng.choice(SIZES)}"
+            self.barcodes.append(barcode)
+            self.base_prices.append(typical_price * self.rng.lognormvariate(0, 0.45))
+            created_at = self.now - datetime.timedelta(
+                days=self.rng.uniform(0, self.days)
+            )
+            yield (barcode, name, brand, category, None, "SEED", created_at)
+
+    def _price(self, product: int, store: int, day: int, currency: str) -> Decimal:
+        # Prices drift up ~10% over the window on top of the store markup
+        drift = 1 + 0.1 * day / self.days
+        usd = self.base_prices[product] * self.store_markup[store] * drift
+        usd *= self.rng.gauss(1, 0.04)
+        if currency == "VES":
+            return Decimal(f"{usd * self.usd_rates[day]:.2f}")
+        return Decimal(f"{max(usd, 0.05):.2f}")
+
+    def price_log_rows(self):
+        product_weights = zipf_cum_weights(self.products)
+        store_weights = zipf_cum_weights(self.stores, 0.8)
+        user_weights = zipf_cum_weights(self.users)
+        products = range(self.products)
+        stores = range(self.stores)
+        users = range(self.users)
+        remaining = self.price_logs
+        while remaining:
+            k = min(remaining, BATCH_SIZE)
+            remaining -= k
+            picked_products = self.rng.choices(
+                products, cum_weights=product_weights, k=k
+            )
+            picked_stores = self.rng.choices(stores, cum_weights=store_weights, k=k)
+            picked_users = self.rng.choices(users, cum_weights=user_weights, k=k)
+            for product, store, user in zip(
+                picked_products, picked_stores, picked_users
+            ):
+                recorded_at, day = self._recorded_at()
+                currency = "VES" if self.rng.random() < 0.15 else "USD"
+                yield (
+                    self.barcodes[product],
+                    self.store_ids[store],
+                    self.user_ids[user],
+                    self._price(product, store, day, currency),
+                    currency,
+                    recorded_at,
+                )
+
+    def list_rows(self) -> tuple[list[tuple], list[tuple]]:
+        product_weights = zipf_cum_weights(self.products)
+        products = range(self.products)
+        lists, items = [], []
+        for n in range(self.lists):
+            list_id = random_uuid(self.rng)
+            created_at, day = self._recorded_at()
+            completed = self.rng.random() < 0.6
+            store = self.rng.randrange(self.stores)
+            lists.append(
+                (
+                    list_id,
+                    self.rng.choice(self.user_ids),
+                    f"Compras {n}",
+                    Decimal(self.rng.choice([50, 100, 150, 250])),
+                    "USD",
+                    "COMPLETED" if completed else "ACTIVE",
+                    created_at,
+                )
+            )
+            picked = set(
+                self.rng.choices(
+                    products, cum_weights=product_weights, k=self.rng.randint(3, 25)
+                )
+            )
+            for product in picked:
+                purchased = completed or self.rng.random() < 0.3
+                priced = completed or self.rng.random() < 0.5
+                items.append(
+                    (
+                        random_uuid(self.rng),
+                        list_id,
+                        self.barcodes[product],
+                        self.rng.randint(1, 4),
+                        self._price(product, store, day, "USD") if priced else None,
+                        purchased,
+                        created_at
+                        + datetime.timedelta(minutes=self.rng.randint(0, 120)),
+                        self.store_ids[store] if purchased else None,
+                    )
+                )
+        return lists, items
+
+    def exchange_rate_rows(self):
+        # One BCV close per day, the last one yesterday
+        closing = self.now.replace(hour=23, minute=0, second=0)
+        start = closing - datetime.timedelta(days=self.days)
+        for day, usd in enumerate(self.usd_rates):
+            recorded_at = start + datetime.timedelta(days=day)
+            eur = usd * (1.08 + 0.02 * math.sin(day / 30))
+            for currency, rate in (("USD", usd), ("EUR", eur)):
+                yield (
+                    random_uuid(self.rng),
+                    currency,
+                    Decimal(f"{rate:.4f}"),
+                    "BCV",
+                    recorded_at,
+                )
+
+
+async def load(generator: DatasetGenerator, truncate: bool) -> None:
+    conn = await asyncpg.connect(settings.POSTGRES_DSN)
+    try:
+        # Bulk load: losing the tail on a crash is fine, the data is synthetic
+        await conn.execute("SET synchronous_commit = off")
+        if truncate:
+            await conn.execute(
+                "TRUNCATE list_items, shopping_lists, price_logs, exchange_rates, "
+                "store_clusters, stores, products, users CASCADE"
+            )
+
+        await copy_records(
+            conn,
+            "users",
+            ["user_id", "username", "email", "password_hash", "created_at"],
+            generator.user_rows(),
+            generator.users,
+        )
+
+        started = time.perf_counter()
+        await conn.copy_to_table(
+            "stores",
+            source=generator.store_csv(),
+            columns=["store_id", "name", "address", "location"],
+            format="csv",
+        )
+        elapsed = time.perf_counter() - started
+        print(f"stores: {generator.stores:,} rows in {elapsed:.1f}s")
+
+        await copy_records(
+            conn,
+            "products",
+            [
+                "barcode",
+                "name",
+                "brand",
+                "category",
+                "image_url",
+                "data_source",
+                "created_at",
+            ],
+            generator.product_rows(),
+            generator.products,
+        )
+        await copy_records(
+            conn,
+            "exchange_rates",
+            ["rate_id", "currency_code", "rate_to_ves", "source", "recorded_at"],
+            generator.exchange_rate_rows(),
+            generator.days * 2,
+        )
+        await copy_records(
+            conn,
+            "price_logs",
+            [
+                "product_barcode",
+                "store_id",
+                "user_id",
+                "price",
+                "currency",
+                "recorded_at",
+            ],
+            generator.price_log_rows(),
+            generator.price_logs,
+        )
+
+        lists, items = generator.list_rows()
+        await copy_records(
+            conn,
+            "shopping_lists",
+            [
+                "list_id",
+                "user_id",
+                "name",
+                "budget_limit",
+                "currency",
+                "status",
+                "created_at",
+            ],
+            lists,
+            len(lists),
+        )
+        await copy_records(
+            conn,
+            "list_items",
+            [
+                "item_id",
+                "list_id",
+                "product_barcode",
+                "quantity",
+                "planned_price",
+                "is_purchased",
+                "added_at",
+                "store_id",
+            ],
+            items,
+            len(items),
+        )
+
+        print("Analyzing tables...")
+        await conn.execute("ANALYZE")
+    finally:
+        await conn.close()
+
+    print("Rebuilding store clusters...")
+    async with AsyncSessionLocal() as db:
+        await rebuild_store_clusters(db)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--days", type=int, default=730, help="History window")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--truncate", action="store_true", help="Delete existing data first"
+    )
+    args = parser.parse_args()
+
+    generator = DatasetGenerator(args.scale, args.days, args.seed)
+    print(
+        f"{generator.users:,} users, {generator.stores:,} stores, "
+        f"{generator.products:,} products, {generator.price_logs:,} price logs, "
+        f"{generator.lists:,} lists over {args.days} days"
+    )
+    started = time.perf_counter()
+    asyncio.run(load(generator, args.truncate))
+    print(f"Done in {time.perf_counter() - started:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Throughput benchmark for the upload image pipeline.
+
+    python -m benchmarks.image_pipeline --images 40 --workers 1 2 4
+
+Generates synthetic camera-sized JPEGs and transcodes them through the same
+process pool setup the API uses, reporting images/s and MB/s per pool size.
+"""
+
+import argparse
+import asyncio
+import io
+import random
+import time
+
+from PIL import Image, ImageDraw
+
+from src.services.image_pipeline import (
+    process_image,
+    shutdown_image_pool,
+    start_image_pool,
+)
+
+
+def make_photo(width: int, height: int, seed: int) -> bytes:
+    """A noisy JPEG so the encoder does realistic work (flat colors compress too well)."""
+    rng = random.Random(seed)
+    image = Image.effect_noise((width, height), 64).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x, y = rng.randrange(width), rng.randrange(height)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        draw.rectangle((x, y, x + width // 8, y + height // 8), fill=color)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+async def run(photos: list[bytes], workers: int) -> dict:
+    start_image_pool(workers)
+    try:
+        await process_image(photos[0])  # Warm up the worker processes
+        started = time.perf_counter()
+        await asyncio.gather(*(process_image(photo) for photo in photos))
+        elapsed = time.perf_counter() - started
+    finally:
+        shutdown_image_pool()
+
+    megabytes = sum(len(photo) for photo in photos) / 1024 / 1024
+    return {
+        "workers": workers,
+        "images": len(photos),
+        "seconds": round(elapsed, 3),
+        "images_per_second": round(len(photos) / elapsed, 2),
+        "mb_per_second": round(megabytes / elapsed, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    photos = [make_photo(args.width, args.height, seed) for seed in range(args.images)]
+    size_mb = sum(len(p) for p in photos) / len(photos) / 1024 / 1024
+    print(f"{args.images} photos of {args.width}x{args.height}, {size_mb:.1f} MB avg")
+
+    for workers in args.workers:
+        print(asyncio.run(run(photos, workers)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+End-to-end HTTP load benchmark of the API against a local database.
+
+    python -m benchmarks.dataset --scale 1 --truncate    # once
+    python -m benchmarks.load --concurrency 20 --duration 60 --baseline benchmarks/results/baseline.json
+
+Virtual shoppers (the dataset's user0..userN accounts) run a weighted mix of
+scan-to-list, walk-the-aisle item updates, complete_list, price comparison
+and search typeahead scenarios. Throughput and p50/p95/p99 per endpoint are
+saved as JSON and compared with a baseline; regressions exit with status 1.
+"""
@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+import sys
+from contextlib import AsyncExitStack
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+from benchmarks.load import __doc__ as description
+from benchmarks.load.report import (
+    DEFAULT_TOLERANCE,
+    build_result,
+    compare,
+    load_result,
+    print_summary,
+    save_result,
+)
+from benchmarks.load.workloads import DEFAULT_MIX, Fixtures, run_workload
+
+RESULTS_DIR = Path(__file__).resolve().parent.parent / "results"
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """Parses --mix, e.g. "scan_to_list=50,comparison=50"."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown scenario '{name}'")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+async def benchmark(args: argparse.Namespace) -> dict:
+    fixtures = await Fixtures.load()
+
+    async with AsyncExitStack() as stack:
+        if args.base_url:
+            # A real server, e.g. uvicorn with several workers
+            transport = httpx.AsyncHTTPTransport(retries=0)
+            base_url = args.base_url
+        else:
+            # In-process: the app from src.main, lifespan included
+            from src.main import app
+
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)
+            base_url = "http://benchmark"
+
+        client = await stack.enter_async_context(
+            httpx.AsyncClient(transport=transport, base_url=base_url, timeout=30.0)
+        )
+        recorder, elapsed = await run_workload(
+            client,
+            fixtures,
+            concurrency=args.concurrency,
+            duration=args.duration,
+            warmup=args.warmup,
+            mix=args.mix,
+            seed=args.seed,
+        )
+
+    config = {
+        "target": args.base_url or "in-process",
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "mix": args.mix,
+        "seed": args.seed,
+    }
+    return build_result(recorder.summary(elapsed), config)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=description.strip().splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=description,
+    )
+    parser.add_argument("--concurrency", type=int, default=20, help="Virtual shoppers")
+    parser.add_argument("--duration", type=float, default=60, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=10, help="Unmeasured seconds")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--base-url", help="Benchmark a running server instead of the in-process app"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=RESULTS_DIR / f"load-{datetime.now():%Y%m%d-%H%M%S}.json",
+    )
+    parser.add_argument("--baseline", type=Path, help="Result JSON to compare with")
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Also write the result to --baseline",
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    result = asyncio.run(benchmark(args))
+    print_summary(result)
+    save_result(result, args.output)
+    print(f"\nSaved {args.output}")
+
+    if args.baseline is None:
+        return
+    if args.save_baseline or not args.baseline.exists():
+        save_result(result, args.baseline)
+        print(f"Saved baseline {args.baseline}")
+        return
+
+    regressions = compare(result, load_result(args.baseline), args.tolerance)
+    if regressions:
+        print("\nRegressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import json
+import math
+import platform
+import subprocess
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+# A p95 this much slower, or throughput this much lower, than the baseline
+# is reported as a regression
+DEFAULT_TOLERANCE = 0.10
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class LatencyRecorder:
+    """Latencies (seconds) and failures per endpoint label, e.g. "GET /products/{barcode}"."""
+
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    recording: bool = True
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        self.latencies[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {}
+        for endpoint in sorted(self.latencies):
+            values = sorted(self.latencies[endpoint])
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "errors": self.errors.get(endpoint, 0),
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "mean_ms": round(sum(values) / len(values) * 1000, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+        total = sum(e["requests"] for e in endpoints.values())
+        return {
+            "total_requests": total,
+            "total_errors": sum(e["errors"] for e in endpoints.values()),
+            "throughput_rps": round(total / elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_result(summary: dict, config: dict) -> dict:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "config": config,
+        **summary,
+    }
+
+
+def save_result(result: dict, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(result, indent=2) + "\n")
+
+
+def load_result(path: Path) -> dict:
+    return json.loads(path.read_text())
+
+
+def compare(
+    result: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE
+) -> list[str]:
+    """
+    Prints a per-endpoint comparison with the baseline.
+    Returns the regressions (slower p95 or lower throughput beyond tolerance).
+    """
+    regressions = []
+    print(
+        f"\n{'endpoint':40} {'p95 base':>10} {'p95 now':>10} {'rps base':>10} {'rps now':>10}"
+    )
+    for endpoint, now in result["endpoints"].items():
+        base = baseline["endpoints"].get(endpoint)
+        if base is None:
+            print(
+                f"{endpoint:40} {'-':>10} {now['p95_ms']:>10} {'-':>10} {now['throughput_rps']:>10}"
+            )
+            continue
+
+        flags = []
+        if now["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            flags.append(f"p95 {base['p95_ms']} -> {now['p95_ms']} ms")
+        if now["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            flags.append(
+                f"throughput {base['throughput_rps']} -> {now['throughput_rps']} rps"
+            )
+        if now["errors"] > base["errors"]:
+            flags.append(f"errors {base['errors']} -> {now['errors']}")
+        regressions.extend(f"{endpoint}: {flag}" for flag in flags)
+
+        marker = "  REGRESSION" if flags else ""
+        print(
+            f"{endpoint:40} {base['p95_ms']:>10} {now['p95_ms']:>10} "
+            f"{base['throughput_rps']:>10} {now['throughput_rps']:>10}{marker}"
+        )
+    return regressions
+
+
+def print_summary(summary: dict) -> None:
+    print(
+        f"\n{summary['total_requests']:,} requests, {summary['total_errors']} errors, "
+        f"{summary['throughput_rps']} req/s"
+    )
+    print(
+        f"{'endpoint':40} {'reqs':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5}"
+    )
+    for endpoint, stats in summary["endpoints"].items():
+        print(
+            f"{endpoint:40} {stats['requests']:>7} {stats['throughput_rps']:>8} "
+            f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} "
+            f"{stats['errors']:>5}"
+        )
@@ -0,0 +1,235 @@
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import dataclass
+
+import httpx
+from geoalchemy2 import Geometry
+from sqlalchemy import func, select
+
+from benchmarks.dataset import PASSWORD
+from benchmarks.load.report import LatencyRecorder
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
+from src.models.price import PriceLog
+from src.models.product import Product
+from src.models.store import Store
+
+API = settings.API_V1_STR
+# A shopper starts a new list once the current one gets this long
+MAX_LIST_ITEMS = 40
+TYPEAHEAD_MAX_CHARS = 6
+
+# Relative weight of each scenario in the mixed workload
+DEFAULT_MIX = {
+    "scan_to_list": 30,
+    "walk_the_aisle": 30,
+    "comparison": 20,
+    "typeahead": 15,
+    "complete_list": 5,
+}
+
+
+@dataclass
+class Fixtures:
+    """Real identifiers sampled from the database the API is serving."""
+
+    barcodes: list[str]  # Sampled from price logs, so popular products repeat
+    stores: list[tuple[uuid.UUID, float, float]]  # store_id, latitude, longitude
+    words: list[str]  # First words of product names, for typeahead
+
+    @classmethod
+    async def load(cls, sample_size: int = 2000) -> "Fixtures":
+        async with AsyncSessionLocal() as db:
+            barcodes = await db.scalars(
+                select(PriceLog.product_barcode)
+                .order_by(func.random())
+                .limit(sample_size)
+            )
+            stores = await db.execute(
+                select(
+                    Store.store_id,
+                    func.ST_Y(func.cast(Store.location, Geometry)),
+                    func.ST_X(func.cast(Store.location, Geometry)),
+                )
+                .where(Store.location.is_not(None))
+                .order_by(func.random())
+                .limit(sample_size)
+            )
+            names = await db.scalars(
+                select(Product.name).order_by(func.random()).limit(sample_size)
+            )
+            fixtures = cls(
+                barcodes=list(barcodes),
+                stores=[tuple(row) for row in stores],
+                words=sorted(
+                    {name.split()[0].lower() for name in names if name.strip()}
+                ),
+            )
+        if not (fixtures.barcodes and fixtures.stores and fixtures.words):
+            raise SystemExit(
+                "Database has no data, run `python -m benchmarks.dataset` first"
+            )
+        return fixtures
+
+
+class Shopper:
+    """One virtual user: logged in, with a shopping list in progress."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        recorder: LatencyRecorder,
+        fixtures: Fixtures,
+        rng: random.Random,
+    ) -> None:
+        self.client = client
+        self.recorder = recorder
+        self.fixtures = fixtures
+        self.rng = rng
+        self.headers: dict[str, str] = {}
+        self.list_id: str | None = None
+        self.item_ids: list[str] = []
+
+    async def request(
+        self, endpoint: str, method: str, url: str, **kwargs
+    ) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.client.request(
+            method, url, headers=self.headers, **kwargs
+        )
+        self.recorder.record(
+            endpoint, time.perf_counter() - started, response.status_code < 400
+        )
+        return response
+
+    async def login(self, email: str) -> None:
+        response = await self.client.post(
+            f"{API}/auth/login", data={"username": email, "password": PASSWORD}
+        )
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        await self.start_list()
+
+    async def start_list(self) -> None:
+        response = await self.request(
+            "POST /lists/", "POST", f"{API}/lists/", json={"name": "Benchmark"}
+        )
+        response.raise_for_status()
+        self.list_id = response.json()["list_id"]
+        self.item_ids = []
+
+    async def scan_to_list(self) -> None:
+        """Scan a barcode, look the product up, add it to the list."""
+        barcode = self.rng.choice(self.fixtures.barcodes)
+        await self.request(
+            "GET /products/{barcode}", "GET", f"{API}/products/{barcode}"
+        )
+        response = await self.request(
+            "POST /lists/{list_id}/items",
+            "POST",
+            f"{API}/lists/{self.list_id}/items",
+            json={"product_barcode": barcode, "quantity": self.rng.randint(1, 3)},
+        )
+        if response.status_code == 200:
+            self.item_ids = [item["item_id"] for item in response.json()["items"]]
+            if len(self.item_ids) >= MAX_LIST_ITEMS:
+                await self.start_list()
+
+    async def walk_the_aisle(self) -> None:
+        """Put an item in the cart: set its shelf price and mark it purchased."""
+        if not self.item_ids:
+            await self.scan_to_list()
+            return
+        store_id, _, _ = self.rng.choice(self.fixtures.stores)
+        item_id = self.rng.choice(self.item_ids)
+        await self.request(
+            "PUT /lists/{list_id}/items/{item_id}",
+            "PUT",
+            f"{API}/lists/{self.list_id}/items/{item_id}",
+            json={
+                "planned_price": round(self.rng.uniform(0.5, 15), 2),
+                "is_purchased": True,
+                "store_id": str(store_id),
+            },
+        )
+
+    async def complete_list(self) -> None:
+        """Check out: log every priced item, then start a fresh list."""
+        if not self.item_ids:
+            await self.scan_to_list()
+            return
+        store_id, _, _ = self.rng.choice(self.fixtures.stores)
+        await self.request(
+            "POST /lists/{list_id}/complete",
+            "POST",
+            f"{API}/lists/{self.list_id}/complete",
+            params={"store_id": str(store_id)},
+        )
+        await self.start_list()
+
+    async def comparison(self) -> None:
+        """Cheapest nearby stores for a product, from around a known store."""
+        barcode = self.rng.choice(self.fixtures.barcodes)
+        _, latitude, longitude = self.rng.choice(self.fixtures.stores)
+        await self.request(
+            "GET /prices/comparison/{barcode}",
+            "GET",
+            f"{API}/prices/comparison/{barcode}",
+            params={"lat": latitude, "lon": longitude, "radius_km": 10, "limit": 20},
+        )
+
+    async def typeahead(self) -> None:
+        """One request per keystroke while typing a product name."""
+        word = self.rng.choice(self.fixtures.words)
+        for length in range(2, min(len(word), TYPEAHEAD_MAX_CHARS) + 1):
+            await self.request(
+                "GET /products/?q=",
+                "GET",
+                f"{API}/products/",
+                params={"q": word[:length], "limit": 10},
+            )
+
+
+async def run_workload(
+    client: httpx.AsyncClient,
+    fixtures: Fixtures,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    mix: dict[str, int],
+    seed: int,
+) -> tuple[LatencyRecorder, float]:
+    """
+    Runs `concurrency` shoppers in a closed loop, each picking scenarios by
+    `mix`. Only requests made after the warmup are recorded.
+    Returns the recorder and the measured seconds.
+    """
+    recorder = LatencyRecorder(recording=False)
+    shoppers = [
+        Shopper(client, recorder, fixtures, random.Random(seed + n))
+        for n in range(concurrency)
+    ]
+    await asyncio.gather(
+        *(shopper.login(f"user{n}@example.com") for n, shopper in enumerate(shoppers))
+    )
+
+    scenarios, weights = list(mix), list(mix.values())
+    stop = asyncio.Event()
+
+    async def shop(shopper: Shopper) -> None:
+        while not stop.is_set():
+            scenario = shopper.rng.choices(scenarios, weights=weights)[0]
+            await getattr(shopper, scenario)()
+
+    tasks = [asyncio.create_task(shop(shopper)) for shopper in shoppers]
+    await asyncio.sleep(warmup)
+    recorder.recording = True
+    started = time.perf_counter()
+    await asyncio.sleep(duration)
+    recorder.recording = False
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*tasks)
+    return recorder, elapsed
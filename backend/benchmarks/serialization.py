@@ -0,0 +1,108 @@
+"""
+Serialization benchmark for large shopping list responses.
+
+    python -m benchmarks.serialization --items 500 --rounds 200
+
+Builds a transient ShoppingList with N items (no database needed) and times
+the encoders the API can use: the FastAPI default (validate + stdlib json),
+pydantic's Rust dumper, the orjson fast path and MessagePack.
+"""
+
+import argparse
+import datetime
+import json
+import time
+import uuid
+from decimal import Decimal
+
+import msgpack
+import orjson
+
+from src.core.responses import fast_response
+from src.models.shopping_list import ListItem, ShoppingList
+from src.schemas.shopping_list import ShoppingListRead
+
+
+def make_list(items: int) -> ShoppingList:
+    now = datetime.datetime(2025, 1, 1, 12, 0)
+    shopping_list = ShoppingList(
+        list_id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        name="Mercado del mes",
+        budget_limit=Decimal("250.00000000"),
+        currency="USD",
+        status="ACTIVE",
+    )
+    shopping_list.items = [
+        ListItem(
+            item_id=uuid.uuid4(),
+            product_barcode=f"{7590000000000 + n}",
+            quantity=n % 5 + 1,
+            planned_price=Decimal(f"{n % 40}.{n % 100:02d}000000"),
+            is_purchased=n % 3 == 0,
+            added_at=now + datetime.timedelta(minutes=n),
+            store_id=uuid.uuid4() if n % 2 else None,
+        )
+        for n in range(items)
+    ]
+    return shopping_list
+
+
+def default_encoder(shopping_list: ShoppingList) -> bytes:
+    # What FastAPI does for a response_model without a custom response class
+    model = ShoppingListRead.model_validate(shopping_list)
+    return json.dumps(model.model_dump(mode="json")).encode()
+
+
+def pydantic_encoder(shopping_list: ShoppingList) -> bytes:
+    return ShoppingListRead.model_validate(shopping_list).model_dump_json().encode()
+
+
+def fast_encoder(shopping_list: ShoppingList) -> bytes:
+    return fast_response(ShoppingListRead, shopping_list).body
+
+
+def msgpack_encoder(shopping_list: ShoppingList) -> bytes:
+    data = orjson.loads(fast_encoder(shopping_list))
+    return msgpack.packb(data)
+
+
+ENCODERS = {
+    "default (validate + json)": default_encoder,
+    "pydantic model_dump_json": pydantic_encoder,
+    "orjson fast path": fast_encoder,
+    "msgpack (via fast path)": msgpack_encoder,
+}
+
+
+def measure(encoder, shopping_list: ShoppingList, rounds: int) -> dict:
+    body = encoder(shopping_list)  # Warm up caches (dump plans, validators)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        encoder(shopping_list)
+    elapsed = time.perf_counter() - started
+    return {
+        "ms_per_response": round(elapsed / rounds * 1000, 3),
+        "responses_per_second": round(rounds / elapsed, 1),
+        "bytes": len(body),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    shopping_list = make_list(args.items)
+    # The fast path must produce the same document as the validated one
+    expected = json.loads(pydantic_encoder(shopping_list))
+    assert orjson.loads(fast_encoder(shopping_list)) == expected
+
+    print(f"ShoppingListRead with {args.items} items, {args.rounds} rounds")
+    for name, encoder in ENCODERS.items():
+        print(f"{name:28} {measure(encoder, shopping_list, args.rounds)}")
+
+
+if __name__ == "__main__":
+    main()
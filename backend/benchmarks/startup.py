@@ -0,0 +1,190 @@
+"""
+Cold start benchmark of the API.
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --profile --top 25
+
+Each run uses a fresh interpreter. It measures the time to import src.main
+and the time-to-first-request: from spawning uvicorn until GET / answers,
+lifespan included. --profile prints an import-time report of src.main
+(python -X importtime), by module and by top-level package.
+Both exit with status 1 when src.main imports a package that should only be
+loaded on first use or by the lifespan's warm-up (LAZY_PACKAGES).
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import src.main; "
+    "print(time.perf_counter() - t)"
+)
+FIRST_REQUEST_TIMEOUT = 60.0
+# Slow to import and not needed to serve most requests
+LAZY_PACKAGES = (
+    "PIL",
+    "passlib",
+    "argon2",
+    "openfoodfacts",
+    "bs4",
+    "fastapi_mail",
+    "aiosmtplib",
+    "apscheduler",
+)
+
+
+def measure_import() -> float:
+    """Seconds to import src.main in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_first_request(port: int) -> float:
+    """Seconds from spawning uvicorn to the first successful response."""
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ]
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while time.perf_counter() - started < FIRST_REQUEST_TIMEOUT:
+                if server.poll() is not None:
+                    raise SystemExit(f"uvicorn exited with status {server.returncode}")
+                try:
+                    if client.get("/").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.005)
+        raise SystemExit(f"No response within {FIRST_REQUEST_TIMEOUT}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def import_profile() -> list[tuple[str, int, int]]:
+    """(module, self µs, cumulative µs) for every module src.main imports."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def print_profile(modules: list[tuple[str, int, int]], top: int) -> None:
+    total = max(cumulative for _, _, cumulative in modules)
+    print(f"\nImporting src.main: {total / 1000:.0f} ms, {len(modules)} modules")
+
+    print(f"\n{'module (cumulative)':50} {'ms':>8}")
+    for name, _, cumulative in sorted(modules, key=lambda m: -m[2])[:top]:
+        print(f"{name:50} {cumulative / 1000:>8.1f}")
+
+    # Self time summed per distribution, e.g. every sqlalchemy.* module
+    packages: dict[str, int] = defaultdict(int)
+    for name, self_us, _ in modules:
+        packages[name.split(".")[0]] += self_us
+    print(f"\n{'package (self time)':50} {'ms':>8} {'share':>7}")
+    for package, self_us in sorted(packages.items(), key=lambda p: -p[1])[:top]:
+        print(f"{package:50} {self_us / 1000:>8.1f} {self_us / total:>7.1%}")
+
+
+def eager_lazy_packages(modules: list[tuple[str, int, int]]) -> dict[str, int]:
+    """Cumulative µs of each LAZY_PACKAGES package that src.main imports."""
+    found: dict[str, int] = defaultdict(int)
+    for name, self_us, _ in modules:
+        package = name.split(".")[0]
+        if package in LAZY_PACKAGES:
+            found[package] += self_us
+    return dict(found)
+
+
+def report_eager_imports(modules: list[tuple[str, int, int]]) -> bool:
+    """Prints the lazy packages imported eagerly; True if there are any."""
+    eager = eager_lazy_packages(modules)
+    for package, self_us in sorted(eager.items(), key=lambda p: -p[1]):
+        print(
+            f"Imported at startup but should be lazy: {package} ({self_us / 1000:.1f} ms)"
+        )
+    return bool(eager)
+
+
+def summarize(samples: list[float]) -> dict:
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--profile", action="store_true", help="Only print the import-time report"
+    )
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--output", type=Path, help="Also save the result as JSON")
+    args = parser.parse_args()
+
+    modules = import_profile()
+    if args.profile:
+        print_profile(modules, args.top)
+        sys.exit(1 if report_eager_imports(modules) else 0)
+
+    imports = [measure_import() for _ in range(args.runs)]
+    first_requests = [measure_first_request(args.port) for _ in range(args.runs)]
+    result = {
+        "runs": args.runs,
+        "eager_lazy_packages": sorted(eager_lazy_packages(modules)),
+        "import": summarize(imports),
+        "first_request": summarize(first_requests),
+    }
+    for label, key in (
+        ("import src.main", "import"),
+        ("first request", "first_request"),
+    ):
+        stats = result[key]
+        print(
+            f"{label:18} median {stats['median_ms']:>7} ms  "
+            f"min {stats['min_ms']:>7} ms  max {stats['max_ms']:>7} ms"
+        )
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result, indent=2) + "\n")
+    if report_eager_imports(modules):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
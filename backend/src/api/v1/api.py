@@ -2,6 +2,7 @@ from fastapi import APIRouter
 
 from src.api.v1.endpoints import (
     auth,
+    events,
     lists,
     prices,
     products,
@@ -9,6 +10,7 @@ from src.api.v1.endpoints import (
     users,
     exchange_rates,
     upload,
+    sync,
 )
 
 api_router = APIRouter()
@@ -25,3 +27,5 @@ api_router.include_router(upload.router, prefix="/upload", tags=["Upload"])
 api_router.include_router(
     exchange_rates.router, prefix="/exchange-rates", tags=["Exchange-rates"]
 )
+api_router.include_router(events.router, prefix="/events", tags=["Events"])
+api_router.include_router(sync.router, prefix="/sync", tags=["Sync"])
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from typing import Annotated, Any
+import logging
 import random
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -10,6 +11,7 @@ from src.core.security import get_password_hash
 from src.core import security
 from src.core.config import settings
 from src.core.deps import SessionDep
+from src.core.job_queue import enqueue
 from src.models.user import User
 from src.models.password_reset import PasswordReset
 from src.schemas.user import (
@@ -19,7 +21,8 @@ from src.schemas.user import (
     ForgotPasswordRequest,
     ResetPasswordRequest,
 )
-from src.core.email_utils import send_reset_code
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -35,11 +38,7 @@ async def register(user_in: UserCreate, db: SessionDep) -> Any:
             status_code=400,
             detail="Email already registered",
         )
-    print(f"\n---> DEBUG: user_in object: {user_in}")
-    print(f"---> DEBUG: user_in.password type: {type(user_in.password)}")
-    print(f"---> DEBUG: user_in.password value: {user_in.password}")
     hashed_pw = security.get_password_hash(user_in.password)
-    print(f"---> DEBUG: hashed_pw value: {hashed_pw}")
     user = User(email=user_in.email, username=user_in.username, password_hash=hashed_pw)
     db.add(user)
     await db.commit()
@@ -88,12 +87,11 @@ async def forgot_password(data: ForgotPasswordRequest, session: SessionDep):
 
     reset_entry = PasswordReset(user_id=user.user_id, code=code, expires_at=expires)
     session.add(reset_entry)
+    await session.flush()  # Get the generated reset_id
+    # Sent by the background worker, with retries. The job only references the
+    # reset, so the code never sits in the jobs table
+    await enqueue(session, "send_reset_code", {"reset_id": str(reset_entry.reset_id)})
     await session.commit()
-    try:
-        await send_reset_code(user.email, code)
-        print(f"✅ Email sent successfully to {user.email}")
-    except Exception as e:
-        print(f"❌ Failed to send email: {e}")
 
     return {"message": "Code sent successfully"}
 
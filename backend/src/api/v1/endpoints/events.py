@@ -0,0 +1,55 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from src.services.live_updates import broker
+
+router = APIRouter()
+
+HEARTBEAT_SECONDS = 15
+MAX_BARCODES = 100
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    barcodes: Optional[str] = Query(
+        None, description="Comma separated barcodes to receive price events for"
+    ),
+):
+    """
+    Server-Sent Events stream replacing polling of rates and price comparisons.
+    Emits `rate` events for every new exchange rate and `price` events for new
+    price logs of the subscribed barcodes.
+    """
+    subscribed = {b.strip() for b in (barcodes or "").split(",") if b.strip()}
+    if len(subscribed) > MAX_BARCODES:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_BARCODES} barcodes per stream"
+        )
+
+    subscription = broker.subscribe(subscribed)
+
+    async def event_stream():
+        try:
+            yield f"retry: {HEARTBEAT_SECONDS * 1000}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event, data = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {data}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,26 +1,31 @@
-from typing import Any, List
-from fastapi import APIRouter, HTTPException, Query
-from sqlalchemy import select, desc
-from src.core.deps import SessionDep, CurrentUser
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from sqlalchemy import select, desc, func
+from sqlalchemy.orm import aliased
+from src.core.deps import ReadSessionDep, SessionDep, CurrentUser
+from src.core.response_cache import cached
+from src.core.responses import fast_response
 from src.models.exchange_rate import ExchangeRate
 from src.schemas.exchange_rate import ExchangeRateCreate, ExchangeRateRead
 from src.services.exchange_rate_updater import update_exchange_rate
+from src.services.rate_cache import publish_rate_change, rate_cache
 
 router = APIRouter()
 
 
-@router.post("/update", response_model=ExchangeRateRead)
+@router.post("/update", response_model=List[ExchangeRateRead])
 async def trigger_update(
     session: SessionDep,
     current_user: CurrentUser,  # Protect endpoint
 ):
-    """Manually triggers the exchange rate update service."""
-    new_rate = await update_exchange_rate(session)
-    if not new_rate:
+    """Manually triggers the exchange rate update service for every currency."""
+    rates = await update_exchange_rate(session)
+    if not rates:
         raise HTTPException(
             status_code=500, detail="Failed to update exchange rate from any source."
         )
-    return new_rate
+    return rates
 
 
 @router.post("/", response_model=ExchangeRateRead, status_code=201)
@@ -31,32 +36,100 @@ async def create_exchange_rate(rate_in: ExchangeRateCreate, session: SessionDep)
         source=rate_in.source,
     )
     session.add(new_rate)
+    await session.flush()
+    await publish_rate_change(session, new_rate)
     await session.commit()
     await session.refresh(new_rate)
+    rate_cache.set(new_rate)
     return new_rate
 
 
 @router.get("/latest", response_model=ExchangeRateRead)
 async def get_latest_rate(
-    session: SessionDep, currency: str = Query("USD", max_length=5)
+    session: ReadSessionDep,
+    response: Response,
+    currency: str = Query("USD", max_length=5),
 ) -> Any:
-    stmt = (
-        select(ExchangeRate)
-        .where(ExchangeRate.currency_code == currency.upper())
-        .order_by(desc(ExchangeRate.recorded_at))
-        .limit(1)
-    )
-    result = await session.execute(stmt)
-    rate = result.scalars().first()
+    # Served from rate_cache only: a response cache on top would be a second
+    # copy with its own TTL and invalidation path
+    rate = await rate_cache.get(session, currency)
 
     if not rate:
         raise HTTPException(status_code=404, detail=f"No rate found for {currency}")
 
+    # Rates change about once a day
+    response.headers["Cache-Control"] = "public, max-age=300"
     return rate
 
 
 @router.get("/history", response_model=List[ExchangeRateRead])
-async def get_rate_history(session: SessionDep, limit: int = 10) -> Any:
-    stmt = select(ExchangeRate).order_by(desc(ExchangeRate.recorded_at)).limit(limit)
+@cached(ttl=600, tags=["rates"], max_age=300)
+async def get_rate_history(
+    session: ReadSessionDep,
+    limit: int = Query(10, ge=1, le=1000),
+    currency: Optional[str] = Query(None, max_length=5),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    points: Optional[int] = Query(
+        None, ge=2, le=500, description="Downsample the range to at most N points"
+    ),
+) -> Any:
+    """
+    Rate history, newest first.
+    With `points`, the range is split into equal time buckets per currency and
+    only the last rate of each bucket is returned, so the payload stays small
+    whatever range is requested. `limit` is ignored in that mode.
+    """
+    since, until = _as_naive_utc(since), _as_naive_utc(until)
+
+    filters = []
+    if currency:
+        filters.append(ExchangeRate.currency_code == currency.upper())
+    if since:
+        filters.append(ExchangeRate.recorded_at >= since)
+    if until:
+        filters.append(ExchangeRate.recorded_at <= until)
+
+    if points is None:
+        stmt = (
+            select(ExchangeRate)
+            .where(*filters)
+            .order_by(desc(ExchangeRate.recorded_at))
+            .limit(limit)
+        )
+        result = await session.execute(stmt)
+        return fast_response(ExchangeRateRead, result.scalars().all())
+
+    # Bucket bounds default to the first/last rate of each currency in range
+    epoch = func.extract("epoch", ExchangeRate.recorded_at)
+    per_currency = dict(partition_by=ExchangeRate.currency_code)
+    lower = _epoch(since) if since else func.min(epoch).over(**per_currency)
+    upper = _epoch(until) if until else func.max(epoch).over(**per_currency)
+    # +1s keeps the newest row inside the last bucket and avoids lower == upper
+    bucket = func.width_bucket(epoch, lower, upper + 1, points)
+
+    bucketed = select(ExchangeRate, bucket.label("bucket")).where(*filters).subquery()
+    rate = aliased(ExchangeRate, bucketed)
+    stmt = (
+        select(rate)
+        .distinct(bucketed.c.currency_code, bucketed.c.bucket)
+        .order_by(
+            bucketed.c.currency_code, bucketed.c.bucket, desc(bucketed.c.recorded_at)
+        )
+    )
     result = await session.execute(stmt)
-    return result.scalars().all()
+    rates = result.scalars().all()
+    return fast_response(
+        ExchangeRateRead, sorted(rates, key=lambda r: r.recorded_at, reverse=True)
+    )
+
+
+def _as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # recorded_at is stored without time zone
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _epoch(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
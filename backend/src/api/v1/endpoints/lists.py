@@ -1,13 +1,19 @@
 import uuid
 
 from fastapi import APIRouter, HTTPException, status, Query
-from sqlalchemy import select
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from src.core.change_log import Change, ChangeKind, record_changes
 from src.core.deps import CurrentUser, SessionDep
-from src.models.product import Product
+from src.core.existence_cache import product_exists, store_exists
+from src.core.idempotency import idempotent
+from src.core.query_budget import query_budget
+from src.core.responses import fast_response
 from src.models.shopping_list import ListItem, ShoppingList
-from src.models.store import Store
 from src.models.price import PriceLog
+from src.models.store import Store
 from src.schemas.shopping_list import (
     ListItemCreate,
     ListItemUpdate,
@@ -16,32 +22,52 @@ from src.schemas.shopping_list import (
     ShoppingListUpdate,
 )
 from src.schemas.price import PriceLogCreate
+from src.services.live_updates import publish_price_logged, publish_prices_logged
 
 router = APIRouter()
 
 
+def _list_change(shopping_list: ShoppingList, deleted: bool = False) -> Change:
+    # Items are synced as part of their list
+    return Change(
+        ChangeKind.LIST, str(shopping_list.list_id), shopping_list.user_id, deleted
+    )
+
+
+def _item_added_change(shopping_list: ShoppingList, barcode: str) -> Change:
+    return Change(
+        ChangeKind.ITEM_ADDED,
+        f"{shopping_list.list_id}:{barcode}",
+        shopping_list.user_id,
+    )
+
+
 @router.post("/", response_model=ShoppingListRead)
 async def create_list(
     list_in: ShoppingListCreate, db: SessionDep, current_user: CurrentUser
 ):
     new_list = ShoppingList(**list_in.model_dump(), user_id=current_user.user_id)
     db.add(new_list)
+    await db.flush()  # Get the generated list_id
+    await record_changes(db, _list_change(new_list))
     await db.commit()
     await db.refresh(new_list)
     return new_list
 
 
 @router.get("/", response_model=list[ShoppingListRead])
+@query_budget(3)
 async def get_my_lists(db: SessionDep, current_user: CurrentUser):
     result = await db.execute(
         select(ShoppingList)
         .where(ShoppingList.user_id == current_user.user_id)
         .order_by(ShoppingList.status.asc(), ShoppingList.created_at.desc())
     )
-    return result.scalars().all()
+    return fast_response(ShoppingListRead, result.scalars().all())
 
 
 @router.get("/{list_id}", response_model=ShoppingListRead)
+@query_budget(3)
 async def get_list(list_id: uuid.UUID, db: SessionDep, current_user: CurrentUser):
     result = await db.execute(
         select(ShoppingList).where(ShoppingList.list_id == list_id)
@@ -53,7 +79,7 @@ async def get_list(list_id: uuid.UUID, db: SessionDep, current_user: CurrentUser
     if shopping_list.user_id != current_user.user_id:
         raise HTTPException(status_code=403, detail="Not authorized to view this list")
 
-    return shopping_list
+    return fast_response(ShoppingListRead, shopping_list)
 
 
 @router.put("/{list_id}", response_model=ShoppingListRead)
@@ -76,6 +102,7 @@ async def update_list(
         )
 
     update_data = list_update.model_dump(exclude_unset=True)
+    changes = [_list_change(shopping_list)]
 
     if shopping_list.status == "COMPLETED":
         # Only allow updates if we are changing status back to ACTIVE (re-opening)
@@ -88,14 +115,17 @@ async def update_list(
             # Reset planned prices to defaults (None) on reopen
             for item in shopping_list.items:
                 item.planned_price = None
+                # Prices of completed lists aren't synced, the client's are stale
+                changes.append(_item_added_change(shopping_list, item.product_barcode))
 
     for field, value in update_data.items():
         setattr(shopping_list, field, value)
 
     db.add(shopping_list)
+    await record_changes(db, *changes)
     await db.commit()
     await db.refresh(shopping_list)
-    return shopping_list
+    return fast_response(ShoppingListRead, shopping_list)
 
 
 @router.delete("/{list_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -113,10 +143,13 @@ async def delete_list(list_id: uuid.UUID, db: SessionDep, current_user: CurrentU
         )
 
     await db.delete(shopping_list)
+    await record_changes(db, _list_change(shopping_list, deleted=True))
     await db.commit()
 
 
 @router.post("/{list_id}/complete", response_model=ShoppingListRead)
+@idempotent
+@query_budget(5)
 async def complete_list(
     list_id: uuid.UUID,
     db: SessionDep,
@@ -125,77 +158,98 @@ async def complete_list(
         ...
     ),  # Assume all items were bought at this store for simplicity for now
 ):
-    # 1. Verify list exists and belongs to user
+    # 1. Load the list with its items, and whether the store exists, at once
+    store_known = select(Store.store_id).where(Store.store_id == store_id).exists()
     result = await db.execute(
-        select(ShoppingList).where(ShoppingList.list_id == list_id)
+        select(ShoppingList, store_known.label("store_known"))
+        .options(joinedload(ShoppingList.items))
+        .where(ShoppingList.list_id == list_id)
     )
-    shopping_list = result.scalars().first()
-    if not shopping_list:
+    row = result.unique().first()
+    if not row:
         raise HTTPException(status_code=404, detail="List not found")
+    shopping_list, store_found = row
     if shopping_list.user_id != current_user.user_id:
         raise HTTPException(
             status_code=403, detail="Not authorized to complete this list"
         )
 
     # 2. Verify Store exists
-    store_check = await db.execute(select(Store).where(Store.store_id == store_id))
-    if not store_check.scalars().first():
+    if not store_found:
         raise HTTPException(
             status_code=404, detail=f"Store with ID {store_id} not found."
         )
 
-    # 3. Process each item in the list
-    for item in shopping_list.items:
-        # If item has a price, we want to ensure it is logged and marked as purchased
-        if item.planned_price is not None:
-            if not item.is_purchased:
-                item.is_purchased = True
-
-            # Use item's specific store if assigned, else use the list's completion store
-            final_store_id = item.store_id or store_id
-            if not item.store_id:
-                item.store_id = final_store_id
-
-            # Log price if not already logged for this specific event
-            existing_price_log = await db.execute(
-                select(PriceLog).where(
-                    PriceLog.product_barcode == item.product_barcode,
-                    PriceLog.user_id == current_user.user_id,
-                    PriceLog.store_id == final_store_id,
-                    PriceLog.price == item.planned_price,
-                )
+    # 3. Priced items get their price logged. Items already purchased at a
+    # store had theirs logged by update_item; retries of this request are
+    # answered from the idempotency store instead of running it again.
+    # Items use their own store if assigned, else the list's completion store
+    priced = {
+        (item.product_barcode, item.store_id or store_id, item.planned_price)
+        for item in shopping_list.items
+        if item.planned_price is not None
+        and not (item.is_purchased and item.store_id is not None)
+    }
+
+    new_price_logs = []
+    for barcode, final_store_id, price in priced:
+        price_log_create = PriceLogCreate(
+            product_barcode=barcode,
+            store_id=final_store_id,
+            price=price,
+            currency=shopping_list.currency,
+        )
+        new_price_log = PriceLog(
+            **price_log_create.model_dump(), user_id=current_user.user_id
+        )
+        db.add(new_price_log)
+        new_price_logs.append(new_price_log)
+
+    # 4. Complete the list and mark priced and unpurchased items as purchased,
+    # in a single statement
+    completed = (
+        update(ShoppingList)
+        .where(ShoppingList.list_id == list_id)
+        .values(status="COMPLETED")
+    )
+    pending = [
+        item
+        for item in shopping_list.items
+        if item.planned_price is not None or not item.is_purchased
+    ]
+    if pending:
+        completed = (
+            update(ListItem)
+            .where(
+                ListItem.list_id == list_id,
+                or_(
+                    ListItem.planned_price.is_not(None),
+                    ListItem.is_purchased.is_not(True),
+                ),
             )
-            if not existing_price_log.scalars().first():
-                price_log_create = PriceLogCreate(
-                    product_barcode=item.product_barcode,
-                    store_id=final_store_id,
-                    price=item.planned_price,
-                    currency=shopping_list.currency,
-                )
-                new_price_log = PriceLog(
-                    **price_log_create.model_dump(), user_id=current_user.user_id
-                )
-                db.add(new_price_log)
-            db.add(item)
-        elif not item.is_purchased:
-            # Item has no price but we are completing the list, mark as purchased anyway
-            item.is_purchased = True
-            if not item.store_id:
-                item.store_id = store_id
-            db.add(item)
-
-    # 4. Update shopping list status
-    shopping_list.status = "COMPLETED"
-    db.add(shopping_list)
-
+            .values(
+                is_purchased=True,
+                store_id=func.coalesce(ListItem.store_id, store_id),
+            )
+            .add_cte(completed.cte("completed_list"))
+        )
+    await db.execute(completed, execution_options={"synchronize_session": False})
+    # Mirror the UPDATE on the loaded objects, without making them dirty
+    set_committed_value(shopping_list, "status", "COMPLETED")
+    for item in pending:
+        set_committed_value(item, "is_purchased", True)
+        set_committed_value(item, "store_id", item.store_id or store_id)
+
+    # 5. Insert the price logs, then broadcast them and record the list change
+    await db.flush()
+    await publish_prices_logged(db, new_price_logs, _list_change(shopping_list))
     await db.commit()
-    await db.refresh(
-        shopping_list
-    )  # Refresh to get latest state, including updated items
-    return shopping_list
+    # Loaded items already reflect the update, no refresh needed
+    return fast_response(ShoppingListRead, shopping_list)
 
 
 @router.post("/{list_id}/items", response_model=ShoppingListRead)
+@idempotent
 async def add_item(
     list_id: uuid.UUID,
     item_in: ListItemCreate,
@@ -216,10 +270,7 @@ async def add_item(
     # We check if the product is in our DB. If not, the frontend should probably
     # call the "Create Product" endpoint first, or we could handle it here.
     # For now, we enforce that the product must exist.
-    product_check = await db.execute(
-        select(Product).where(Product.barcode == item_in.product_barcode)
-    )
-    if not product_check.scalars().first():
+    if not await product_exists(db, item_in.product_barcode):
         raise HTTPException(
             status_code=404,
             detail=f"Product {item_in.product_barcode} not found. Scan it first!",
@@ -234,6 +285,7 @@ async def add_item(
     )
     item = existing_item.scalars().first()
 
+    changes = [_list_change(shopping_list)]
     if item:
         # Increment quantity
         item.quantity += item_in.quantity
@@ -242,12 +294,14 @@ async def add_item(
         # Create new item
         new_item = ListItem(list_id=list_id, **item_in.model_dump())
         db.add(new_item)
+        changes.append(_item_added_change(shopping_list, item_in.product_barcode))
 
+    await record_changes(db, *changes)
     await db.commit()
 
     # Refresh parent to load the new item relationship
     await db.refresh(shopping_list)
-    return shopping_list
+    return fast_response(ShoppingListRead, shopping_list)
 
 
 @router.delete("/{list_id}/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -277,9 +331,16 @@ async def delete_item(
 
     # 3. Delete
     await db.delete(item)
+    await record_changes(db, _list_change(shopping_list))
     await db.commit()
 
 
+def _purchase_state(item: ListItem) -> tuple:
+    # Loaded prices are Decimal, updates bring floats
+    price = None if item.planned_price is None else float(item.planned_price)
+    return item.is_purchased, price, item.store_id
+
+
 @router.put("/{list_id}/items/{item_id}", response_model=ShoppingListRead)
 async def update_item(
     list_id: uuid.UUID,
@@ -315,49 +376,44 @@ async def update_item(
         raise HTTPException(status_code=404, detail="Item not found")
 
     # 3. Update
+    before = _purchase_state(item)
     update_data = item_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(item, field, value)
 
-    # If item is marked as purchased, log the price
+    # Log the price when the item becomes purchased at a store with a price,
+    # or its price or store change while purchased. Repeating the same update
+    # changes nothing, so it doesn't log the price twice.
     if (
         item.is_purchased
         and item.planned_price is not None
         and item.store_id is not None
+        and _purchase_state(item) != before
     ):
         # Verify Store exists
-        store_check = await db.execute(
-            select(Store).where(Store.store_id == item.store_id)
-        )
-        if not store_check.scalars().first():
+        if not await store_exists(db, item.store_id):
             raise HTTPException(
                 status_code=404, detail=f"Store with ID {item.store_id} not found."
             )
 
-        # Check if a price log already exists for this item, user, store, and price to avoid duplicates
-        existing_price_log = await db.execute(
-            select(PriceLog).where(
-                PriceLog.product_barcode == item.product_barcode,
-                PriceLog.user_id == current_user.user_id,
-                PriceLog.store_id == item.store_id,
-                PriceLog.price == item.planned_price,
-            )
+        price_log_create = PriceLogCreate(
+            product_barcode=item.product_barcode,
+            store_id=item.store_id,
+            price=item.planned_price,
+            currency=shopping_list.currency,  # Use the list's currency
         )
-        if not existing_price_log.scalars().first():
-            price_log_create = PriceLogCreate(
-                product_barcode=item.product_barcode,
-                store_id=item.store_id,
-                price=item.planned_price,
-                currency=shopping_list.currency,  # Use the list's currency
-            )
-            new_price_log = PriceLog(
-                **price_log_create.model_dump(), user_id=current_user.user_id
-            )
-            db.add(new_price_log)
+        new_price_log = PriceLog(
+            **price_log_create.model_dump(), user_id=current_user.user_id
+        )
+        db.add(new_price_log)
+        await db.flush()
+        await publish_price_logged(db, new_price_log, _list_change(shopping_list))
+    else:
+        await record_changes(db, _list_change(shopping_list))
 
     db.add(item)
     await db.commit()
 
     # 4. Refresh List to return full structure
     await db.refresh(shopping_list)
-    return shopping_list
+    return fast_response(ShoppingListRead, shopping_list)
@@ -1,44 +1,65 @@
-from typing import Optional
-from fastapi import APIRouter, HTTPException
-from sqlalchemy import desc, select, func
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from sqlalchemy import case, desc, select, func, true
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from geoalchemy2 import Geometry
 
-from src.core.deps import CurrentUser, SessionDep
+from src.core.deps import CurrentUser, ReadSessionDep, SessionDep
+from src.core.existence_cache import (
+    known_products,
+    known_stores,
+    violated_foreign_key,
+)
+from src.core.idempotency import idempotent
+from src.core.query_budget import query_budget
+from src.core.response_cache import cached
+from src.core.responses import fast_response
+from src.models.exchange_rate import ExchangeRate
 from src.models.price import PriceLog
-from src.models.product import Product
 from src.models.store import Store
 from src.schemas.price import PriceLogCreate, PriceLogRead, PriceComparison
+from src.services.live_updates import publish_price_logged
 
 router = APIRouter()
 
 
 @router.post("/", response_model=PriceLogRead)
+@idempotent
+@query_budget(3)
 async def report_price(
     price_in: PriceLogCreate, db: SessionDep, current_user: CurrentUser
 ):
-    # 1. Verify Product exists
-    product = await db.execute(
-        select(Product).where(Product.barcode == price_in.product_barcode)
-    )
-    if not product.scalars().first():
-        raise HTTPException(status_code=404, detail="Product not found. Scan it first!")
-
-    # 2. Verify Store exists
-    store = await db.execute(select(Store).where(Store.store_id == price_in.store_id))
-    if not store.scalars().first():
-        raise HTTPException(status_code=404, detail="Store not found.")
-
-    # 3. Save Price Log
+    # Insert right away and let the foreign keys check the product and store:
+    # one round trip instead of three, and no race with a concurrent delete.
+    # Three statements in all: the user lookup, the INSERT and the publish
     new_log = PriceLog(**price_in.model_dump(), user_id=current_user.user_id)
-
     db.add(new_log)
+    try:
+        await db.flush()
+    except IntegrityError as e:
+        await db.rollback()
+        column = violated_foreign_key(e)
+        if column == "product_barcode":
+            known_products.discard(price_in.product_barcode)
+            raise HTTPException(
+                status_code=404, detail="Product not found. Scan it first!"
+            )
+        if column == "store_id":
+            known_stores.discard(price_in.store_id)
+            raise HTTPException(status_code=404, detail="Store not found.")
+        raise
+
+    # The change_log upsert, the live update and the invalidation in one statement
+    await publish_price_logged(db, new_log)
     await db.commit()
-    await db.refresh(new_log)
+    # log_id and recorded_at came back with the INSERT, no refresh needed
     return new_log
 
 
 @router.get("/product/{barcode}", response_model=list[PriceLogRead])
-async def get_product_prices(barcode: str, db: SessionDep):
+@cached(ttl=60, tags=["prices:{barcode}"])
+async def get_product_prices(barcode: str, db: ReadSessionDep):
     """Get history of prices for a product (Newest first)"""
     result = await db.execute(
         select(PriceLog)
@@ -46,20 +67,36 @@ async def get_product_prices(barcode: str, db: SessionDep):
         .order_by(desc(PriceLog.recorded_at))
         .limit(20)
     )
-    return result.scalars().all()
+    return fast_response(PriceLogRead, result.scalars().all())
 
 
 @router.get("/comparison/{barcode}", response_model=list[PriceComparison])
+@cached(ttl=60, tags=["prices:{barcode}", "stores"])
 async def get_price_comparison(
     barcode: str,
-    db: SessionDep,
+    db: ReadSessionDep,
     lat: Optional[float] = None,
     lon: Optional[float] = None,
+    radius_km: Optional[float] = Query(None, gt=0, le=50),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    sort: Literal["price", "score"] = "price",
 ):
     """
     Get the latest price for a product in every store where it has been recorded.
     If lat/lon provided, returns distance to each store.
+    If radius_km is also provided, only stores within that radius are considered
+    ("cheapest nearby" mode), optionally ranked by a price-plus-distance score.
     """
+    if radius_km is not None:
+        if lat is None or lon is None:
+            raise HTTPException(
+                status_code=400, detail="lat and lon are required with radius_km"
+            )
+        rows = await _get_cheapest_nearby(
+            db, barcode, lat, lon, radius_km * 1000, limit or 10, sort
+        )
+        return [_to_comparison(row) for row in rows]
+
     # Subquery to get the latest price log ID per store for this product
     latest_logs_sq = (
         select(
@@ -101,19 +138,101 @@ async def get_price_comparison(
     else:
         stmt = stmt.order_by(PriceLog.price.asc())
 
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
     result = await db.execute(stmt)
 
-    comparisons = []
-    for row in result:
-        comparison_dict = {
-            "price": row.price,
-            "currency": row.currency,
-            "recorded_at": row.recorded_at,
-            "store_id": row.store_id,
-            "store_name": row.store_name,
-            "address": row.address,
-            "distance_meters": getattr(row, "distance_meters", None),
-        }
-        comparisons.append(PriceComparison(**comparison_dict))
-
-    return comparisons
+    return [_to_comparison(row) for row in result]
+
+
+async def _get_cheapest_nearby(
+    db: AsyncSession,
+    barcode: str,
+    lat: float,
+    lon: float,
+    radius_meters: float,
+    limit: int,
+    sort: str,
+):
+    """
+    Filters stores spatially first (GiST index on stores.location) and only then
+    looks up the latest price of the product in each of them, so the work scales
+    with the number of nearby stores instead of every store that ever logged it.
+    """
+    user_location = func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326).cast(
+        type_=Store.location.type
+    )
+
+    nearby_sq = (
+        select(
+            Store.store_id,
+            Store.name.label("store_name"),
+            Store.address,
+            func.ST_Distance(Store.location, user_location).label("distance_meters"),
+        )
+        .where(func.ST_DWithin(Store.location, user_location, radius_meters, True))
+        .subquery("nearby_stores")
+    )
+
+    # Latest price per nearby store, resolved with the (barcode, store, recorded_at) index
+    latest_price = (
+        select(PriceLog.price, PriceLog.currency, PriceLog.recorded_at)
+        .where(
+            PriceLog.product_barcode == barcode,
+            PriceLog.store_id == nearby_sq.c.store_id,
+        )
+        .order_by(desc(PriceLog.recorded_at))
+        .limit(1)
+        .lateral("latest_price")
+    )
+
+    stmt = select(
+        nearby_sq.c.store_id,
+        nearby_sq.c.store_name,
+        nearby_sq.c.address,
+        nearby_sq.c.distance_meters,
+        latest_price.c.price,
+        latest_price.c.currency,
+        latest_price.c.recorded_at,
+    ).select_from(nearby_sq.join(latest_price, true()))
+
+    # Prices are logged in USD, VES and others: compare them converted to VES
+    # with the latest rate. A currency without a rate sorts last (NULL).
+    latest_rate = (
+        select(ExchangeRate.rate_to_ves)
+        .where(ExchangeRate.currency_code == func.upper(latest_price.c.currency))
+        .order_by(desc(ExchangeRate.recorded_at))
+        .limit(1)
+        .lateral("latest_rate")
+    )
+    stmt = stmt.outerjoin(latest_rate, true())
+    price_ves = case(
+        (func.upper(latest_price.c.currency) == "VES", latest_price.c.price),
+        else_=latest_price.c.price * latest_rate.c.rate_to_ves,
+    )
+
+    if sort == "score":
+        # Price relative to the cheapest option plus distance relative to the radius.
+        # 1.0 + 0.0 is the best possible score (cheapest store at the user's location).
+        score = price_ves / func.min(price_ves).over() + (
+            nearby_sq.c.distance_meters / radius_meters
+        )
+        stmt = stmt.order_by(score, nearby_sq.c.distance_meters)
+    else:
+        stmt = stmt.order_by(price_ves, nearby_sq.c.distance_meters)
+
+    result = await db.execute(stmt.limit(limit))
+    return result.all()
+
+
+def _to_comparison(row) -> PriceComparison:
+    return PriceComparison(
+        price=row.price,
+        currency=row.currency,
+        recorded_at=row.recorded_at,
+        store_id=row.store_id,
+        store_name=row.store_name,
+        address=row.address,
+        distance_meters=getattr(row, "distance_meters", None),
+    )
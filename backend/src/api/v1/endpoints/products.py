@@ -3,7 +3,9 @@ from fastapi import APIRouter, HTTPException, Query
 from sqlalchemy import select, or_
 from sqlalchemy.dialects.postgresql import insert
 
-from src.core.deps import CurrentUser, SessionDep
+from src.core.deps import CurrentUser, ReadSessionDep, SessionDep
+from src.core.invalidation import Invalidation, InvalidationKind, publish_invalidation
+from src.core.query_budget import query_budget
 from src.models.product import Product
 from src.models.views import SmartPriceEstimate, PricePrediction
 from src.schemas.product import ProductCreate, ProductRead
@@ -18,7 +20,7 @@ router = APIRouter()
 
 @router.get("/", response_model=List[ProductRead])
 async def search_products(
-    db: SessionDep,
+    db: ReadSessionDep,
     current_user: CurrentUser,
     q: Optional[str] = Query(
         None, description="Search query for name, brand, or category"
@@ -48,7 +50,22 @@ async def search_products(
     return products
 
 
+def _product_with_estimates(barcode: str):
+    """The product plus its estimate and prediction, in one round trip."""
+    return (
+        select(
+            Product,
+            SmartPriceEstimate.estimated_price_usd,
+            PricePrediction.predicted_price_usd,
+        )
+        .outerjoin(SmartPriceEstimate, SmartPriceEstimate.barcode == Product.barcode)
+        .outerjoin(PricePrediction, PricePrediction.product_barcode == Product.barcode)
+        .where(Product.barcode == barcode)
+    )
+
+
 @router.get("/{barcode}", response_model=ProductRead)
+@query_budget(4)
 async def get_product(barcode: str, db: SessionDep, current_user: CurrentUser):
     # Validate the barcode first
     validate_gtin(barcode)
@@ -56,13 +73,11 @@ async def get_product(barcode: str, db: SessionDep, current_user: CurrentUser):
     # Normalize the input barcode to GTIN-13 for consistent lookup
     normalized_barcode = normalize_to_gtin13(barcode)
 
-    result = await db.execute(
-        select(Product).where(Product.barcode == normalized_barcode)
-    )
-    product = result.scalars().first()
+    result = await db.execute(_product_with_estimates(normalized_barcode))
+    row = result.first()
 
     # If product not in DB, try external
-    if not product:
+    if not row:
         external_data = await fetch_product_from_off(barcode)
 
         if not external_data:
@@ -86,36 +101,20 @@ async def get_product(barcode: str, db: SessionDep, current_user: CurrentUser):
         await db.commit()
 
         # Fetch the upserted product to return it
-        result = await db.execute(
-            select(Product).where(Product.barcode == normalized_barcode)
-        )
-        product = result.scalars().first()
+        result = await db.execute(_product_with_estimates(normalized_barcode))
+        row = result.first()
 
-    if not product:
+    if not row:
         raise HTTPException(status_code=500, detail="Failed to upsert product")
 
-    # Fetch estimates
-    estimate_res = await db.execute(
-        select(SmartPriceEstimate).where(
-            SmartPriceEstimate.barcode == normalized_barcode
-        )
-    )
-    estimate = estimate_res.scalars().first()
-
-    # Fetch predictions
-    prediction_res = await db.execute(
-        select(PricePrediction).where(
-            PricePrediction.product_barcode == normalized_barcode
-        )
-    )
-    prediction = prediction_res.scalars().first()
+    product, estimated_price, predicted_price = row
 
     # Convert to schema
     product_data = ProductRead.model_validate(product)
-    if estimate and estimate.estimated_price_usd is not None:
-        product_data.estimated_price_usd = float(estimate.estimated_price_usd)
-    if prediction and prediction.predicted_price_usd is not None:
-        product_data.predicted_price_usd = float(prediction.predicted_price_usd)
+    if estimated_price is not None:
+        product_data.estimated_price_usd = float(estimated_price)
+    if predicted_price is not None:
+        product_data.predicted_price_usd = float(predicted_price)
 
     return product_data
 
@@ -133,6 +132,9 @@ async def create_product(
 
     db_product = Product(**product_in.model_dump())
     db.add(db_product)
+    await publish_invalidation(
+        db, Invalidation(InvalidationKind.PRODUCTS, db_product.barcode)
+    )
     await db.commit()
     await db.refresh(db_product)
     return db_product
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Query
+import math
+
+from fastapi import APIRouter, HTTPException, Query
 from geoalchemy2 import Geometry
 from geoalchemy2.elements import WKTElement
 from sqlalchemy import func, select, or_
 
-from src.core.deps import CurrentUser, SessionDep
+from src.core.deps import CurrentUser, ReadSessionDep, SessionDep
+from src.core.invalidation import Invalidation, InvalidationKind, publish_invalidation
+from src.core.response_cache import cached
+from src.core.responses import fast_response
 from src.models.store import Store
-from src.schemas.store import StoreCreate, StoreRead
+from src.schemas.store import StoreClusterRead, StoreCreate, StoreRead
+from src.services.store_clusters import add_store_to_clusters, get_clusters_in_bbox
 
 router = APIRouter()
 
@@ -23,6 +29,15 @@ async def create_store(
         location=WKTElement(point, srid=4326),
     )
     db.add(new_store)
+    await db.flush()  # Get the generated store_id
+
+    # Keep the precomputed map clusters in sync within the same transaction
+    await add_store_to_clusters(
+        db, new_store.store_id, store_in.latitude, store_in.longitude
+    )
+    await publish_invalidation(
+        db, Invalidation(InvalidationKind.STORES, str(new_store.store_id))
+    )
     await db.commit()
     await db.refresh(new_store)
 
@@ -34,8 +49,9 @@ async def create_store(
 
 
 @router.get("/", response_model=list[StoreRead])
+@cached(ttl=300, tags=["stores"])
 async def search_stores(
-    db: SessionDep,
+    db: ReadSessionDep,
     q: str | None = Query(None),
     limit: int = 50,
     offset: int = 0,
@@ -64,12 +80,65 @@ async def search_stores(
         setattr(store_obj, "longitude", row.longitude)
         stores.append(store_obj)
 
-    return stores
+    return fast_response(StoreRead, stores)
+
+
+def _parse_bbox(bbox: str) -> tuple[float, float, float, float]:
+    """min_lon,min_lat,max_lon,max_lat as finite WGS 84 degrees, else a 422."""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=422,
+            detail="Invalid bbox. Expected min_lon,min_lat,max_lon,max_lat",
+        )
+    # float() accepts "nan" and "inf"
+    if not all(math.isfinite(v) for v in (min_lon, min_lat, max_lon, max_lat)):
+        raise HTTPException(
+            status_code=422, detail="Invalid bbox. Values must be finite"
+        )
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise HTTPException(
+            status_code=422, detail="Invalid bbox. Longitude must be within [-180, 180]"
+        )
+    if not (-90 <= min_lat <= 90 and -90 <= max_lat <= 90):
+        raise HTTPException(
+            status_code=422, detail="Invalid bbox. Latitude must be within [-90, 90]"
+        )
+    if min_lon > max_lon or min_lat > max_lat:
+        raise HTTPException(status_code=422, detail="Invalid bbox. Min exceeds max")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+@router.get("/clusters", response_model=list[StoreClusterRead])
+async def get_store_clusters(
+    db: ReadSessionDep,
+    bbox: str = Query(..., description="min_lon,min_lat,max_lon,max_lat"),
+    zoom: int = Query(..., ge=0, le=22),
+    limit: int = Query(500, ge=1, le=2000),
+):
+    """
+    Returns pre-aggregated store clusters for the visible map area.
+    Payload size depends on the viewport, not on the number of stores.
+    """
+    min_lon, min_lat, max_lon, max_lat = _parse_bbox(bbox)
+    cells = await get_clusters_in_bbox(
+        db, min_lon, min_lat, max_lon, max_lat, zoom, limit
+    )
+    return [
+        StoreClusterRead(
+            latitude=cell.lat_sum / cell.store_count,
+            longitude=cell.lon_sum / cell.store_count,
+            count=cell.store_count,
+            store_ids=cell.sample_store_ids,
+        )
+        for cell in cells
+    ]
 
 
 @router.get("/nearby", response_model=list[StoreRead])
 async def get_nearby_stores(
-    db: SessionDep,
+    db: ReadSessionDep,
     lat: float,
     lon: float,
     radius_meters: int = Query(2345, ge=100, le=50000),
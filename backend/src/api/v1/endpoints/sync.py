@@ -0,0 +1,150 @@
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Query
+from sqlalchemy import Select, desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.change_log import ChangeKind, changes_since, current_cursor
+from src.core.deps import CurrentUser, SessionDep
+from src.core.query_budget import query_budget
+from src.core.responses import FastJSONResponse, orm_to_dict
+from src.models.exchange_rate import ExchangeRate
+from src.models.price import PriceLog
+from src.models.shopping_list import ListItem, ShoppingList
+from src.schemas.exchange_rate import ExchangeRateRead
+from src.schemas.price import PriceLogRead
+from src.schemas.shopping_list import ShoppingListRead
+from src.schemas.sync import SyncRead
+
+router = APIRouter()
+
+
+@router.get("", response_model=SyncRead)
+@query_budget(6)
+async def sync(
+    db: SessionDep,
+    current_user: CurrentUser,
+    since: Optional[int] = Query(
+        None, ge=0, description="Cursor of the previous sync. Omit for a full sync."
+    ),
+):
+    """
+    Everything that changed since the previous sync: the user's lists (with
+    their items), and the prices and exchange rates they depend on. Entities
+    come back whole, so clients replace their copy; one may come twice.
+    With nothing new this is a single indexed query.
+    """
+    user_id = current_user.user_id
+    if since is None:
+        # None below means "all of them"
+        cursor = await current_cursor(db)
+        list_ids = barcodes = currencies = None
+        deleted_list_ids = []
+    else:
+        cursor, changes = await changes_since(
+            db, user_id, since, price_keys=_subscribed_barcodes(user_id)
+        )
+        list_ids, barcodes, currencies = set(), set(), set()
+        added_items = set()
+        deleted_list_ids = []
+        for change in changes:
+            if change.kind is ChangeKind.LIST:
+                if change.deleted:
+                    deleted_list_ids.append(change.key)
+                else:
+                    list_ids.add(uuid.UUID(change.key))
+            elif change.kind is ChangeKind.PRICE:
+                barcodes.add(change.key)
+            elif change.kind is ChangeKind.RATE:
+                currencies.add(change.key)
+            elif change.kind is ChangeKind.ITEM_ADDED:
+                list_id, _, barcode = change.key.partition(":")
+                added_items.add((uuid.UUID(list_id), barcode))
+
+    lists = await _changed_lists(db, user_id, list_ids)
+    if barcodes is not None:
+        # Products just added to a list come with their prices, even unchanged.
+        # The list changed in the same transaction, so it is loaded; the item
+        # may have been removed since
+        barcodes.update(
+            item.product_barcode
+            for shopping_list in lists
+            if shopping_list.status == "ACTIVE"
+            for item in shopping_list.items
+            if (shopping_list.list_id, item.product_barcode) in added_items
+        )
+    prices = await _changed_prices(db, user_id, barcodes)
+    rates = await _changed_rates(db, currencies)
+    return FastJSONResponse(
+        {
+            "cursor": cursor,
+            "lists": [orm_to_dict(ShoppingListRead, item) for item in lists],
+            "deleted_list_ids": deleted_list_ids,
+            "prices": [orm_to_dict(PriceLogRead, log) for log in prices],
+            "rates": [orm_to_dict(ExchangeRateRead, rate) for rate in rates],
+        }
+    )
+
+
+async def _changed_lists(
+    db: AsyncSession, user_id: uuid.UUID, list_ids: set[uuid.UUID] | None
+) -> list[ShoppingList]:
+    if list_ids is not None and not list_ids:
+        return []
+    stmt = select(ShoppingList).where(ShoppingList.user_id == user_id)
+    if list_ids is not None:
+        stmt = stmt.where(ShoppingList.list_id.in_(list_ids))
+    result = await db.execute(
+        stmt.order_by(ShoppingList.status.asc(), ShoppingList.created_at.desc())
+    )
+    return result.scalars().all()
+
+
+def _subscribed_barcodes(user_id: uuid.UUID) -> Select:
+    """Products on the user's active lists, whose prices the user gets."""
+    return (
+        select(ListItem.product_barcode)
+        .join(ListItem.shopping_list)
+        .where(ShoppingList.user_id == user_id, ShoppingList.status == "ACTIVE")
+    )
+
+
+async def _changed_prices(
+    db: AsyncSession, user_id: uuid.UUID, barcodes: set[str] | None
+) -> list[PriceLog]:
+    """
+    Latest price per store of the given products, or of every product on the
+    user's active lists. The given ones are already known to be subscribed.
+    """
+    if barcodes is not None and not barcodes:
+        return []
+    if barcodes is None:
+        stmt = select(PriceLog).where(
+            PriceLog.product_barcode.in_(_subscribed_barcodes(user_id))
+        )
+    else:
+        stmt = select(PriceLog).where(PriceLog.product_barcode.in_(barcodes))
+    # Resolved with the (barcode, store, recorded_at) index
+    result = await db.execute(
+        stmt.distinct(PriceLog.product_barcode, PriceLog.store_id).order_by(
+            PriceLog.product_barcode, PriceLog.store_id, desc(PriceLog.recorded_at)
+        )
+    )
+    return result.scalars().all()
+
+
+async def _changed_rates(
+    db: AsyncSession, currencies: set[str] | None
+) -> list[ExchangeRate]:
+    if currencies is not None and not currencies:
+        return []
+    stmt = select(ExchangeRate)
+    if currencies is not None:
+        stmt = stmt.where(ExchangeRate.currency_code.in_(currencies))
+    result = await db.execute(
+        stmt.distinct(ExchangeRate.currency_code).order_by(
+            ExchangeRate.currency_code, desc(ExchangeRate.recorded_at)
+        )
+    )
+    return result.scalars().all()
@@ -1,48 +1,234 @@
-import uuid
-from fastapi import APIRouter, File, UploadFile, HTTPException
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 import httpx
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import ClientDisconnect
 from src.core.config import settings
+from src.core.deps import CurrentUser, SessionDep, StorageDep
+from src.services import image_dedupe
+from src.services.image_pipeline import InvalidImage, process_image
+from src.services.storage import StorageError
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Variant returned as "url" (and stored in Product.image_url by the app)
+DEFAULT_VARIANT = "lg.jpg"
+# Multipart field holding the image
+IMAGE_FIELD = b"file"
+
+# The body is parsed by _spool_limited, so the schema is declared by hand
+_MULTIPART_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadCancelled(Exception):
+    pass
+
 
-@router.post("/", response_model=dict)
-async def upload_file(file: UploadFile = File(...)):
+class InvalidUpload(Exception):
+    pass
+
+
+@router.post("/", response_model=dict, openapi_extra=_MULTIPART_BODY)
+async def upload_file(
+    request: Request,
+    db: SessionDep,
+    storage: StorageDep,
+):
+    """
+    Uploads a product image. The image is decoded, stripped of metadata and
+    stored as WebP/JPEG variants (sm, md, lg) under a common prefix, e.g.
+    `<sha256>/lg.jpg` and `<sha256>/sm.webp`, so clients can swap the suffix of
+    `url` to request a thumbnail.
+    Uploads are content-addressed: a repeat of an image already stored returns
+    the existing URLs without transcoding or touching storage.
+    """
     if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
         raise HTTPException(status_code=500, detail="Supabase configuration missing")
 
-    # Generate a unique filename
-    file_ext = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-    filename = f"{uuid.uuid4()}.{file_ext}"
+    try:
+        path, content_hash = await _spool_limited(request)
+    except InvalidUpload as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="Image is too large")
+    except UploadCancelled:
+        logger.info("Client disconnected, upload cancelled")
+        raise HTTPException(status_code=499, detail="Upload cancelled")
 
-    # Supabase Storage URL
-    # Bucket: "pictures"
-    upload_url = f"{settings.SUPABASE_URL}/storage/v1/object/pictures/{filename}"
+    # The spooled file is only needed until it is transcoded
+    try:
+        image_dedupe.stats.uploads += 1
+        existing = await image_dedupe.record_exact_hit(db, content_hash)
+        if existing:
+            return {"url": existing.url, "variants": existing.variants}
 
-    headers = {
-        "Authorization": f"Bearer {settings.SUPABASE_KEY}",
-        "Content-Type": file.content_type or "image/jpeg",
-    }
+        transcoded = await process_image(path)
+    except InvalidImage as e:
+        logger.info(f"Rejected upload that is not a valid image: {e}")
+        raise HTTPException(status_code=400, detail="File is not a valid image")
+    finally:
+        os.unlink(path)
 
     try:
-        content = await file.read()
-        async with httpx.AsyncClient() as client:
-            response = await client.post(upload_url, content=content, headers=headers)
-
-            if response.status_code not in [200, 201]:
-                print("Supabase Upload Error:", response.text)
-                raise HTTPException(
-                    status_code=500, detail="Failed to upload image to storage"
+        # Bucket: "pictures". Every variant shares the content hash as prefix
+        urls = await asyncio.gather(
+            *(
+                storage.upload(
+                    f"{content_hash}/{variant.name}",
+                    variant.data,
+                    variant.content_type,
+                    upsert=True,  # Concurrent identical uploads write the same bytes
                 )
+                for variant in transcoded.variants
+            )
+        )
+    except StorageError:
+        raise HTTPException(status_code=500, detail="Failed to upload image to storage")
+    except httpx.HTTPError as e:
+        logger.error(f"Upload Exception: {e}")
+        raise HTTPException(status_code=500, detail="Internal upload error")
+
+    variant_urls = {
+        variant.name: url for variant, url in zip(transcoded.variants, urls)
+    }
+    await image_dedupe.remember_image(
+        db,
+        content_hash,
+        transcoded.perceptual_hash,
+        variant_urls[DEFAULT_VARIANT],
+        variant_urls,
+    )
+    return {"url": variant_urls[DEFAULT_VARIANT], "variants": variant_urls}
+
+
+@router.get("/stats", response_model=dict)
+async def get_upload_stats(db: SessionDep, current_user: CurrentUser):
+    """Reports how many uploads were served from already stored images."""
+    return await image_dedupe.get_dedupe_report(db)
+
+
+class _ImagePartReader:
+    """python-multipart callbacks keeping the data of the image field's part."""
+
+    def __init__(self) -> None:
+        self.found = False
+        self.chunks: list[bytes] = []
+        self._in_image = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
 
-        # Return the public URL
-        # Assumption: Bucket is public. URL format: {SUPABASE_URL}/storage/v1/object/public/{bucket}/{filename}
-        public_url = (
-            f"{settings.SUPABASE_URL}/storage/v1/object/public/pictures/{filename}"
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        # Only the first file sent in the image field counts
+        self._in_image = (
+            not self.found
+            and options.get(b"name") == IMAGE_FIELD
+            and b"filename" in options
         )
+        self.found = self.found or self._in_image
 
-        return {"url": public_url}
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_image:
+            self.chunks.append(data[start:end])
 
-    except Exception as e:
-        print("Upload Exception:", str(e))
-        raise HTTPException(status_code=500, detail="Internal upload error")
+    def on_part_end(self) -> None:
+        self._in_image = False
+
+
+async def _spool_limited(request: Request) -> tuple[str, str]:
+    """
+    Parses the multipart body as it arrives and writes the image part straight
+    to a named temporary file, enforcing the size limit and hashing as it goes:
+    nothing is buffered before the limit applies, and the image worker reads
+    the file from disk. Returns the file's path (the caller deletes it) and the
+    sha256 hex digest.
+    """
+    content_type, options = parse_options_header(
+        request.headers.get("content-type", "")
+    )
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise InvalidUpload("Expected a multipart/form-data body")
+
+    reader = _ImagePartReader()
+    parser = MultipartParser(boundary, reader.callbacks())
+    digest = hashlib.sha256()
+    size = 0
+    spool = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+    try:
+        with spool:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                data = b"".join(reader.chunks)
+                reader.chunks.clear()
+                if not data:
+                    continue
+                size += len(data)
+                if size > settings.MAX_UPLOAD_BYTES:
+                    raise UploadTooLarge()
+                digest.update(data)
+                await run_in_threadpool(spool.write, data)
+            parser.finalize()
+        if not reader.found:
+            raise InvalidUpload("An image is required in the 'file' field")
+    except ClientDisconnect:
+        os.unlink(spool.name)
+        raise UploadCancelled()
+    except FormParserError as e:
+        os.unlink(spool.name)
+        raise InvalidUpload(f"Malformed multipart body: {e}")
+    except BaseException:
+        os.unlink(spool.name)
+        raise
+    return spool.name, digest.hexdigest()
@@ -0,0 +1,141 @@
+import uuid
+from dataclasses import dataclass
+from enum import Enum
+from typing import Sequence
+
+from sqlalchemy import BigInteger, Select, Text, func, or_, select, true, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.notifications import notify_statement
+from src.models.change_log import ChangeLogEntry
+
+
+class ChangeKind(str, Enum):
+    LIST = "list"  # key: list_id, with the owner's user_id
+    PRICE = "price"  # key: product barcode
+    RATE = "rate"  # key: currency code
+    # key: "<list_id>:<barcode>", with the owner's user_id. The product is
+    # new on the list: sync sends its current prices, not only later changes
+    ITEM_ADDED = "item_added"
+
+
+@dataclass(frozen=True)
+class Change:
+    """
+    "The entity of `kind` with `key` changed": clients refetch its current
+    state, so recording a change twice is harmless.
+    """
+
+    kind: ChangeKind
+    key: str
+    user_id: uuid.UUID | None = None
+    deleted: bool = False
+
+
+def _watermark():
+    # Oldest transaction still running: every older one has finished
+    return func.pg_snapshot_xmin(func.pg_current_snapshot()).cast(Text).cast(BigInteger)
+
+
+async def record_changes(
+    db: AsyncSession,
+    *changes: Change,
+    notifications: Sequence[tuple[str, str]] = (),
+) -> None:
+    """
+    Marks entities as changed inside the caller's transaction, one statement
+    for any number of changes. The (channel, payload) `notifications` are
+    queued by the same statement.
+    """
+    # ON CONFLICT can't update the same row twice in one statement
+    latest = {(change.kind, change.key): change for change in changes}
+    if not latest:
+        if notifications:
+            await db.execute(notify_statement(notifications))
+        return
+    stmt = insert(ChangeLogEntry).values(
+        [
+            dict(
+                kind=change.kind.value,
+                entity_key=change.key,
+                user_id=change.user_id,
+                deleted=change.deleted,
+            )
+            for change in latest.values()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ChangeLogEntry.kind, ChangeLogEntry.entity_key],
+        set_=dict(
+            user_id=stmt.excluded.user_id,
+            deleted=stmt.excluded.deleted,
+            tx=stmt.excluded.tx,
+            changed_at=func.now(),
+        ),
+    )
+    if notifications:
+        # Data-modifying CTEs run whether or not the main query reads them
+        stmt = notify_statement(notifications).add_cte(stmt.cte("changes"))
+    await db.execute(stmt)
+
+
+async def current_cursor(db: AsyncSession) -> int:
+    """Cursor for a full sync. Read it before the data it covers."""
+    return await db.scalar(select(_watermark()))
+
+
+async def changes_since(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    cursor: int,
+    price_keys: Select | None = None,
+) -> tuple[int, list[Change]]:
+    """
+    The user's changes and the shared ones made by transactions from `cursor`
+    on, and the cursor for the next call, in one statement (one snapshot).
+    `price_keys` selects the barcodes the user follows: changes to other
+    prices are left out.
+
+    The next cursor is the oldest transaction still running rather than the
+    newest change seen, so a change committed late by an older transaction
+    isn't skipped. Changes around the cursor may come twice.
+    """
+    columns = (
+        ChangeLogEntry.kind,
+        ChangeLogEntry.entity_key,
+        ChangeLogEntry.user_id,
+        ChangeLogEntry.deleted,
+    )
+    shared = select(*columns).where(
+        ChangeLogEntry.user_id.is_(None), ChangeLogEntry.tx >= cursor
+    )
+    if price_keys is not None:
+        # Only checked for the shared rows past the cursor
+        shared = shared.where(
+            or_(
+                ChangeLogEntry.kind != ChangeKind.PRICE.value,
+                ChangeLogEntry.entity_key.in_(price_keys),
+            )
+        )
+    # One branch per index; an OR would make the planner scan both anyway
+    entries = union_all(
+        select(*columns).where(
+            ChangeLogEntry.user_id == user_id, ChangeLogEntry.tx >= cursor
+        ),
+        shared,
+    ).subquery()
+    watermark = select(_watermark().label("cursor")).subquery()
+    # Outer join: the cursor comes back even when nothing changed
+    result = await db.execute(
+        select(watermark.c.cursor, *entries.c).select_from(
+            watermark.outerjoin(entries, true())
+        )
+    )
+    rows = result.all()
+    changes = [
+        Change(ChangeKind(row.kind), row.entity_key, row.user_id, row.deleted)
+        for row in rows
+        if row.kind is not None
+    ]
+    return rows[0].cursor, changes
@@ -11,6 +11,52 @@ class Settings(BaseSettings):
     POSTGRES_SERVER: str
     POSTGRES_PORT: int = 5432
     POSTGRES_DB: str
+    # Optional read replica used by read-heavy GET endpoints (same credentials)
+    POSTGRES_REPLICA_SERVER: str | None = None
+    POSTGRES_REPLICA_PORT: int = 5432
+
+    # Connection pool (per engine, per worker process)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    # asyncpg prepared statement cache, set to 0 behind pgbouncer transaction pooling
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    # Observability
+    SLOW_QUERY_MS: float = 200.0  # Statements slower than this are logged
+    # Adds a Server-Timing header with the SQL breakdown to every response
+    DEBUG_TIMING_HEADER: bool = False
+    # Dev mode: log statements repeated within a request (N+1 patterns)
+    QUERY_DIAGNOSTICS: bool = False
+    N_PLUS_ONE_THRESHOLD: int = 3  # Same statement shape this many times
+
+    # In-process cache of public GET responses (per worker)
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2048
+    # Barcodes and store ids known to exist, so writes skip the existence check
+    EXISTENCE_CACHE_TTL_SECONDS: float = 600.0
+    EXISTENCE_CACHE_MAX_ENTRIES: int = 50_000
+
+    # Scheduled jobs run on whichever worker holds the leader advisory lock
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_POLL_SECONDS: float = 10.0  # Leadership check / takeover delay
+
+    # Background job queue (python -m src.worker)
+    JOB_WORKER_CONCURRENCY: int = 4  # Batches processed at once per worker
+    JOB_POLL_SECONDS: float = 5.0  # Fallback when no NOTIFY wakes the worker
+    JOB_TIMEOUT_SECONDS: float = 120.0
+    # How long a claimed batch stays leased; keep it above JOB_TIMEOUT_SECONDS
+    JOB_LEASE_SECONDS: float = 300.0
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: float = 10.0  # Doubles with every failed attempt
+    JOB_RETRY_MAX_SECONDS: float = 3600.0
+    JOB_WORKER_METRICS_PORT: int = 9101
+
+    # Responses kept for replaying retries sent with an Idempotency-Key header
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    # A retry arriving while the first attempt still runs gets a 409 until then
+    IDEMPOTENCY_LOCK_SECONDS: int = 60
 
     # Security
     SECRET_KEY: str
@@ -23,10 +69,20 @@ class Settings(BaseSettings):
     MAIL_PORT: int = 587
     MAIL_SERVER: str
     MAIL_FROM_NAME: str = "Centimos App"
+    MAIL_STARTTLS: bool = True
+    MAIL_SSL_TLS: bool = False
+    # Set to False (with STARTTLS off) for a local stand-in like aiosmtpd
+    MAIL_USE_CREDENTIALS: bool = True
+    MAIL_VALIDATE_CERTS: bool = True
+    MAIL_TIMEOUT_SECONDS: float = 30.0
+    MAIL_POOL_SIZE: int = 2  # SMTP connections kept open by the job worker
+    MAIL_IDLE_TIMEOUT_SECONDS: float = 60.0
 
     # Supabase Storage
     SUPABASE_URL: str
     SUPABASE_KEY: str
+    MAX_UPLOAD_BYTES: int = 15 * 1024 * 1024  # 15 MB
+    IMAGE_WORKERS: int = 2  # Processes used to transcode uploaded images
 
     # Configuration to read from .env file
     model_config = SettingsConfigDict(
@@ -37,5 +93,16 @@ class Settings(BaseSettings):
     def SQLALCHEMY_DATABASE_URI(self) -> str:
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def SQLALCHEMY_REPLICA_URI(self) -> str | None:
+        if not self.POSTGRES_REPLICA_SERVER:
+            return None
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_REPLICA_SERVER}:{self.POSTGRES_REPLICA_PORT}/{self.POSTGRES_DB}"
+
+    @property
+    def POSTGRES_DSN(self) -> str:
+        """Plain DSN for direct asyncpg connections (LISTEN/NOTIFY)."""
+        return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+
 
 settings = Settings()
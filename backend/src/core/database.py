@@ -1,9 +1,149 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.core.config import settings
+from src.core.metrics import instrument_engine, register_pool_collector
+
+
+@dataclass
+class PoolWaitStats:
+    """Time spent waiting to get a connection out of a pool."""
+
+    acquisitions: int = 0
+    timeouts: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.acquisitions += 1
+        self.total_wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited."""
+
+    wait_stats: PoolWaitStats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.timeouts += 1
+            raise
+        self.wait_stats.record(time.perf_counter() - started)
+        return connection
+
+
+def _create_engine(url: str, wait_stats: PoolWaitStats) -> AsyncEngine:
+    # Stats live on a per-engine subclass so they survive pool.recreate()
+    poolclass = type("TimedQueuePool", (TimedQueuePool,), {"wait_stats": wait_stats})
+    return create_async_engine(
+        url,
+        echo=False,
+        poolclass=poolclass,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    )
+
+
+engine = _create_engine(settings.SQLALCHEMY_DATABASE_URI, PoolWaitStats())
+
+# Without a replica configured, reads go to the primary
+read_engine = (
+    _create_engine(settings.SQLALCHEMY_REPLICA_URI, PoolWaitStats())
+    if settings.SQLALCHEMY_REPLICA_URI
+    else engine
+)
 
-engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URI, echo=False)
+instrument_engine(engine)
+if read_engine is not engine:
+    instrument_engine(read_engine)
 
 AsyncSessionLocal = async_sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
 )
+
+# Set while a cache is being filled, see reads_from_primary
+_read_from_primary: ContextVar[bool] = ContextVar("read_from_primary", default=False)
+
+
+@contextmanager
+def reads_from_primary() -> Iterator[None]:
+    """
+    Sends read sessions used inside the block to the primary. For reads that
+    fill a cache: right after an invalidation a lagging replica may still
+    return the old rows, which would then stay cached for the whole TTL.
+    Sessions pick their engine when they first connect.
+    """
+    token = _read_from_primary.set(True)
+    try:
+        yield
+    finally:
+        _read_from_primary.reset(token)
+
+
+class ReadSession(Session):
+    """Session on the replica, or on the primary inside reads_from_primary()."""
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if _read_from_primary.get():
+            return engine.sync_engine
+        return read_engine.sync_engine
+
+
+AsyncReadSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=ReadSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
+
+def get_pool_status() -> dict:
+    """Utilisation of each connection pool, plus checkout wait times."""
+    engines = {"primary": engine}
+    if read_engine is not engine:
+        engines["replica"] = read_engine
+
+    status = {}
+    for name, pool_engine in engines.items():
+        pool = pool_engine.pool
+        waits = pool.wait_stats
+        status[name] = {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_connections": settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+            "acquisitions": waits.acquisitions,
+            "timeouts": waits.timeouts,
+            "avg_wait_ms": (
+                waits.total_wait_seconds / waits.acquisitions * 1000
+                if waits.acquisitions
+                else 0.0
+            ),
+            "max_wait_ms": waits.max_wait_seconds * 1000,
+        }
+    return status
+
+
+register_pool_collector(get_pool_status)
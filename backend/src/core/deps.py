@@ -1,7 +1,7 @@
 from typing import Annotated, AsyncGenerator
 import uuid
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import ValidationError
@@ -9,9 +9,10 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.config import settings
-from src.core.database import AsyncSessionLocal
+from src.core.database import AsyncReadSessionLocal, AsyncSessionLocal
 from src.models.user import User
 from src.schemas.user import TokenPayload
+from src.services.storage import StorageClient
 
 # Define the OAuth2 scheme
 reusable_oauth2 = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
@@ -22,7 +23,14 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only endpoints; uses the read replica when configured."""
+    async with AsyncReadSessionLocal() as session:
+        yield session
+
+
 SessionDep = Annotated[AsyncSession, Depends(get_db)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
@@ -56,3 +64,11 @@ async def get_current_user(session: SessionDep, token: TokenDep) -> User:
 
 
 CurrentUser = Annotated[User, Depends(get_current_user)]
+
+
+def get_storage(request: Request) -> StorageClient:
+    # Created in the app lifespan, see src.main
+    return request.app.state.storage
+
+
+StorageDep = Annotated[StorageClient, Depends(get_storage)]
@@ -1,23 +1,12 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from src.core.config import settings
+from email.message import EmailMessage
+from email.utils import formataddr
 
-# Configure the connection to the email server
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-)
+from src.core.config import settings
 
 
-async def send_reset_code(email_to: str, code: str):
+def reset_code_message(email_to: str, code: str) -> EmailMessage:
     """
-    Sends the 6-digit reset code to the user.
+    The email carrying the 6-digit reset code, sent by the job worker.
     """
 
     html = f"""
@@ -31,12 +20,9 @@ async def send_reset_code(email_to: str, code: str):
     </div>
     """
 
-    message = MessageSchema(
-        subject="Your Centimos Password Reset Code",
-        recipients=[email_to],
-        body=html,
-        subtype=MessageType.html,
-    )
-
-    fm = FastMail(conf)
-    await fm.send_message(message)
+    message = EmailMessage()
+    message["From"] = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM))
+    message["To"] = email_to
+    message["Subject"] = "Your Centimos Password Reset Code"
+    message.set_content(html, subtype="html")
+    return message
@@ -0,0 +1,99 @@
+import time
+import uuid
+from collections import OrderedDict
+from typing import Hashable
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.invalidation import Invalidation
+from src.models.product import Product
+from src.models.store import Store
+
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+class ExistenceCache:
+    """
+    Bounded LRU of keys (barcodes, store ids) confirmed to exist, with a TTL,
+    so hot paths can skip their existence SELECT. Only positive answers are
+    kept: a new row must be usable right away.
+    """
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._keys: OrderedDict[str, float] = OrderedDict()  # key -> expires at
+
+    def __contains__(self, key: Hashable) -> bool:
+        key = str(key)
+        expires_at = self._keys.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._keys[key]
+            return False
+        self._keys.move_to_end(key)
+        return True
+
+    def add(self, key: Hashable) -> None:
+        key = str(key)
+        self._keys[key] = time.monotonic() + self.ttl
+        self._keys.move_to_end(key)
+        while len(self._keys) > self.max_entries:
+            self._keys.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        self._keys.pop(str(key), None)
+
+    def handle_invalidation(self, invalidation: Invalidation) -> None:
+        if invalidation.key:
+            self.discard(invalidation.key)
+        else:
+            self._keys.clear()
+
+
+def violated_foreign_key(error: IntegrityError) -> str | None:
+    """
+    Column of the foreign key `error` violated, or None for other errors.
+    Relies on Postgres' default constraint names: <table>_<column>_fkey.
+    """
+    if getattr(error.orig, "sqlstate", None) != FOREIGN_KEY_VIOLATION:
+        return None
+    violation = error.orig.__cause__
+    table = getattr(violation, "table_name", None)
+    constraint = getattr(violation, "constraint_name", None) or ""
+    prefix, suffix = f"{table}_", "_fkey"
+    if not (constraint.startswith(prefix) and constraint.endswith(suffix)):
+        return None
+    return constraint[len(prefix) : -len(suffix)]
+
+
+known_products = ExistenceCache(
+    settings.EXISTENCE_CACHE_MAX_ENTRIES, settings.EXISTENCE_CACHE_TTL_SECONDS
+)
+known_stores = ExistenceCache(
+    settings.EXISTENCE_CACHE_MAX_ENTRIES, settings.EXISTENCE_CACHE_TTL_SECONDS
+)
+
+
+async def product_exists(db: AsyncSession, barcode: str) -> bool:
+    """Checks known_products first, the database only on a miss."""
+    if barcode in known_products:
+        return True
+    if await db.scalar(select(Product.barcode).where(Product.barcode == barcode)):
+        known_products.add(barcode)
+        return True
+    return False
+
+
+async def store_exists(db: AsyncSession, store_id: uuid.UUID) -> bool:
+    """Checks known_stores first, the database only on a miss."""
+    if store_id in known_stores:
+        return True
+    if await db.scalar(select(Store.store_id).where(Store.store_id == store_id)):
+        known_stores.add(store_id)
+        return True
+    return False
@@ -0,0 +1,227 @@
+import hashlib
+import logging
+from datetime import timedelta
+from typing import Callable, TypeVar
+
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects.postgresql import insert
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
+from src.core.query_budget import untracked_statements
+from src.core.responses import FastJSONResponse
+from src.models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+
+F = TypeVar("F", bound=Callable)
+
+
+def idempotent(endpoint: F) -> F:
+    """Lets clients retry the endpoint safely by sending an Idempotency-Key header."""
+    endpoint.idempotent = True
+    return endpoint
+
+
+def _matched_route(scope: Scope):
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return route
+    return None
+
+
+async def _read_body(receive: Receive) -> bytes | None:
+    """The whole request body, or None if the client disconnected."""
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body.extend(message.get("body", b""))
+        if not message.get("more_body", False):
+            return bytes(body)
+
+
+async def _claim(key_hash: bytes, request_hash: bytes) -> IdempotencyKey | None:
+    """
+    Registers the request as running. Returns None when this request owns the
+    key, else the existing row (finished, running, or a different request).
+    """
+    stmt = insert(IdempotencyKey).values(
+        key_hash=key_hash,
+        request_hash=request_hash,
+        expires_at=func.now() + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+    )
+    # An expired row (old response, or a crashed attempt) is taken over
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IdempotencyKey.key_hash],
+        set_=dict(
+            request_hash=stmt.excluded.request_hash,
+            status_code=None,
+            media_type=None,
+            body=None,
+            expires_at=stmt.excluded.expires_at,
+        ),
+        where=IdempotencyKey.expires_at < func.now(),
+    ).returning(IdempotencyKey.key_hash)
+
+    async with AsyncSessionLocal() as db:
+        claimed = await db.scalar(stmt)
+        await db.commit()
+        if claimed is not None:
+            return None
+        existing = await db.get(IdempotencyKey, key_hash)
+        # Deleted in between (the first attempt failed): report it as running
+        return existing or IdempotencyKey(key_hash=key_hash, request_hash=request_hash)
+
+
+async def _finish(
+    key_hash: bytes, status_code: int, media_type: str | None, body: bytes
+) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key_hash == key_hash)
+            .values(
+                status_code=status_code,
+                media_type=media_type,
+                body=body,
+                expires_at=func.now()
+                + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+            )
+        )
+        await db.commit()
+
+
+async def _release(key_hash: bytes) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.key_hash == key_hash)
+        )
+        await db.commit()
+
+
+async def purge_expired_idempotency_keys() -> None:
+    """Scheduled job: drops stored responses past their TTL."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at < func.now())
+        )
+        await db.commit()
+    logger.info(f"Purged {result.rowcount} expired idempotency keys")
+
+
+class IdempotencyMiddleware:
+    """
+    Stores the response of POSTs to @idempotent endpoints sent with an
+    Idempotency-Key header, and replays it for retries with the same key
+    instead of running the endpoint again. Keys are scoped to the caller's
+    Authorization header. 5xx responses aren't stored, so those can be retried.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get(IDEMPOTENCY_HEADER)
+        route = _matched_route(scope) if key is not None else None
+        if not getattr(getattr(route, "endpoint", None), "idempotent", False):
+            await self.app(scope, receive, send)
+            return
+        # Label metrics by route even when the router never sees the request
+        scope["route"] = route
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = FastJSONResponse(
+                {"detail": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"},
+                status_code=400,
+            )
+            await response(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        if body is None:
+            return
+        key_hash = hashlib.sha256(
+            f"{headers.get('authorization', '')}\n{scope['path']}\n{key}".encode()
+        ).digest()
+        request_hash = hashlib.sha256(scope["query_string"] + b"\n" + body).digest()
+
+        with untracked_statements():
+            existing = await _claim(key_hash, request_hash)
+        if existing is not None:
+            await self._answer_retry(existing, request_hash, scope, receive, send)
+            return
+
+        body_sent = False
+
+        async def receive_wrapper() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status_code = 500
+        media_type = None
+        chunks = []
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, media_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                media_type = Headers(raw=message["headers"]).get("content-type")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        stored = False
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+            if status_code < 500:
+                with untracked_statements():
+                    await _finish(key_hash, status_code, media_type, b"".join(chunks))
+                stored = True
+        finally:
+            if not stored:
+                with untracked_statements():
+                    await _release(key_hash)
+
+    async def _answer_retry(
+        self,
+        existing: IdempotencyKey,
+        request_hash: bytes,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        if existing.request_hash != request_hash:
+            response = FastJSONResponse(
+                {"detail": "Idempotency-Key was already used for a different request"},
+                status_code=422,
+            )
+        elif existing.status_code is None:
+            response = FastJSONResponse(
+                {"detail": "A request with this Idempotency-Key is still in progress"},
+                status_code=409,
+            )
+        else:
+            response = Response(
+                existing.body,
+                status_code=existing.status_code,
+                media_type=existing.media_type,
+                headers={"Idempotent-Replayed": "true"},
+            )
+        await response(scope, receive, send)
@@ -0,0 +1,131 @@
+import json
+import logging
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.core.notifications import notify_statement
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache_invalidation"
+# Session.info key of the events waiting for the transaction to commit
+_PENDING_KEY = "pending_invalidations"
+
+
+class InvalidationKind(str, Enum):
+    PRODUCTS = "products"
+    STORES = "stores"
+    PRICES = "prices"  # key: product barcode
+    RATES = "rates"  # key: currency code
+
+
+@dataclass(frozen=True)
+class Invalidation:
+    """
+    "Something of `kind` changed". Without a key it covers every entry of that
+    kind. Evicting is idempotent, so receiving an event twice is harmless.
+    """
+
+    kind: InvalidationKind
+    key: str | None = None
+
+    @property
+    def tag(self) -> str:
+        """Response cache tag, e.g. "prices:7591234567890" or "stores"."""
+        return self.kind.value if self.key is None else f"{self.kind.value}:{self.key}"
+
+
+InvalidationHandler = Callable[[Invalidation], None]
+
+
+class InvalidationBus:
+    """
+    Keeps the in-process caches of every worker coherent.
+    Write paths publish events inside their transaction; once it commits they
+    are applied locally and NOTIFY carries them to the other workers.
+    """
+
+    def __init__(self) -> None:
+        self._handlers: dict[InvalidationKind, list[InvalidationHandler]] = defaultdict(
+            list
+        )
+        # Lets a worker skip its own events, which it applied at commit time
+        self.origin = uuid.uuid4().hex
+
+    def subscribe(self, kind: InvalidationKind, handler: InvalidationHandler) -> None:
+        self._handlers[kind].append(handler)
+
+    def apply(self, events: list[Invalidation]) -> None:
+        for invalidation in events:
+            for handler in self._handlers.get(invalidation.kind, []):
+                try:
+                    handler(invalidation)
+                except Exception:
+                    logger.exception(f"Invalidation handler failed for {invalidation}")
+
+    def flush(self) -> None:
+        """
+        Evicts everything. Used when the listener reconnects, since events sent
+        while it was disconnected are lost.
+        """
+        logger.info("Flushing in-process caches")
+        self.apply([Invalidation(kind) for kind in self._handlers])
+
+    def stage(self, db: AsyncSession, *events: Invalidation) -> list[tuple[str, str]]:
+        """
+        Queues `events` for this worker's commit and returns the (channel,
+        payload) NOTIFYs carrying them to the others, for callers that send
+        them with other statements. Nothing happens unless the NOTIFYs are
+        sent and the transaction commits.
+        """
+        if not events:
+            return []
+        db.info.setdefault(_PENDING_KEY, []).extend(events)
+        return [
+            (
+                INVALIDATION_CHANNEL,
+                json.dumps(
+                    {"kind": e.kind.value, "key": e.key, "origin": self.origin},
+                    separators=(",", ":"),
+                ),
+            )
+            for e in events
+        ]
+
+    async def publish(self, db: AsyncSession, *events: Invalidation) -> None:
+        """Queues `events`; nothing happens unless the transaction commits."""
+        notifications = self.stage(db, *events)
+        if notifications:
+            await db.execute(notify_statement(notifications))
+
+    def handle_notification(self, payload: str) -> None:
+        data = json.loads(payload)
+        if data.get("origin") == self.origin:
+            return
+        self.apply([Invalidation(InvalidationKind(data["kind"]), data.get("key"))])
+
+
+bus = InvalidationBus()
+
+
+async def publish_invalidation(db: AsyncSession, *events: Invalidation) -> None:
+    await bus.publish(db, *events)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session: Session) -> None:
+    events = session.info.pop(_PENDING_KEY, None)
+    if events:
+        bus.apply(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
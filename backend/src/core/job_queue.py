@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Awaitable, Callable
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import Interval, bindparam, delete, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.notifications import notify
+from src.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+# Wakes idle workers as soon as a job is committed
+JOBS_CHANNEL = "jobs_enqueued"
+
+JOBS_PROCESSED = Counter(
+    "jobs_processed_total", "Jobs run by outcome", ["job_type", "outcome"]
+)
+BATCH_DURATION = Histogram(
+    "job_batch_duration_seconds", "Run time of a batch of jobs", ["job_type"]
+)
+
+# Receives the payloads of a batch. Returns None when all succeeded, or one
+# entry per payload: None for success, the exception for a failure.
+HandlerFunc = Callable[[list[dict]], Awaitable[list[BaseException | None] | None]]
+
+
+@dataclass
+class JobHandler:
+    func: HandlerFunc
+    batch_size: int
+
+
+_handlers: dict[str, JobHandler] = {}
+
+
+def job_handler(job_type: str, batch_size: int = 1):
+    """Registers the decorated coroutine as the handler of `job_type` jobs."""
+
+    def decorator(func: HandlerFunc) -> HandlerFunc:
+        _handlers[job_type] = JobHandler(func, batch_size)
+        return func
+
+    return decorator
+
+
+async def enqueue(
+    db: AsyncSession,
+    job_type: str,
+    payload: dict[str, Any],
+    delay: float = 0,
+    max_attempts: int | None = None,
+) -> None:
+    """
+    Adds a job inside the caller's transaction, so it only exists (and workers
+    are only woken) if the transaction commits.
+    """
+    job = Job(
+        job_type=job_type,
+        payload=payload,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+    if delay:
+        job.run_at = func.now() + timedelta(seconds=delay)
+    db.add(job)
+    await notify(db, JOBS_CHANNEL, job_type)
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter, so failed batches don't retry in lockstep."""
+    delay = settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return min(delay, settings.JOB_RETRY_MAX_SECONDS) * random.uniform(0.8, 1.2)
+
+
+def _claimable():
+    ready = (Job.status == "queued") & (Job.run_at <= func.now())
+    # Leased by a worker that died (or hung) before finishing it
+    abandoned = (Job.status == "running") & (Job.locked_until < func.now())
+    return ready | abandoned
+
+
+async def _claim(db: AsyncSession) -> list[Job]:
+    """
+    Leases the oldest claimable job plus more of the same type, up to the
+    handler's batch size, and commits, so no row lock or connection is held
+    while the handler runs. Rows locked by other workers are skipped.
+    Every claim counts as an attempt, so a job that kills its worker can't
+    be retried forever.
+    """
+    job_type = await db.scalar(
+        select(Job.job_type)
+        .where(_claimable())
+        .order_by(Job.run_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if job_type is None:
+        await db.rollback()
+        return []
+    handler = _handlers.get(job_type)
+    batch = (
+        select(Job.job_id)
+        .where(_claimable(), Job.job_type == job_type)
+        .order_by(Job.run_at)
+        .limit(handler.batch_size if handler else 1)
+        .with_for_update(skip_locked=True)
+    )
+    jobs = await db.scalars(
+        update(Job)
+        .where(Job.job_id.in_(batch.scalar_subquery()))
+        .values(
+            status="running",
+            attempts=Job.attempts + 1,
+            locked_until=func.now() + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+        )
+        .returning(Job)
+    )
+    jobs = jobs.all()
+    await db.commit()
+    return jobs
+
+
+async def _run_handler(job_type: str, jobs: list[Job]) -> list[BaseException | None]:
+    handler = _handlers.get(job_type)
+    if handler is None:
+        # E.g. a worker older than the API during a deploy; retry later
+        error = LookupError(f"No handler registered for job type '{job_type}'")
+        return [error] * len(jobs)
+    try:
+        results = await asyncio.wait_for(
+            handler.func([job.payload for job in jobs]),
+            settings.JOB_TIMEOUT_SECONDS,
+        )
+    except Exception as e:
+        return [e] * len(jobs)
+    return results or [None] * len(jobs)
+
+
+async def _finish(
+    db: AsyncSession, job_type: str, outcomes: list[tuple[Job, BaseException | None]]
+) -> None:
+    """
+    Records the outcome of a batch in one short transaction. Each statement
+    only touches the job if it still holds this claim (same attempt, still
+    running): a job whose lease expired may already belong to another worker.
+    """
+    done = [(job.job_id, job.attempts) for job, error in outcomes if error is None]
+    if done:
+        await db.execute(
+            delete(Job).where(
+                tuple_(Job.job_id, Job.attempts).in_(done), Job.status == "running"
+            )
+        )
+        JOBS_PROCESSED.labels(job_type, "success").inc(len(done))
+
+    failures = []
+    for job, error in outcomes:
+        if error is None:
+            continue
+        failed = job.attempts >= job.max_attempts
+        failures.append(
+            dict(
+                claimed_id=job.job_id,
+                claimed_attempts=job.attempts,
+                new_status="failed" if failed else "queued",
+                delay=timedelta(seconds=0 if failed else retry_delay(job.attempts)),
+                error=f"{type(error).__name__}: {error}",
+            )
+        )
+        if failed:
+            JOBS_PROCESSED.labels(job_type, "failed").inc()
+            logger.error(f"Job {job.job_id} ({job_type}) failed for good: {error}")
+        else:
+            JOBS_PROCESSED.labels(job_type, "retry").inc()
+            logger.warning(
+                f"Job {job.job_id} ({job_type}) attempt {job.attempts} failed: {error}"
+            )
+    if failures:
+        # Core statement, so the list of parameters runs as one executemany
+        jobs = Job.__table__
+        await db.execute(
+            update(jobs)
+            .where(
+                jobs.c.job_id == bindparam("claimed_id"),
+                jobs.c.attempts == bindparam("claimed_attempts"),
+                jobs.c.status == "running",
+            )
+            .values(
+                status=bindparam("new_status"),
+                run_at=func.now() + bindparam("delay", type_=Interval),
+                locked_until=None,
+                last_error=bindparam("error"),
+            ),
+            failures,
+        )
+    await db.commit()
+
+
+async def process_batch(db: AsyncSession) -> int:
+    """
+    Claims one batch, runs it and records the outcome. Claiming and finishing
+    are two short transactions; the handler runs between them, outside any.
+    If the worker dies midway, the jobs run again once their lease expires.
+    Returns the number of jobs processed (0 when the queue is empty).
+    """
+    jobs = await _claim(db)
+    if not jobs:
+        return 0
+
+    job_type = jobs[0].job_type
+    # Claimed again after their last attempt's lease expired: don't run them
+    lost = LookupError("Lease expired on the last attempt, the worker was lost")
+    outcomes = [(job, lost) for job in jobs if job.attempts > job.max_attempts]
+    runnable = [job for job in jobs if job.attempts <= job.max_attempts]
+    if runnable:
+        started = time.perf_counter()
+        results = await _run_handler(job_type, runnable)
+        BATCH_DURATION.labels(job_type).observe(time.perf_counter() - started)
+        outcomes += zip(runnable, results)
+
+    await _finish(db, job_type, outcomes)
+    return len(jobs)
+
+
+async def queue_stats(db: AsyncSession) -> list[dict]:
+    """Depth and age of the oldest job per type and status."""
+    result = await db.execute(
+        select(
+            Job.job_type,
+            Job.status,
+            func.count(),
+            func.extract("epoch", func.now() - func.min(Job.created_at)),
+        ).group_by(Job.job_type, Job.status)
+    )
+    return [
+        {
+            "job_type": job_type,
+            "status": status,
+            "depth": depth,
+            "oldest_age_seconds": round(float(age or 0), 1),
+        }
+        for job_type, status, depth, age in result
+    ]
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+from email.message import EmailMessage
+
+import aiosmtplib
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPSender:
+    """
+    Keeps up to `pool_size` authenticated SMTP connections open and sends
+    batches of messages over them, so a burst of emails costs one STARTTLS
+    handshake and login per connection instead of one per message.
+    Connections idle for longer than `idle_timeout` are replaced, since mail
+    servers drop them on their side.
+    """
+
+    def __init__(self, pool_size: int, idle_timeout: float) -> None:
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self._idle: list[tuple[aiosmtplib.SMTP, float]] = []  # (client, last used)
+        self._slots = asyncio.Semaphore(pool_size)
+
+    async def send(self, message: EmailMessage) -> None:
+        (error,) = await self.send_many([message])
+        if error is not None:
+            raise error
+
+    async def send_many(
+        self, messages: list[EmailMessage]
+    ) -> list[BaseException | None]:
+        """
+        Sends `messages` spread over the pool, each connection sending its share
+        in sequence. Returns one entry per message: None or the send error.
+        """
+        shares = [messages[i :: self.pool_size] for i in range(self.pool_size)]
+        results = await asyncio.gather(
+            *(self._send_share(share) for share in shares if share)
+        )
+        # Undo the round-robin split
+        ordered: list[BaseException | None] = [None] * len(messages)
+        for i, share_results in enumerate(results):
+            ordered[i :: self.pool_size] = share_results
+        return ordered
+
+    async def close(self) -> None:
+        while self._idle:
+            client, _ = self._idle.pop()
+            try:
+                await client.quit()
+            except aiosmtplib.SMTPException:
+                client.close()
+
+    async def _send_share(
+        self, messages: list[EmailMessage]
+    ) -> list[BaseException | None]:
+        results: list[BaseException | None] = []
+        async with self._slots:
+            client = self._take_idle()
+            for message in messages:
+                try:
+                    if client is None:
+                        client = await self._connect()
+                    try:
+                        await client.send_message(message)
+                    except aiosmtplib.SMTPServerDisconnected:
+                        # A pooled connection the server dropped: reconnect once
+                        client.close()
+                        client = None
+                        client = await self._connect()
+                        await client.send_message(message)
+                    results.append(None)
+                except (
+                    aiosmtplib.SMTPConnectError,
+                    aiosmtplib.SMTPAuthenticationError,
+                ) as e:
+                    # The server is unreachable, don't try the rest one by one
+                    logger.error(f"Could not open an SMTP connection: {e}")
+                    client = None
+                    results.extend([e] * (len(messages) - len(results)))
+                    break
+                except (aiosmtplib.SMTPException, OSError) as e:
+                    # E.g. a refused recipient; the connection stays usable
+                    logger.warning(f"Could not send mail to {message['To']}: {e}")
+                    results.append(e)
+            if client is not None:
+                self._put_idle(client)
+        return results
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            username=settings.MAIL_USERNAME if settings.MAIL_USE_CREDENTIALS else None,
+            password=settings.MAIL_PASSWORD if settings.MAIL_USE_CREDENTIALS else None,
+            use_tls=settings.MAIL_SSL_TLS,
+            start_tls=settings.MAIL_STARTTLS,
+            validate_certs=settings.MAIL_VALIDATE_CERTS,
+            timeout=settings.MAIL_TIMEOUT_SECONDS,
+        )
+        # Connects, upgrades with STARTTLS and logs in
+        await client.connect()
+        return client
+
+    def _take_idle(self) -> aiosmtplib.SMTP | None:
+        while self._idle:
+            client, last_used = self._idle.pop()
+            if client.is_connected and time.monotonic() - last_used < self.idle_timeout:
+                return client
+            client.close()
+        return None
+
+    def _put_idle(self, client: aiosmtplib.SMTP) -> None:
+        if client.is_connected:
+            self._idle.append((client, time.monotonic()))
+        else:
+            client.close()
+
+
+mail_sender = SMTPSender(settings.MAIL_POOL_SIZE, settings.MAIL_IDLE_TIMEOUT_SECONDS)
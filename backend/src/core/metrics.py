@@ -0,0 +1,167 @@
+import logging
+import time
+from typing import Callable
+
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+from src.core.query_budget import (
+    QueryStats,
+    check_request,
+    end_request_stats,
+    record_statement,
+    start_request_stats,
+)
+
+logger = logging.getLogger(__name__)
+
+# Requests that don't match a route share one label to bound cardinality
+UNMATCHED_ROUTE = "unmatched"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route",
+    ["method", "route", "status"],
+)
+REQUEST_STATEMENTS = Histogram(
+    "db_statements_per_request",
+    "SQL statements executed per request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 200),
+)
+REQUEST_DB_TIME = Histogram(
+    "db_time_per_request_seconds",
+    "Total time spent in SQL statements per request",
+    ["route"],
+)
+REQUEST_SLOWEST_STATEMENT = Histogram(
+    "db_slowest_statement_seconds",
+    "Duration of the slowest SQL statement of each request",
+    ["route"],
+)
+STATEMENTS_TOTAL = Counter(
+    "db_statements_total", "SQL statements executed, inside requests or not"
+)
+QUERY_BUDGET_EXCEEDED = Counter(
+    "db_query_budget_exceeded_total",
+    "Requests that ran more statements than their endpoint's query budget",
+    ["route"],
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_started"].pop()
+    STATEMENTS_TOTAL.inc()
+    record_statement(statement, seconds)
+    if seconds * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning(f"Slow query ({seconds * 1000:.1f} ms): {statement[:500]}")
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    started = exception_context.connection and exception_context.connection.info.get(
+        "query_started"
+    )
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Times every statement run through `engine` (the hooks live on its sync core)."""
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class PoolCollector:
+    """Exposes the connection pool status as gauges at scrape time."""
+
+    def __init__(self, get_status: Callable[[], dict]) -> None:
+        self._get_status = get_status
+
+    def collect(self):
+        metrics = {
+            "checked_out": "Connections currently checked out",
+            "overflow": "Connections opened above pool_size",
+            "timeouts": "Checkouts that timed out waiting for a connection",
+            "avg_wait_ms": "Average wait for a connection checkout",
+            "max_wait_ms": "Longest wait for a connection checkout",
+        }
+        families = {
+            name: GaugeMetricFamily(f"db_pool_{name}", doc, labels=["pool"])
+            for name, doc in metrics.items()
+        }
+        for pool, status in self._get_status().items():
+            for name, family in families.items():
+                family.add_metric([pool], status[name])
+        yield from families.values()
+
+
+def register_pool_collector(get_status: Callable[[], dict]) -> None:
+    REGISTRY.register(PoolCollector(get_status))
+
+
+def _server_timing(stats: QueryStats, elapsed: float) -> str:
+    return (
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} statements", '
+        f"db-slowest;dur={stats.slowest_seconds * 1000:.1f}, "
+        f"app;dur={elapsed * 1000:.1f}"
+    )
+
+
+class MetricsMiddleware:
+    """
+    Records latency and SQL activity per route template (e.g. /api/v1/lists/{list_id}).
+    With DEBUG_TIMING_HEADER enabled, every response carries a Server-Timing
+    header with the breakdown of that request.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = start_request_stats()
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.DEBUG_TIMING_HEADER:
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        _server_timing(stats, time.perf_counter() - started),
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_request_stats(token)
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            label = getattr(route, "path", UNMATCHED_ROUTE)
+            if check_request(label, getattr(route, "endpoint", None), stats):
+                QUERY_BUDGET_EXCEEDED.labels(label).inc()
+            REQUEST_LATENCY.labels(scope["method"], label, str(status_code)).observe(
+                time.perf_counter() - started
+            )
+            REQUEST_STATEMENTS.labels(label).observe(stats.statements)
+            REQUEST_DB_TIME.labels(label).observe(stats.db_seconds)
+            REQUEST_SLOWEST_STATEMENT.labels(label).observe(stats.slowest_seconds)
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Callable, Sequence
+
+import asyncpg
+from prometheus_client import Counter
+from sqlalchemy import Select, Text, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+NotificationCallback = Callable[[str], None]
+
+# Backoff between attempts to reopen the LISTEN connection, in seconds
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 30.0
+HEALTH_CHECK_INTERVAL = 30.0
+HEALTH_CHECK_TIMEOUT = 5.0
+
+LISTENER_RECONNECTS = Counter(
+    "notification_listener_reconnects_total",
+    "Times the LISTEN connection was reopened after being lost",
+)
+
+
+class PgNotificationListener:
+    """
+    Holds one dedicated asyncpg connection per worker that LISTENs on the
+    registered channels and dispatches payloads to in-process callbacks.
+    A lost connection is reopened with backoff; notifications sent meanwhile
+    are gone, so the reconnect callbacks run once it is back (flush caches).
+    """
+
+    def __init__(self) -> None:
+        self._callbacks: dict[str, list[NotificationCallback]] = defaultdict(list)
+        self._reconnect_callbacks: list[Callable[[], None]] = []
+        self._conn: asyncpg.Connection | None = None
+        self._task: asyncio.Task | None = None
+        self._lost = asyncio.Event()
+
+    def add_listener(self, channel: str, callback: NotificationCallback) -> None:
+        self._callbacks[channel].append(callback)
+
+    def on_reconnect(self, callback: Callable[[], None]) -> None:
+        self._reconnect_callbacks.append(callback)
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None and not self._conn.is_closed()
+
+    async def start(self) -> None:
+        if await self._connect():
+            logger.info(f"Listening for notifications on {list(self._callbacks)}")
+        self._task = asyncio.create_task(self._supervise())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def _connect(self) -> bool:
+        try:
+            conn = await asyncpg.connect(settings.POSTGRES_DSN)
+            for channel in self._callbacks:
+                await conn.add_listener(channel, self._dispatch)
+        except Exception as e:
+            # Caches still expire on their own TTL, so keep the worker running
+            logger.error(f"Could not start notification listener: {e}")
+            return False
+        self._lost.clear()
+        conn.add_termination_listener(self._on_terminated)
+        self._conn = conn
+        return True
+
+    def _on_terminated(self, conn: asyncpg.Connection) -> None:
+        if conn is self._conn:
+            self._lost.set()
+
+    async def _supervise(self) -> None:
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            if not self.connected:
+                if not await self._connect():
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                    continue
+                delay = RECONNECT_MIN_DELAY
+                LISTENER_RECONNECTS.inc()
+                logger.info("Notification listener reconnected")
+                for callback in self._reconnect_callbacks:
+                    try:
+                        callback()
+                    except Exception:
+                        logger.exception("Notification reconnect callback failed")
+
+            # Sleep until the connection drops, pinging it now and then to
+            # detect sockets that died without being closed
+            try:
+                await asyncio.wait_for(self._lost.wait(), HEALTH_CHECK_INTERVAL)
+            except asyncio.TimeoutError:
+                try:
+                    await self._conn.execute("SELECT 1", timeout=HEALTH_CHECK_TIMEOUT)
+                    continue
+                except Exception as e:
+                    logger.warning(f"Notification listener health check failed: {e}")
+            logger.warning("Notification listener connection lost, reconnecting")
+            self._conn.terminate()
+            self._conn = None
+
+    def _dispatch(self, connection, pid: int, channel: str, payload: str) -> None:
+        for callback in self._callbacks.get(channel, []):
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception(f"Notification callback failed on '{channel}'")
+
+
+async def notify(db: AsyncSession, channel: str, payload: str = "") -> None:
+    """
+    Queues a NOTIFY inside the caller's transaction.
+    Postgres only delivers it to listeners once the transaction commits.
+    """
+    await db.execute(select(func.pg_notify(channel, payload)))
+
+
+def notify_statement(notifications: Sequence[tuple[str, str]]) -> Select:
+    """
+    SELECT queueing every (channel, payload) NOTIFY, so callers can send them
+    along with other work (e.g. as the main statement of a data-modifying CTE).
+    """
+    channels, payloads = zip(*notifications) if notifications else ((), ())
+    rows = func.unnest(
+        bindparam("channels", list(channels), type_=ARRAY(Text)),
+        bindparam("payloads", list(payloads), type_=ARRAY(Text)),
+    )
+    rows = rows.table_valued("channel", "payload").render_derived()
+    return select(
+        func.count(func.pg_notify(rows.c.channel, rows.c.payload))
+    ).select_from(rows)
+
+
+async def notify_many(db: AsyncSession, channel: str, payloads: list[str]) -> None:
+    """Like notify, but queues all payloads with a single statement."""
+    if not payloads:
+        return
+    await db.execute(notify_statement([(channel, payload) for payload in payloads]))
+
+
+listener = PgNotificationListener()
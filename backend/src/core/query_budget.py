@@ -0,0 +1,200 @@
+"""
+Per-request SQL statement accounting, query budgets and N+1 detection.
+
+Endpoints declare how many statements a request may run with `@query_budget(n)`.
+Requests over budget, or repeating the same statement shape (an N+1 loop), are
+logged; tests turn them into failures:
+
+    with enforce_query_budgets():
+        client.post(f"/api/v1/lists/{list_id}/complete?store_id={store_id}")
+
+    with assert_max_queries(3):
+        await some_service(db)
+"""
+
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, TypeVar
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Bind parameters ($1::UUID, %(name)s, ?), string and number literals
+_LITERAL_RE = re.compile(
+    r"\$\d+(?:::[\w\[\]]+)?|%\(\w+\)s|\?|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b"
+)
+# "IN (?, ?, ?)" and multi-row VALUES differ only by their length
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROWS_RE = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with literals and parameter lists collapsed, for grouping."""
+    shape = _LITERAL_RE.sub("?", statement)
+    shape = _LIST_RE.sub("(?)", shape)
+    shape = _ROWS_RE.sub("(?)", shape)
+    return _WHITESPACE_RE.sub(" ", shape).strip()
+
+
+@dataclass
+class QueryStats:
+    """SQL activity of a single request (or of a capture block)."""
+
+    statements: int = 0
+    db_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: str | None = None
+    # Only tracked in dev/test mode, normalizing every statement isn't free
+    shapes: Counter | None = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.db_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+        if self.shapes is not None:
+            self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self, threshold: int) -> dict[str, int]:
+        if self.shapes is None:
+            return {}
+        return {shape: n for shape, n in self.shapes.items() if n >= threshold}
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+# Capture blocks see every statement, whichever task or thread runs it
+_captures: list[QueryStats] = []
+_violations: list[str] | None = None
+
+
+def current_query_stats() -> QueryStats | None:
+    """Stats of the request being handled, None outside of a request."""
+    return _query_stats.get()
+
+
+def start_request_stats() -> tuple[QueryStats, Any]:
+    tracking = settings.QUERY_DIAGNOSTICS or _violations is not None
+    stats = QueryStats(shapes=Counter() if tracking else None)
+    return stats, _query_stats.set(stats)
+
+
+def end_request_stats(token: Any) -> None:
+    _query_stats.reset(token)
+
+
+@contextmanager
+def untracked_statements() -> Iterator[None]:
+    """
+    Statements run inside don't count toward the request's stats and budget,
+    for middleware bookkeeping around the endpoint (e.g. idempotency keys).
+    """
+    token = _query_stats.set(None)
+    try:
+        yield
+    finally:
+        _query_stats.reset(token)
+
+
+def record_statement(statement: str, seconds: float) -> None:
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    for capture in _captures:
+        capture.record(statement, seconds)
+
+
+def query_budget(max_statements: int) -> Callable[[F], F]:
+    """Declares the most SQL statements one request to the endpoint may run."""
+
+    def decorator(endpoint: F) -> F:
+        endpoint.query_budget = max_statements
+        return endpoint
+
+    return decorator
+
+
+def get_query_budget(endpoint: Callable | None) -> int | None:
+    return getattr(endpoint, "query_budget", None)
+
+
+def check_request(route: str, endpoint: Callable | None, stats: QueryStats) -> bool:
+    """
+    Logs budget overruns and repeated statements of a finished request.
+    Returns whether the endpoint's budget was exceeded.
+    """
+    problems = []
+    budget = get_query_budget(endpoint)
+    over_budget = budget is not None and stats.statements > budget
+    if over_budget:
+        problems.append(f"ran {stats.statements} statements, budget is {budget}")
+    for shape, count in stats.repeated_shapes(settings.N_PLUS_ONE_THRESHOLD).items():
+        problems.append(f"possible N+1, same statement ran {count} times: {shape}")
+
+    for problem in problems:
+        logger.warning(f"{route} {problem}")
+    if _violations is not None:
+        _violations.extend(f"{route} {problem}" for problem in problems)
+    return over_budget
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by the test helpers when a block or request runs too many statements."""
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """Counts every statement executed inside the block."""
+    stats = QueryStats(shapes=Counter())
+    _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        _captures.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    with capture_queries() as stats:
+        yield stats
+    if stats.statements > limit:
+        shapes = "\n".join(f"  {n}x {shape}" for shape, n in stats.shapes.items())
+        raise QueryBudgetExceeded(
+            f"{stats.statements} statements executed, limit is {limit}:\n{shapes}"
+        )
+
+
+@contextmanager
+def assert_no_n_plus_one(threshold: int | None = None) -> Iterator[QueryStats]:
+    threshold = threshold or settings.N_PLUS_ONE_THRESHOLD
+    with capture_queries() as stats:
+        yield stats
+    repeated = stats.repeated_shapes(threshold)
+    if repeated:
+        shapes = "\n".join(f"  {n}x {shape}" for shape, n in repeated.items())
+        raise QueryBudgetExceeded(f"Statements repeated {threshold}+ times:\n{shapes}")
+
+
+@contextmanager
+def enforce_query_budgets() -> Iterator[list[str]]:
+    """
+    Fails if any request served inside the block (e.g. through TestClient)
+    exceeded its endpoint's `@query_budget` or repeated a statement shape.
+    """
+    global _violations
+    previous, _violations = _violations, []
+    try:
+        yield _violations
+        violations = _violations
+    finally:
+        _violations = previous
+    if violations:
+        raise QueryBudgetExceeded("\n".join(violations))
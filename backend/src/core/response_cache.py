@@ -0,0 +1,234 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from prometheus_client import Counter
+
+from src.core.config import settings
+from src.core.database import reads_from_primary
+from src.core.invalidation import Invalidation
+from src.core.responses import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS = Counter(
+    "response_cache_requests_total",
+    "Cached endpoint lookups by outcome",
+    ["route", "outcome"],  # hit, miss, not_modified
+)
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    media_type: str | None
+    etag: str
+    tags: frozenset[str]
+    expires_at: float
+
+
+def make_etag(body: bytes) -> str:
+    """Strong validator: the same bytes always get the same tag."""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def cache_key(request: Request) -> str:
+    """Path plus query parameters sorted and without blanks, so ?a=1&b=2 == ?b=2&a=1."""
+    params = sorted(
+        (name, value.strip())
+        for name, value in request.query_params.multi_items()
+        if value.strip()
+    )
+    return f"{request.url.path}?{urlencode(params)}"
+
+
+class ResponseCache:
+    """
+    In-process LRU of rendered GET responses with a TTL per entry.
+    Concurrent misses on the same key share one computation, and entries carry
+    tags (e.g. "prices:<barcode>") that write paths invalidate after committing.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        # Bumped on every invalidation; results computed across one aren't stored
+        self._generation = 0
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Any]
+    ) -> tuple[CachedResponse | Response, bool]:
+        """
+        Returns (entry, hit). Responses that can't be cached (errors, 304s)
+        come back as the raw Response and aren't shared with other callers.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry, True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            # Someone is already loading this key: wait for their result
+            try:
+                return await asyncio.shield(inflight), True
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise  # This request was cancelled, not the loader
+                # The loading request went away (e.g. client disconnected)
+                return await self.get_or_compute(key, compute)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            result = await compute()
+            if isinstance(result, CachedResponse) and generation == self._generation:
+                self.put(key, result)
+            future.set_result(result)
+            return result, False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters retrieve it; don't warn about a never-retrieved exception
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def invalidate(self, *tags: str) -> None:
+        """
+        Drops every entry depending on any of `tags`. Tags nest by their prefix:
+        "prices" drops "prices:<barcode>" entries too, and "prices:<barcode>"
+        drops entries tagged plain "prices".
+        """
+        self._generation += 1
+        wanted = set(tags)
+        wanted.update(tag.split(":", 1)[0] for tag in tags)
+        kinds = {tag for tag in tags if ":" not in tag}
+        stale = [
+            key
+            for key, entry in self._entries.items()
+            if entry.tags & wanted
+            or any(tag.split(":", 1)[0] in kinds for tag in entry.tags)
+        ]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            logger.debug(f"Response cache dropped {len(stale)} entries for {tags}")
+
+    def handle_invalidation(self, invalidation: Invalidation) -> None:
+        self.invalidate(invalidation.tag)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+def _render(result: Any) -> Response:
+    if isinstance(result, Response):
+        return result
+    return FastJSONResponse(jsonable_encoder(result))
+
+
+def cached(ttl: float, tags: Iterable[str] = (), max_age: int | None = None):
+    """
+    Caches a public GET endpoint's response for `ttl` seconds.
+    `tags` may reference path parameters, e.g. "prices:{barcode}". Responses get a
+    strong ETag and `Cache-Control: public, max-age=<max_age or ttl>`, and
+    If-None-Match revalidations are answered with 304.
+    Misses run the endpoint with its read sessions on the primary.
+    The endpoint must return JSON data or a non-streaming Response.
+    """
+    tag_templates = tuple(tags)
+
+    def decorator(endpoint: Callable) -> Callable:
+        signature = inspect.signature(endpoint)
+        parameters = list(signature.parameters.values())
+        # Ask FastAPI for the Request without changing the endpoint's own signature
+        parameters.append(
+            inspect.Parameter(
+                "_cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+            )
+        )
+        cache_control = (
+            f"public, max-age={max_age if max_age is not None else int(ttl)}"
+        )
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, _cache_request: Request, **kwargs):
+            request = _cache_request
+            route = request.scope["route"].path
+
+            async def compute() -> CachedResponse | Response:
+                with reads_from_primary():
+                    response = _render(await endpoint(*args, **kwargs))
+                if response.status_code != 200 or not hasattr(response, "body"):
+                    return response
+                return CachedResponse(
+                    body=bytes(response.body),
+                    media_type=response.media_type,
+                    etag=make_etag(response.body),
+                    tags=frozenset(tag.format(**kwargs) for tag in tag_templates),
+                    expires_at=time.monotonic() + ttl,
+                )
+
+            entry, hit = await response_cache.get_or_compute(
+                cache_key(request), compute
+            )
+            if isinstance(entry, Response):
+                return entry
+
+            # Vary: the same URL may also be served as MessagePack
+            headers = {
+                "ETag": entry.etag,
+                "Cache-Control": cache_control,
+                "Vary": "Accept",
+            }
+            if etag_matches(request.headers.get("if-none-match"), entry.etag):
+                CACHE_REQUESTS.labels(route, "not_modified").inc()
+                return Response(status_code=304, headers=headers)
+            CACHE_REQUESTS.labels(route, "hit" if hit else "miss").inc()
+            return Response(entry.body, media_type=entry.media_type, headers=headers)
+
+        wrapper.__signature__ = signature.replace(parameters=parameters)
+        return wrapper
+
+    return decorator
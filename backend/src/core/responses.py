@@ -0,0 +1,159 @@
+import typing
+import uuid
+from decimal import Decimal
+from functools import cache
+from typing import Any, Callable
+
+import msgpack
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# The MessagePack variant of a response needs its own strong ETag
+MSGPACK_ETAG_SUFFIX = "-msgpack"
+
+
+def _orjson_default(obj: Any) -> Any:
+    # ORM numeric columns come back as Decimal
+    if isinstance(obj, Decimal):
+        return float(obj)
+    # asyncpg's UUID subclass, which orjson only serializes as exact uuid.UUID
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class: orjson instead of the stdlib encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS
+        )
+
+
+class MsgPackNegotiationMiddleware:
+    """
+    Re-encodes JSON responses as MessagePack when the client sends
+    `Accept: application/msgpack`. Other responses (SSE, files) pass through.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or MSGPACK_MEDIA_TYPE not in Headers(
+            scope=scope
+        ).get("accept", ""):
+            await self.app(scope, receive, send)
+            return
+
+        # Revalidations carry our suffixed tags, the app only knows the JSON ones
+        request_headers = MutableHeaders(scope=scope)
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match:
+            request_headers["if-none-match"] = if_none_match.replace(
+                f'{MSGPACK_ETAG_SUFFIX}"', '"'
+            )
+
+        start: Message | None = None
+        body = bytearray()
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if headers.get("content-type", "").startswith("application/json"):
+                    start = message
+                else:
+                    etag = headers.get("etag")
+                    if message["status"] == 304 and etag:
+                        headers["etag"] = _msgpack_etag(etag)
+                    passthrough = True
+                    await send(message)
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body.extend(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            packed = msgpack.packb(orjson.loads(body)) if body else b""
+            headers = MutableHeaders(raw=list(start["headers"]))
+            headers["content-type"] = MSGPACK_MEDIA_TYPE
+            headers["content-length"] = str(len(packed))
+            if "accept" not in headers.get("vary", "").lower():
+                headers.append("vary", "Accept")
+            if "etag" in headers:
+                headers["etag"] = _msgpack_etag(headers["etag"])
+            await send({**start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": packed})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _msgpack_etag(etag: str) -> str:
+    return etag[:-1] + f'{MSGPACK_ETAG_SUFFIX}"' if etag.endswith('"') else etag
+
+
+def _field_converter(annotation: Any) -> Callable[[Any], Any] | None:
+    """How to turn an ORM attribute into the value the schema would dump."""
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if typing.get_origin(annotation) in (list, typing.List) and args:
+        item = _field_converter(args[0])
+        if item is None:
+            return list
+        return lambda values: [item(value) for value in values]
+    if args and typing.get_origin(annotation) is typing.Union:
+        inner = _field_converter(args[0])
+        if inner is None:
+            return None
+        return lambda value: None if value is None else inner(value)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return lambda value: orm_to_dict(annotation, value)
+    if annotation is Decimal:
+        return str  # Pydantic dumps Decimal fields as strings
+    if annotation is float:
+        return lambda value: None if value is None else float(value)
+    return None
+
+
+@cache
+def _dump_plan(schema: type[BaseModel]) -> list[tuple[str, Callable | None]]:
+    return [
+        (name, _field_converter(field.annotation))
+        for name, field in schema.model_fields.items()
+    ]
+
+
+def orm_to_dict(schema: type[BaseModel], obj: Any) -> dict:
+    """
+    Builds the JSON-ready dict `schema` would produce from an ORM object,
+    without running validation. Only for data that is already typed by the ORM.
+    """
+    data = {}
+    for name, convert in _dump_plan(schema):
+        value = getattr(obj, name, None)
+        data[name] = convert(value) if convert is not None else value
+    return data
+
+
+def fast_response(
+    schema: type[BaseModel], content: Any, status_code: int = 200
+) -> FastJSONResponse:
+    """
+    Serializes ORM objects straight to JSON, skipping response_model validation.
+    Keep `response_model` on the route so the OpenAPI schema stays documented.
+    """
+    if isinstance(content, (list, tuple)):
+        data = [orm_to_dict(schema, item) for item in content]
+    else:
+        data = orm_to_dict(schema, content)
+    return FastJSONResponse(data, status_code=status_code)
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+import asyncpg
+from prometheus_client import Counter, Gauge, Histogram
+
+from src.core.config import settings
+
+if TYPE_CHECKING:
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+logger = logging.getLogger(__name__)
+
+# Session-level advisory lock held by the leader for as long as it lives
+LEADER_LOCK_NAME = "scheduler_leader"
+
+IS_LEADER = Gauge("scheduler_is_leader", "1 on the worker running scheduled jobs")
+JOB_DURATION = Histogram(
+    "scheduled_job_duration_seconds",
+    "Run time of scheduled jobs",
+    ["job"],
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800),
+)
+JOB_RUNS = Counter(
+    "scheduled_job_runs_total", "Scheduled job runs by outcome", ["job", "outcome"]
+)
+JOB_LAST_SUCCESS = Gauge(
+    "scheduled_job_last_success_timestamp_seconds",
+    "Unix time of the last successful run of each job",
+    ["job"],
+)
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    func: Callable[[], Awaitable[Any]]
+    cron: dict[str, Any] = field(default_factory=dict)  # APScheduler cron fields
+
+
+class LeaderScheduler:
+    """
+    Runs the registered jobs on exactly one worker.
+    Every worker campaigns for a Postgres advisory lock on a dedicated connection;
+    the one holding it runs an AsyncIOScheduler. If the leader dies its connection
+    closes, the lock is released and another worker takes over within one poll.
+    """
+
+    def __init__(self, poll_interval: float) -> None:
+        self.poll_interval = poll_interval
+        self._jobs: dict[str, ScheduledJob] = {}
+        self._conn: asyncpg.Connection | None = None
+        self._scheduler: "AsyncIOScheduler | None" = None
+        self._task: asyncio.Task | None = None
+        # Health checks from jobs and the campaign loop share the connection
+        self._conn_lock = asyncio.Lock()
+
+    def add_job(
+        self, func: Callable[[], Awaitable[Any]], name: str, **cron: Any
+    ) -> None:
+        """Registers `func` to run on the cron schedule, e.g. hour=23, minute=0."""
+        self._jobs[name] = ScheduledJob(name, func, cron)
+
+    @property
+    def is_leader(self) -> bool:
+        return self._scheduler is not None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._campaign())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._step_down()
+
+    async def _campaign(self) -> None:
+        while True:
+            if self.is_leader:
+                if not await self._still_leader():
+                    logger.warning("Lost the scheduler lock connection, stepping down")
+                    self._step_down()
+            elif await self._try_acquire():
+                self._lead()
+            await asyncio.sleep(self.poll_interval)
+
+    async def _try_acquire(self) -> bool:
+        try:
+            if self._conn is None or self._conn.is_closed():
+                self._conn = await asyncpg.connect(settings.POSTGRES_DSN)
+            return await self._conn.fetchval(
+                "SELECT pg_try_advisory_lock(hashtext($1))", LEADER_LOCK_NAME
+            )
+        except Exception as e:
+            logger.error(f"Could not campaign for the scheduler lock: {e}")
+            return False
+
+    async def _still_leader(self) -> bool:
+        try:
+            async with self._conn_lock:
+                await self._conn.execute("SELECT 1", timeout=self.poll_interval)
+            return True
+        except Exception:
+            return False
+
+    def _lead(self) -> None:
+        # Only the leader needs APScheduler, import it here
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+        self._scheduler = AsyncIOScheduler(
+            timezone="UTC",
+            # A run delayed by a busy event loop still happens, but only once
+            job_defaults={"coalesce": True, "misfire_grace_time": 300},
+        )
+        for job in self._jobs.values():
+            self._scheduler.add_job(
+                self._run, "cron", args=[job], name=job.name, **job.cron
+            )
+        self._scheduler.start()
+        IS_LEADER.set(1)
+        logger.info(f"This worker is the scheduler leader, running {list(self._jobs)}")
+
+    def _step_down(self) -> None:
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+            IS_LEADER.set(0)
+        if self._conn is not None:
+            # Closing the session releases the lock
+            self._conn.terminate()
+            self._conn = None
+
+    async def _run(self, job: ScheduledJob) -> None:
+        # A leader cut off from Postgres may already have been replaced
+        if not await self._still_leader():
+            logger.warning(f"Skipping job '{job.name}', leadership is uncertain")
+            JOB_RUNS.labels(job.name, "skipped").inc()
+            return
+
+        logger.info(f"Scheduler starting job: {job.name}")
+        started = time.perf_counter()
+        try:
+            await job.func()
+        except Exception:
+            logger.exception(f"Scheduled job '{job.name}' failed")
+            JOB_RUNS.labels(job.name, "failure").inc()
+        else:
+            JOB_RUNS.labels(job.name, "success").inc()
+            JOB_LAST_SUCCESS.labels(job.name).set_to_current_time()
+            logger.info(f"Scheduler finished job: {job.name}")
+        finally:
+            JOB_DURATION.labels(job.name).observe(time.perf_counter() - started)
+
+
+scheduler = LeaderScheduler(settings.SCHEDULER_POLL_SECONDS)
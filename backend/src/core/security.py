@@ -1,12 +1,21 @@
 from datetime import datetime, timedelta, timezone
+from functools import cache
 from typing import Union
 
 from jose import jwt
-from passlib.context import CryptContext
 
 from src.core.config import settings
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+
+@cache
+def password_context():
+    """
+    passlib and argon2 are slow to import: built by the lifespan's warm-up in
+    the background, or by the first login/registration if that comes first.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["argon2"], deprecated="auto")
 
 
 def create_access_token(
@@ -28,8 +37,8 @@ def create_access_token(
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_context().hash(password)
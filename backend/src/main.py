@@ -1,58 +1,128 @@
+import asyncio
 from contextlib import asynccontextmanager
 import logging
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from fastapi import FastAPI, Response, status
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 
 from src.api.v1.api import api_router
 from src.core.config import settings
-from src.core.database import AsyncSessionLocal
+from src.core.database import AsyncSessionLocal, engine, get_pool_status, read_engine
 from src.core.deps import SessionDep
-from src.services.exchange_rate_updater import update_exchange_rate
+from src.core.metrics import MetricsMiddleware
+from src.core.existence_cache import known_products, known_stores
+from src.core.idempotency import (
+    IdempotencyMiddleware,
+    purge_expired_idempotency_keys,
+)
+from src.core.invalidation import INVALIDATION_CHANNEL, InvalidationKind, bus
+from src.core.job_queue import queue_stats
+from src.core.notifications import listener
+from src.core.response_cache import response_cache
+from src.core.responses import FastJSONResponse, MsgPackNegotiationMiddleware
+from src.core.scheduler import scheduler
+from src.core.security import password_context
+from src.services.external_product import off_api
+from src.services.exchange_rate_updater import close_http_clients, update_exchange_rate
+from src.services.image_pipeline import (
+    load_pillow,
+    shutdown_image_pool,
+    start_image_pool,
+)
+from src.services.live_updates import PRICES_CHANNEL, broker
+from src.services.rate_cache import RATES_CHANNEL, rate_cache
+from src.services.storage import StorageClient
 
+logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 async def run_rate_update():
     """Helper function to create a DB session for the scheduled job."""
-    logger.info("Scheduler starting job: update_exchange_rate")
     async with AsyncSessionLocal() as db:
         await update_exchange_rate(db)
-    logger.info("Scheduler finished job: update_exchange_rate")
+
+
+def _load_lazy_subsystems() -> None:
+    # Image workers fork on the first upload and inherit Pillow from here
+    password_context()
+    off_api()
+    load_pillow()
+
+
+async def warm_up() -> None:
+    """
+    Loads the subsystems kept off the import path (passlib/argon2,
+    OpenFoodFacts, Pillow) in a thread once the app is serving, so the first
+    login, lookup or upload doesn't import them on the event loop.
+    """
+    try:
+        await asyncio.to_thread(_load_lazy_subsystems)
+    except Exception:
+        # Each one is loaded again on first use
+        logger.exception("Warming up lazy subsystems failed")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Handles startup and shutdown events for the application.
-    Starts a scheduler for background tasks.
+    Starts a scheduler for background tasks and the cross-worker
+    notification listener (cache invalidation and live updates).
     """
-    scheduler = AsyncIOScheduler(timezone="UTC")
+    app.state.storage = StorageClient(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    start_image_pool(settings.IMAGE_WORKERS)
+
+    # Every cached response depends on some kind of data
+    for kind in InvalidationKind:
+        bus.subscribe(kind, response_cache.handle_invalidation)
+    bus.subscribe(InvalidationKind.RATES, rate_cache.handle_invalidation)
+    bus.subscribe(InvalidationKind.PRODUCTS, known_products.handle_invalidation)
+    bus.subscribe(InvalidationKind.STORES, known_stores.handle_invalidation)
+    listener.add_listener(INVALIDATION_CHANNEL, bus.handle_notification)
+    listener.on_reconnect(bus.flush)
+
+    listener.add_listener(RATES_CHANNEL, broker.handle_rate_notification)
+    listener.add_listener(PRICES_CHANNEL, broker.handle_price_notification)
+    await listener.start()
+
+    # Every worker registers the jobs; only the elected leader runs them
     scheduler.add_job(
         run_rate_update,
-        "cron",
+        "update_exchange_rate",
         hour=23,
         minute=0,
         day_of_week="mon-fri",
-        name="update_exchange_rate",
     )
-    scheduler.start()
-    logger.info(
-        "Scheduler started. Job 'update_exchange_rate' scheduled for 23:00 UTC, Mon-Fri."
+    scheduler.add_job(
+        purge_expired_idempotency_keys, "purge_idempotency_keys", minute=15
     )
+    if settings.SCHEDULER_ENABLED:
+        await scheduler.start()
+
+    warming = asyncio.create_task(warm_up())
 
     yield
 
-    scheduler.shutdown()
-    logger.info("Scheduler shut down.")
+    await warming
+
+    await scheduler.stop()
+    await listener.stop()
+    await close_http_clients()
+    await app.state.storage.aclose()
+    shutdown_image_pool()
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
 
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 app.add_middleware(
@@ -62,6 +132,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Inside the MessagePack layer, so stored responses are JSON for any client
+app.add_middleware(IdempotencyMiddleware)
+# Clients sending "Accept: application/msgpack" get MessagePack bodies
+app.add_middleware(MsgPackNegotiationMiddleware)
+# Outermost, so latency includes the other middlewares
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -84,3 +160,27 @@ async def health_check(db: SessionDep, response: Response):
         # If DB fails, return 503 Service Unavailable
         response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
         return {"status": "error", "database": "unreachable", "detail": str(e)}
+
+
+@app.get("/health/pool", status_code=200)
+async def pool_status():
+    """
+    Connection pool utilisation and checkout wait times of this worker.
+    """
+    return get_pool_status()
+
+
+@app.get("/health/queue", status_code=200)
+async def job_queue_status(db: SessionDep):
+    """
+    Background job queue depth and the age of its oldest job, per job type.
+    """
+    return await queue_stats(db)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics of this worker: latency, SQL statements and DB time per route.
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,39 @@
+import datetime
+import uuid
+
+from sqlalchemy import BigInteger, Boolean, DateTime, Index, String, func, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base
+
+
+class ChangeLogEntry(Base):
+    """
+    Latest change to each synced entity (see src.core.change_log).
+    One row per entity, overwritten by every change, so the table stays as
+    small as the data it tracks. Deleted entities stay as tombstones.
+    """
+
+    __tablename__ = "change_log"
+    __table_args__ = (
+        # A user's own changes since a cursor
+        Index("ix_change_log_user_tx", "user_id", "tx"),
+        # Changes shared by every user (prices, rates) since a cursor
+        Index(
+            "ix_change_log_shared_tx", "tx", postgresql_where=text("user_id IS NULL")
+        ),
+    )
+
+    kind: Mapped[str] = mapped_column(String(10), primary_key=True)
+    entity_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # Owner of per-user entities (lists), NULL for shared ones
+    user_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True))
+    deleted: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Id of the transaction that made the change, compared against sync cursors
+    tx: Mapped[int] = mapped_column(
+        BigInteger, server_default=text("(pg_current_xact_id()::text::bigint)")
+    )
+    changed_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, server_default=func.now()
+    )
@@ -0,0 +1,24 @@
+import datetime
+
+from sqlalchemy import DateTime, LargeBinary, SmallInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Response of a request sent with an Idempotency-Key header, replayed when the
+    client retries it. Rows without a status_code are requests still running.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    # sha256 of the caller's Authorization header, the path and the key
+    key_hash: Mapped[bytes] = mapped_column(LargeBinary(32), primary_key=True)
+    # sha256 of the query string and body, to reject a key reused for another request
+    request_hash: Mapped[bytes] = mapped_column(LargeBinary(32))
+    status_code: Mapped[int | None] = mapped_column(SmallInteger)
+    media_type: Mapped[str | None] = mapped_column(String(100))
+    body: Mapped[bytes | None] = mapped_column(LargeBinary)
+    expires_at: Mapped[datetime.datetime] = mapped_column(DateTime, index=True)
@@ -0,0 +1,49 @@
+import datetime
+
+from sqlalchemy import BigInteger, DateTime, Identity, Index, Integer, String, Text
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base
+
+
+class Job(Base):
+    """
+    Background job waiting for a worker (see src.core.job_queue).
+    A worker leases a job ("running") until locked_until. Finished jobs are
+    deleted; the ones out of attempts stay as "failed".
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers only ever scan the ready part of the queue
+        Index(
+            "ix_jobs_ready",
+            "run_at",
+            "job_type",
+            postgresql_where=text("status = 'queued'"),
+        ),
+        # Leases of workers that died, to be claimed again
+        Index(
+            "ix_jobs_leased",
+            "locked_until",
+            postgresql_where=text("status = 'running'"),
+        ),
+    )
+
+    job_id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    job_type: Mapped[str] = mapped_column(String(50))
+    payload: Mapped[dict] = mapped_column(JSONB, default=dict)
+    # "queued", "running" or "failed"
+    status: Mapped[str] = mapped_column(String(20), default="queued")
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer)
+    run_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, server_default=func.now()
+    )
+    locked_until: Mapped[datetime.datetime | None] = mapped_column(DateTime)
+    last_error: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, server_default=func.now()
+    )
@@ -1,7 +1,7 @@
 import datetime
 import uuid
 
-from sqlalchemy import DECIMAL, DateTime, ForeignKey, String, func
+from sqlalchemy import DECIMAL, DateTime, ForeignKey, Index, String, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -10,9 +10,24 @@ from src.models.base import Base
 
 class PriceLog(Base):
     __tablename__ = "price_logs"
+    __table_args__ = (
+        # Latest price of a product per store (comparison queries)
+        Index(
+            "ix_price_logs_barcode_store_recorded",
+            "product_barcode",
+            "store_id",
+            "recorded_at",
+        ),
+    )
 
+    # Generated client-side and marked as sentinel, so the ORM can insert many
+    # logs in one statement (it matches the RETURNING rows by this key)
     log_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid()
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+        server_default=func.gen_random_uuid(),
+        insert_sentinel=True,
     )
 
     product_barcode: Mapped[str] = mapped_column(ForeignKey("products.barcode"))
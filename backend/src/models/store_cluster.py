@@ -0,0 +1,23 @@
+from sqlalchemy import Float, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base
+
+
+class StoreCluster(Base):
+    """Precomputed map cluster: one row per grid cell per zoom level."""
+
+    __tablename__ = "store_clusters"
+
+    zoom: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cell_x: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cell_y: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    store_count: Mapped[int] = mapped_column(Integer, default=0)
+    # Running sums so the centroid can be updated incrementally on insert
+    lat_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    lon_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    sample_store_ids: Mapped[list] = mapped_column(
+        ARRAY(UUID(as_uuid=True)), default=list
+    )
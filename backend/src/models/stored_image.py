@@ -0,0 +1,24 @@
+import datetime
+
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base
+
+
+class StoredImage(Base):
+    """Content-addressed index of uploaded images, used to dedupe uploads."""
+
+    __tablename__ = "stored_images"
+
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)  # sha256
+    # Recorded only: a dHash match may be another product with similar
+    # packaging, so uploads are only reused for identical bytes
+    perceptual_hash: Mapped[str | None] = mapped_column(String(16))
+    url: Mapped[str] = mapped_column(String)
+    variants: Mapped[dict] = mapped_column(JSONB)  # variant name -> public URL
+    hit_count: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, server_default=func.now()
+    )
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 from src.schemas.common import BaseSchema
@@ -17,3 +17,10 @@ class StoreRead(BaseSchema):
     address: Optional[str] = None
     latitude: Optional[float] = None
     longitude: Optional[float] = None
+
+
+class StoreClusterRead(BaseSchema):
+    latitude: float
+    longitude: float
+    count: int
+    store_ids: List[UUID] = []
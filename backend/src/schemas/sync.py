@@ -0,0 +1,18 @@
+from typing import List
+from uuid import UUID
+
+from src.schemas.common import BaseSchema
+from src.schemas.exchange_rate import ExchangeRateRead
+from src.schemas.price import PriceLogRead
+from src.schemas.shopping_list import ShoppingListRead
+
+
+class SyncRead(BaseSchema):
+    # Pass it as `since` on the next sync
+    cursor: int
+    lists: List[ShoppingListRead] = []
+    deleted_list_ids: List[UUID] = []
+    # Latest price per store of changed products on the user's active lists
+    prices: List[PriceLogRead] = []
+    # Latest rate of each changed currency
+    rates: List[ExchangeRateRead] = []
@@ -1,15 +1,16 @@
+import asyncio
 import logging
+import re
 from decimal import Decimal
+from typing import Awaitable, Callable
 
 import httpx
-from bs4 import BeautifulSoup
-from sqlalchemy import select, desc
+from sqlalchemy import desc, func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.exchange_rate import ExchangeRate
+from src.services.rate_cache import publish_rate_change, rate_cache
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 BCV_URL = "https://www.bcv.org.ve/"
@@ -18,106 +19,278 @@ USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTM
 HEADERS = {"User-Agent": USER_AGENT}
 
 
-async def _scrape_bcv() -> Decimal | None:
-    """Scrapes the BCV website to get the USD exchange rate."""
+# Sources are queried concurrently: the next one is started after HEDGE_DELAY
+# seconds (or as soon as a higher priority one fails). A lower priority result
+# is only used once every higher priority source has failed.
+HEDGE_DELAY_SECONDS = 3.0
+FETCH_DEADLINE_SECONDS = 30.0
+REQUEST_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+MAX_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 0.5
+
+# BCV homepage block id -> ISO currency code
+BCV_CURRENCIES = {
+    "dolar": "USD",
+    "euro": "EUR",
+    "yuan": "CNY",
+    "lira": "TRY",
+    "rublo": "RUB",
+}
+# Stored precision of exchange_rates.rate_to_ves
+RATE_PRECISION = Decimal("0.0001")
+
+# Fast path for the currency blocks, avoids parsing the whole BCV page.
+# A value is only looked for up to the next id=, so a block missing its
+# <strong> can't take the next block's rate.
+_BCV_RATE_RE = re.compile(
+    r'id=["\']('
+    + "|".join(BCV_CURRENCIES)
+    + r')["\'](?:(?!id=["\']).)*?<strong>\s*([\d.,]+)\s*</strong>',
+    re.DOTALL,
+)
+
+# Pooled clients shared by every run, keyed by SSL verification
+_clients: dict[bool, httpx.AsyncClient] = {}
+
+
+def _get_client(verify: bool = True) -> httpx.AsyncClient:
+    client = _clients.get(verify)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=2),
+            # Retries connection failures at the transport level
+            transport=httpx.AsyncHTTPTransport(verify=verify, retries=1),
+        )
+        _clients[verify] = client
+    return client
+
+
+async def close_http_clients() -> None:
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
+
+
+async def _get_with_retries(client: httpx.AsyncClient, url: str) -> httpx.Response:
+    """GET with exponential backoff on timeouts, transport errors and 5xx."""
+    attempt = 0
+    while True:
+        try:
+            response = await client.get(url)
+            if response.status_code < 500 or attempt >= MAX_RETRIES:
+                response.raise_for_status()
+                return response
+            logger.warning(f"{url} answered {response.status_code}, retrying...")
+        except httpx.TransportError as e:
+            if attempt >= MAX_RETRIES:
+                raise
+            logger.warning(f"Error requesting {url}: {e}, retrying...")
+        await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2**attempt)
+        attempt += 1
+
+
+def _to_decimal(rate_str: str) -> Decimal:
+    # Convert comma decimal separator to dot
+    return Decimal(rate_str.strip().replace(",", ".")).quantize(RATE_PRECISION)
+
+
+def _parse_bcv_rates(html: str) -> dict[str, Decimal]:
+    """Extracts every currency block (USD, EUR, CNY, TRY, RUB) in one pass."""
+    rates = {
+        BCV_CURRENCIES[block_id]: _to_decimal(rate_str)
+        for block_id, rate_str in _BCV_RATE_RE.findall(html)
+    }
+    if "USD" in rates:
+        return rates
+
+    # Markup changed: fall back to a full parse (bs4 is slow to import, so only here)
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for block_id, currency in BCV_CURRENCIES.items():
+        div = soup.find("div", id=block_id)
+        strong = div.find("strong") if div else None
+        if strong:
+            rates[currency] = _to_decimal(strong.text)
+    if "USD" not in rates:
+        logger.warning("Could not find the 'dolar' div on BCV page.")
+    return rates
+
+
+async def _scrape_bcv() -> dict[str, Decimal] | None:
+    """Scrapes the BCV website to get the exchange rate of every listed currency."""
     try:
         logger.info("Attempting to scrape BCV website...")
-        # Create a specific client with SSL verification disabled for BCV.
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.get(BCV_URL, headers=HEADERS, timeout=15.0)
-            response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        dolar_div = soup.find("div", id="dolar")
-        if not dolar_div:
-            logger.warning("Could not find the 'dolar' div on BCV page.")
-            return None
+        # BCV needs SSL verification disabled.
+        response = await _get_with_retries(_get_client(verify=False), BCV_URL)
 
-        rate_str = dolar_div.find("strong").text.strip()
-        # Convert comma decimal separator to dot
-        rate_str = rate_str.replace(",", ".")
-        rate = Decimal(rate_str)
-        logger.info(f"Successfully scraped BCV rate: {rate}")
-        return rate
-    except httpx.RequestError as e:
+        rates = _parse_bcv_rates(response.text)
+        if not rates:
+            return None
+        logger.info(f"Successfully scraped BCV rates: {rates}")
+        return rates
+    except httpx.HTTPError as e:
         logger.error(f"Error requesting BCV page: {e}")
     except Exception as e:
         logger.error(f"An unexpected error occurred during BCV scraping: {e}")
     return None
 
 
-async def _fetch_dolarapi() -> Decimal | None:
-    """Fetches the official exchange rate from DolarAPI as a fallback."""
+async def _fetch_dolarapi() -> dict[str, Decimal] | None:
+    """Fetches the official USD exchange rate from DolarAPI as a fallback."""
     try:
         logger.info("Attempting to fetch rate from DolarAPI...")
-        async with httpx.AsyncClient() as client:
-            response = await client.get(DOLARAPI_URL, timeout=15.0)
-            response.raise_for_status()
+        response = await _get_with_retries(_get_client(), DOLARAPI_URL)
 
         data = response.json()
-        rate = Decimal(data["promedio"])
+        rate = Decimal(data["promedio"]).quantize(RATE_PRECISION)
         logger.info(f"Successfully fetched DolarAPI rate: {rate}")
-        return rate
-    except httpx.RequestError as e:
+        return {"USD": rate}
+    except httpx.HTTPError as e:
         logger.error(f"Error requesting DolarAPI: {e}")
-    except (KeyError, TypeError, ValueError) as e:
+    except (KeyError, TypeError, ValueError, ArithmeticError) as e:
         logger.error(f"Error parsing DolarAPI response: {e}")
     except Exception as e:
         logger.error(f"An unexpected error occurred during DolarAPI fetch: {e}")
     return None
 
 
-async def update_exchange_rate(db: AsyncSession):
+# Ordered by priority
+RATE_SOURCES: list[tuple[str, Callable[[], Awaitable[dict[str, Decimal] | None]]]] = [
+    ("BCV", _scrape_bcv),
+    ("DolarAPI", _fetch_dolarapi),
+]
+
+
+async def _fetch_rate_hedged(
+    sources=RATE_SOURCES,
+    hedge_delay: float = HEDGE_DELAY_SECONDS,
+    deadline: float = FETCH_DEADLINE_SECONDS,
+) -> tuple[dict[str, Decimal], str] | None:
     """
-    Fetches the latest USD to VES exchange rate and saves it to the database.
-    It tries the BCV website first, then a fallback API.
-    If the fetched rate is the same as the last one in the DB, it skips saving.
+    Returns (rates, source_name) from the highest priority source that succeeds.
     """
-    rate = None
-    source = None
-
-    # Try primary source (BCV)
-    rate = await _scrape_bcv()
-    if rate:
-        source = "BCV"
-    else:
-        # If primary fails, try fallback source (DolarAPI)
-        logger.warning("BCV scraping failed, trying DolarAPI fallback.")
-        rate = await _fetch_dolarapi()
-        if rate:
-            source = "DolarAPI"
-
-    if rate and source:
-        # --- NEW VALIDATION: Check for duplicate consecutive rates ---
-        stmt = (
-            select(ExchangeRate)
-            .where(ExchangeRate.currency_code == "USD")
-            .order_by(desc(ExchangeRate.recorded_at))
-            .limit(1)
-        )
-        result = await db.execute(stmt)
-        latest_record = result.scalars().first()
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + deadline
+    results: dict[int, dict[str, Decimal] | None] = {}
+    tasks: dict[asyncio.Task, int] = {}
 
-        if latest_record and latest_record.rate_to_ves == rate:
-            logger.info(
-                f"Rate {rate} hasn't changed since {latest_record.recorded_at}. Skipping save."
+    def launch_next() -> None:
+        index = len(tasks)
+        if index < len(sources):
+            name, fetch = sources[index]
+            if index > 0:
+                logger.info(f"Hedging with source {name}")
+            tasks[asyncio.create_task(fetch())] = index
+
+    def best_result() -> tuple[dict[str, Decimal], str] | None:
+        for index, (name, _) in enumerate(sources):
+            rate = results.get(index)
+            if rate:
+                return rate, name
+        return None
+
+    launch_next()
+    try:
+        while True:
+            # Highest priority source that has not failed yet
+            for index, (name, _) in enumerate(sources):
+                if index not in results:
+                    break
+                if results[index]:
+                    return results[index], name
+            else:
+                return None  # Every source failed
+
+            remaining = stop_at - loop.time()
+            if remaining <= 0:
+                logger.warning("Exchange rate sources hit the deadline.")
+                return best_result()
+
+            pending = [task for task in tasks if not task.done()]
+            wait_for = remaining
+            if len(tasks) < len(sources):
+                wait_for = min(wait_for, hedge_delay)
+
+            done, _ = await asyncio.wait(
+                pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED
             )
-            return latest_record
+            if not done:
+                launch_next()
+            for task in done:
+                try:
+                    results[tasks[task]] = task.result()
+                except Exception as e:
+                    logger.error(f"Exchange rate source failed: {e}")
+                    results[tasks[task]] = None
+                if not results[tasks[task]]:
+                    launch_next()  # Don't wait for the hedge delay on failure
+    finally:
+        for task in tasks:
+            task.cancel()
 
-        # Save new rate if it's different or if it's the first record
-        logger.info(
-            f"Saving new exchange rate {rate} from source {source} to database."
-        )
-        new_rate = ExchangeRate(
-            currency_code="USD",
-            rate_to_ves=rate,
-            source=source,
-        )
-        db.add(new_rate)
-        await db.commit()
-        await db.refresh(new_rate)
-        logger.info(f"Successfully saved new rate with ID {new_rate.rate_id}.")
-        return new_rate
-    else:
+
+async def update_exchange_rate(db: AsyncSession) -> list[ExchangeRate]:
+    """
+    Fetches the latest exchange rates to VES and saves them to the database.
+    It prefers the BCV website (every listed currency in one fetch), with a
+    fallback API (USD only) queried concurrently.
+    Currencies whose rate is the same as the last one in the DB are skipped;
+    changed ones are written with a single bulk insert.
+    Returns the current record of every fetched currency.
+    """
+    # BCV first, DolarAPI hedged in case BCV is slow or down
+    fetched = await _fetch_rate_hedged()
+    if not fetched:
         logger.error("Failed to fetch exchange rate from all sources.")
-        return None
+        return []
+    rates, source = fetched
+
+    # Serialize with concurrent runs (e.g. the manual trigger and the scheduled
+    # job) so the duplicate check below sees the other run's insert
+    await db.execute(
+        select(func.pg_advisory_xact_lock(func.hashtext("update_exchange_rate")))
+    )
+
+    # Latest stored rate of every fetched currency, in one query
+    stmt = (
+        select(ExchangeRate)
+        .distinct(ExchangeRate.currency_code)
+        .where(ExchangeRate.currency_code.in_(rates))
+        .order_by(ExchangeRate.currency_code, desc(ExchangeRate.recorded_at))
+    )
+    result = await db.execute(stmt)
+    latest = {record.currency_code: record for record in result.scalars().all()}
+
+    changed = []
+    for currency, rate in rates.items():
+        record = latest.get(currency)
+        if record and record.rate_to_ves == rate:
+            logger.info(
+                f"{currency} rate {rate} hasn't changed since {record.recorded_at}. Skipping save."
+            )
+        else:
+            changed.append(
+                dict(currency_code=currency, rate_to_ves=rate, source=source)
+            )
+
+    if not changed:
+        return list(latest.values())
+
+    logger.info(f"Saving {len(changed)} new exchange rates from source {source}.")
+    new_rates = (
+        await db.scalars(insert(ExchangeRate).returning(ExchangeRate), changed)
+    ).all()
+    for new_rate in new_rates:
+        await publish_rate_change(db, new_rate)
+    await db.commit()
+
+    for new_rate in new_rates:
+        rate_cache.set(new_rate)
+        latest[new_rate.currency_code] = new_rate
+    logger.info(
+        f"Successfully saved rates for {[r['currency_code'] for r in changed]}."
+    )
+    return list(latest.values())
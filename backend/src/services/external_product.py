@@ -1,10 +1,19 @@
+from functools import cache
 from typing import Any, Dict, Optional
 
-import openfoodfacts
 from fastapi.concurrency import run_in_threadpool
 from fastapi import HTTPException
 
-api = openfoodfacts.API(user_agent="Centimos/1.0 (destructomax1@gmail.com)")
+
+@cache
+def off_api():
+    """
+    The OpenFoodFacts client (slow import): created by the lifespan's warm-up
+    in the background, or on first use if that comes first.
+    """
+    import openfoodfacts
+
+    return openfoodfacts.API(user_agent="Centimos/1.0 (destructomax1@gmail.com)")
 
 
 def validate_gtin(gtin: str) -> bool:
@@ -97,7 +106,7 @@ async def fetch_product_from_off(barcode: str) -> Optional[Dict[str, Any]]:
         ]
 
         product_data = await run_in_threadpool(
-            api.product.get, gtin13_barcode, fields=fields_needed
+            off_api().product.get, gtin13_barcode, fields=fields_needed
         )
 
         if not product_data:
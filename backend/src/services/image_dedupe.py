@@ -0,0 +1,86 @@
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.stored_image import StoredImage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DedupeStats:
+    """Per-worker counters; the table keeps the cross-worker totals."""
+
+    uploads: int = 0
+    exact_hits: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        if not self.uploads:
+            return 0.0
+        return self.exact_hits / self.uploads
+
+
+stats = DedupeStats()
+
+
+async def record_exact_hit(db: AsyncSession, content_hash: str) -> StoredImage | None:
+    """Looks up an identical upload and counts the hit in the same statement."""
+    result = await db.execute(
+        update(StoredImage)
+        .where(StoredImage.content_hash == content_hash)
+        .values(hit_count=StoredImage.hit_count + 1)
+        .returning(StoredImage)
+    )
+    image = result.scalars().first()
+    if image:
+        await db.commit()
+        stats.exact_hits += 1
+        logger.info(f"Upload dedupe hit (exact), hit rate {stats.hit_rate:.1%}")
+    return image
+
+
+async def remember_image(
+    db: AsyncSession,
+    content_hash: str,
+    perceptual_hash: str | None,
+    url: str,
+    variants: dict[str, str],
+) -> None:
+    stmt = (
+        insert(StoredImage)
+        .values(
+            content_hash=content_hash,
+            perceptual_hash=perceptual_hash,
+            url=url,
+            variants=variants,
+        )
+        # A concurrent identical upload may have won the race
+        .on_conflict_do_nothing(index_elements=["content_hash"])
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+
+async def get_dedupe_report(db: AsyncSession) -> dict:
+    result = await db.execute(
+        select(
+            func.count(StoredImage.content_hash),
+            func.coalesce(func.sum(StoredImage.hit_count), 0),
+        )
+    )
+    stored, hits = result.one()
+    total = stored + hits
+    return {
+        "stored_images": stored,
+        "dedupe_hits": hits,
+        "hit_rate": hits / total if total else 0.0,
+        "worker": {
+            "uploads": stats.uploads,
+            "exact_hits": stats.exact_hits,
+            "hit_rate": stats.hit_rate,
+        },
+    }
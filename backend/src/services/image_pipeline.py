@@ -0,0 +1,132 @@
+import asyncio
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Fixed widths served to the app: list thumbnails, detail view, full screen.
+# Every upload gets every size so clients can swap the suffix of any image URL.
+VARIANT_SIZES = {"sm": 160, "md": 480, "lg": 1080}
+VARIANT_FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+QUALITY = 80
+# Refuse decompression bombs instead of only warning about them
+MAX_IMAGE_PIXELS = 50_000_000
+
+
+class InvalidImage(Exception):
+    """Raised when the upload can't be decoded as an image."""
+
+
+@dataclass
+class ImageVariant:
+    size: str
+    width: int
+    format: str
+    content_type: str
+    data: bytes
+
+    @property
+    def name(self) -> str:
+        extension = "jpg" if self.format == "jpeg" else self.format
+        return f"{self.size}.{extension}"
+
+
+@dataclass
+class TranscodedImage:
+    variants: list[ImageVariant]
+    perceptual_hash: str
+
+
+@cache
+def load_pillow():
+    """
+    Imports and configures Pillow on first use, in whichever process
+    transcodes: it is slow to import and the API only needs it for uploads.
+    """
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    return Image, ImageOps
+
+
+def perceptual_hash(image: "Image.Image") -> str:
+    """64-bit difference hash (dHash): survives re-encoding and resizing."""
+    Image, _ = load_pillow()
+    # One byte per pixel in "L" mode, row by row
+    pixels = image.convert("L").resize((9, 8), Image.Resampling.BILINEAR).tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left, right = pixels[row * 9 + col], pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:016x}"
+
+
+def transcode_image(source: bytes | str) -> TranscodedImage:
+    """
+    Decodes an upload (its content, or the path of a file holding it) and
+    re-encodes it at every variant width and format.
+    Metadata (EXIF, GPS, ICC) is dropped; the EXIF orientation is applied first.
+    Runs in a worker process, so it must stay a plain top-level function.
+    """
+    Image, ImageOps = load_pillow()
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    try:
+        with Image.open(source) as image:
+            # Let the JPEG decoder downscale while decoding (much cheaper)
+            largest = max(VARIANT_SIZES.values())
+            image.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGB")
+    except (OSError, Image.DecompressionBombError, ValueError) as e:
+        raise InvalidImage(str(e)) from e
+
+    variants = []
+    # Largest first, so each size is resized from the previous one
+    resized = image
+    for size, target_width in sorted(
+        VARIANT_SIZES.items(), key=lambda item: item[1], reverse=True
+    ):
+        # Never upscale
+        width = min(target_width, resized.width)
+        height = max(1, round(resized.height * width / resized.width))
+        resized = resized.resize((width, height), Image.Resampling.LANCZOS)
+        for format, content_type in VARIANT_FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, format=format.upper(), quality=QUALITY, optimize=True)
+            variants.append(
+                ImageVariant(size, width, format, content_type, buffer.getvalue())
+            )
+    return TranscodedImage(variants, perceptual_hash(resized))
+
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def start_image_pool(max_workers: int) -> None:
+    global _pool
+    _pool = ProcessPoolExecutor(max_workers=max_workers)
+
+
+def shutdown_image_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def process_image(source: bytes | str) -> TranscodedImage:
+    """
+    Transcodes off the event loop, in the process pool when it is running.
+    Pass a path for large uploads: only the path is sent to the worker.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_pool, transcode_image, source)
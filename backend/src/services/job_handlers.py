@@ -0,0 +1,45 @@
+"""Handlers run by the background worker; importing this module registers them."""
+
+import logging
+import uuid
+from datetime import datetime
+
+from sqlalchemy import select
+
+from src.core.database import AsyncSessionLocal
+from src.core.email_utils import reset_code_message
+from src.core.job_queue import job_handler
+from src.core.mail_sender import mail_sender
+from src.models.password_reset import PasswordReset
+from src.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+@job_handler("send_reset_code", batch_size=20)
+async def send_reset_codes(payloads: list[dict]) -> list[BaseException | None]:
+    reset_ids = [uuid.UUID(p["reset_id"]) for p in payloads]
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(PasswordReset.reset_id, PasswordReset.code, User.email)
+            .join(User, User.user_id == PasswordReset.user_id)
+            .where(
+                PasswordReset.reset_id.in_(reset_ids),
+                PasswordReset.is_used.is_(False),
+                PasswordReset.expires_at > datetime.utcnow(),
+            )
+        )
+        pending = {row.reset_id: row for row in result}
+    # Used or expired codes aren't worth sending (e.g. on a late retry)
+    resets = [pending[reset_id] for reset_id in reset_ids if reset_id in pending]
+
+    # One batch goes out over the pooled SMTP connections
+    results = await mail_sender.send_many(
+        [reset_code_message(reset.email, reset.code) for reset in resets]
+    )
+    errors = {reset.reset_id: error for reset, error in zip(resets, results)}
+    logger.info(
+        f"Sent {results.count(None)}/{len(payloads)} reset codes, "
+        f"{len(payloads) - len(resets)} no longer valid"
+    )
+    return [errors.get(reset_id) for reset_id in reset_ids]
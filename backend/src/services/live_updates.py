@@ -0,0 +1,95 @@
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.change_log import Change, ChangeKind, record_changes
+from src.core.invalidation import Invalidation, InvalidationKind, bus
+from src.models.price import PriceLog
+from src.schemas.price import PriceLogRead
+
+logger = logging.getLogger(__name__)
+
+PRICES_CHANNEL = "price_logs_created"
+# Events buffered per client before the oldest ones are dropped
+MAX_PENDING_EVENTS = 100
+
+
+@dataclass(eq=False)
+class Subscription:
+    barcodes: frozenset[str]
+    queue: asyncio.Queue = field(
+        default_factory=lambda: asyncio.Queue(maxsize=MAX_PENDING_EVENTS)
+    )
+
+    def push(self, event: str, data: str) -> None:
+        if self.queue.full():
+            # Slow client: drop the oldest event instead of blocking the broker
+            self.queue.get_nowait()
+        self.queue.put_nowait((event, data))
+
+
+class LiveUpdateBroker:
+    """
+    Fans out NOTIFY payloads received by this worker to its connected clients.
+    Rate changes go to everyone, price events only to clients subscribed to
+    the barcode.
+    """
+
+    def __init__(self) -> None:
+        self._subscriptions: set[Subscription] = set()
+
+    def subscribe(self, barcodes: set[str]) -> Subscription:
+        subscription = Subscription(barcodes=frozenset(barcodes))
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def handle_rate_notification(self, payload: str) -> None:
+        for subscription in self._subscriptions:
+            subscription.push("rate", payload)
+
+    def handle_price_notification(self, payload: str) -> None:
+        barcode = json.loads(payload).get("product_barcode")
+        for subscription in self._subscriptions:
+            if barcode in subscription.barcodes:
+                subscription.push("price", payload)
+
+
+async def publish_price_logged(
+    db: AsyncSession, log: PriceLog, *changes: Change
+) -> None:
+    """
+    Broadcasts a new price log, invalidates the product's cached prices once the
+    transaction commits and marks them changed for delta sync, along with any
+    other `changes`, in one statement.
+    The log must be flushed so its generated fields exist.
+    """
+    await publish_prices_logged(db, [log], *changes)
+
+
+async def publish_prices_logged(
+    db: AsyncSession, logs: list[PriceLog], *changes: Change
+) -> None:
+    """Batch version of publish_price_logged, one statement for any batch size."""
+    notifications = [
+        (PRICES_CHANNEL, PriceLogRead.model_validate(log).model_dump_json())
+        for log in logs
+    ]
+    barcodes = sorted({log.product_barcode for log in logs})
+    notifications += bus.stage(
+        db, *(Invalidation(InvalidationKind.PRICES, barcode) for barcode in barcodes)
+    )
+    await record_changes(
+        db,
+        *(Change(ChangeKind.PRICE, barcode) for barcode in barcodes),
+        *changes,
+        notifications=notifications,
+    )
+
+
+broker = LiveUpdateBroker()
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import time
+
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.change_log import Change, ChangeKind, record_changes
+from src.core.database import reads_from_primary
+from src.core.invalidation import Invalidation, InvalidationKind, bus
+from src.models.exchange_rate import ExchangeRate
+from src.schemas.exchange_rate import ExchangeRateRead
+
+logger = logging.getLogger(__name__)
+
+RATES_CHANNEL = "exchange_rates_changed"
+# Safety net in case an invalidation is missed
+CACHE_TTL_SECONDS = 600
+
+
+class LatestRateCache:
+    """
+    Process-wide cache of the latest exchange rate per currency.
+    Entries are replaced on local writes and evicted through the invalidation bus.
+    """
+
+    def __init__(self) -> None:
+        self._rates: dict[str, tuple[ExchangeRateRead, float]] = {}
+        self._lock = asyncio.Lock()
+        # Bumped on every invalidation; rates loaded across one aren't stored
+        self._generation = 0
+
+    async def get(self, db: AsyncSession, currency: str) -> ExchangeRateRead | None:
+        currency = currency.upper()
+        cached = self._rates.get(currency)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        # Only one coroutine per worker reloads a missing entry
+        async with self._lock:
+            cached = self._rates.get(currency)
+            if cached and cached[1] > time.monotonic():
+                return cached[0]
+
+            generation = self._generation
+            stmt = (
+                select(ExchangeRate)
+                .where(ExchangeRate.currency_code == currency)
+                .order_by(desc(ExchangeRate.recorded_at))
+                .limit(1)
+            )
+            # A replica may not have the rate that invalidated the entry yet
+            with reads_from_primary():
+                result = await db.execute(stmt)
+            rate = result.scalars().first()
+            if not rate:
+                return None
+            if generation != self._generation:
+                # Invalidated while loading: the row read may predate the change
+                return ExchangeRateRead.model_validate(rate)
+            return self.set(rate)
+
+    def set(self, rate: ExchangeRate) -> ExchangeRateRead:
+        snapshot = ExchangeRateRead.model_validate(rate)
+        self._rates[snapshot.currency_code.upper()] = (
+            snapshot,
+            time.monotonic() + CACHE_TTL_SECONDS,
+        )
+        return snapshot
+
+    def invalidate(self, currency: str | None = None) -> None:
+        self._generation += 1
+        if currency:
+            self._rates.pop(currency.upper(), None)
+        else:
+            self._rates.clear()
+
+    def handle_invalidation(self, invalidation: Invalidation) -> None:
+        logger.info(
+            f"Exchange rate cache invalidated for '{invalidation.key or 'ALL'}'"
+        )
+        self.invalidate(invalidation.key)
+
+
+async def publish_rate_change(db: AsyncSession, rate: ExchangeRate) -> None:
+    """
+    Tells every worker's caches and live update subscribers about a new rate once
+    the transaction commits, and marks it changed for delta sync, in one
+    statement. The rate must be flushed so its generated fields exist.
+    """
+    currency = rate.currency_code.upper()
+    notifications = [
+        (RATES_CHANNEL, ExchangeRateRead.model_validate(rate).model_dump_json()),
+        *bus.stage(db, Invalidation(InvalidationKind.RATES, currency)),
+    ]
+    await record_changes(
+        db, Change(ChangeKind.RATE, currency), notifications=notifications
+    )
+
+
+rate_cache = LatestRateCache()
@@ -0,0 +1,62 @@
+import logging
+from typing import AsyncIterator
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class StorageError(Exception):
+    """Raised when Supabase Storage rejects an upload."""
+
+
+class StorageClient:
+    """
+    Long-lived pooled client for the Supabase Storage HTTP API.
+    Created once in the app lifespan and shared by every request.
+    """
+
+    def __init__(self, base_url: str, api_key: str, bucket: str = "pictures"):
+        self.base_url = base_url.rstrip("/")
+        self.bucket = bucket
+        self._client = httpx.AsyncClient(
+            base_url=f"{self.base_url}/storage/v1",
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+
+    def public_url(self, filename: str) -> str:
+        # Assumption: Bucket is public.
+        return f"{self.base_url}/storage/v1/object/public/{self.bucket}/{filename}"
+
+    async def upload(
+        self,
+        filename: str,
+        content: bytes | AsyncIterator[bytes],
+        content_type: str,
+        content_length: int | None = None,
+        upsert: bool = False,
+    ) -> str:
+        """
+        Uploads an object and returns its public URL.
+        An async iterator is streamed to storage chunk by chunk; exceptions it
+        raises (size limit, cancellation) abort the request and propagate.
+        """
+        headers = {"Content-Type": content_type}
+        if upsert:
+            headers["x-upsert"] = "true"
+        if content_length is not None and not isinstance(content, bytes):
+            headers["Content-Length"] = str(content_length)
+
+        response = await self._client.post(
+            f"/object/{self.bucket}/{filename}", content=content, headers=headers
+        )
+        if response.status_code not in (200, 201):
+            logger.error(f"Supabase Upload Error: {response.text}")
+            raise StorageError(f"Storage answered {response.status_code}")
+
+        return self.public_url(filename)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -0,0 +1,166 @@
+import logging
+import math
+import uuid
+from collections import defaultdict
+
+from geoalchemy2 import Geometry
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.store import Store
+from src.models.store_cluster import StoreCluster
+
+logger = logging.getLogger(__name__)
+
+# Zoom levels that get precomputed cells. Requests outside are clamped.
+MIN_ZOOM = 3
+MAX_ZOOM = 16
+# Each map tile is split into 2**CELL_BITS x 2**CELL_BITS cells (64px at 256px tiles)
+CELL_BITS = 2
+# Number of store IDs kept per cell so the client can open a cluster directly
+SAMPLE_SIZE = 5
+
+_MAX_LAT = 85.05112878
+
+
+def clamp_zoom(zoom: int) -> int:
+    return max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+
+
+def cell_for(lat: float, lon: float, zoom: int) -> tuple[int, int]:
+    """
+    Returns the (x, y) grid cell of a coordinate at the given zoom level.
+    Uses the Web Mercator tiling scheme so cells line up with map tiles.
+    """
+    n = 2 ** (zoom + CELL_BITS)
+    lat = max(-_MAX_LAT, min(_MAX_LAT, lat))
+    x = int((lon + 180.0) / 360.0 * n)
+    lat_rad = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+async def add_store_to_clusters(
+    db: AsyncSession, store_id: uuid.UUID, lat: float, lon: float
+) -> None:
+    """
+    Adds a new store to the precomputed cells of every zoom level.
+    Runs as a single upsert inside the caller's transaction.
+    """
+    rows = []
+    for zoom in range(MIN_ZOOM, MAX_ZOOM + 1):
+        cell_x, cell_y = cell_for(lat, lon, zoom)
+        rows.append(
+            dict(
+                zoom=zoom,
+                cell_x=cell_x,
+                cell_y=cell_y,
+                store_count=1,
+                lat_sum=lat,
+                lon_sum=lon,
+                sample_store_ids=[store_id],
+            )
+        )
+
+    stmt = insert(StoreCluster).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["zoom", "cell_x", "cell_y"],
+        set_=dict(
+            store_count=StoreCluster.store_count + 1,
+            lat_sum=StoreCluster.lat_sum + stmt.excluded.lat_sum,
+            lon_sum=StoreCluster.lon_sum + stmt.excluded.lon_sum,
+            # Only grow the sample while it is below SAMPLE_SIZE
+            sample_store_ids=case(
+                (
+                    func.cardinality(StoreCluster.sample_store_ids) < SAMPLE_SIZE,
+                    func.array_cat(
+                        StoreCluster.sample_store_ids, stmt.excluded.sample_store_ids
+                    ),
+                ),
+                else_=StoreCluster.sample_store_ids,
+            ),
+        ),
+    )
+    await db.execute(stmt)
+
+
+async def rebuild_store_clusters(db: AsyncSession) -> int:
+    """
+    Recomputes every cell from scratch. Used to backfill the table or to
+    repair it after bulk imports that bypass the API. Returns the cell count.
+    """
+    result = await db.execute(
+        select(
+            Store.store_id,
+            func.ST_Y(func.cast(Store.location, Geometry)).label("latitude"),
+            func.ST_X(func.cast(Store.location, Geometry)).label("longitude"),
+        ).where(Store.location.is_not(None))
+    )
+
+    cells: dict[tuple[int, int, int], dict] = defaultdict(
+        lambda: dict(store_count=0, lat_sum=0.0, lon_sum=0.0, sample_store_ids=[])
+    )
+    for row in result:
+        for zoom in range(MIN_ZOOM, MAX_ZOOM + 1):
+            cell = cells[(zoom, *cell_for(row.latitude, row.longitude, zoom))]
+            cell["store_count"] += 1
+            cell["lat_sum"] += row.latitude
+            cell["lon_sum"] += row.longitude
+            if len(cell["sample_store_ids"]) < SAMPLE_SIZE:
+                cell["sample_store_ids"].append(row.store_id)
+
+    await db.execute(delete(StoreCluster))
+    rows = [
+        dict(zoom=zoom, cell_x=x, cell_y=y, **data)
+        for (zoom, x, y), data in cells.items()
+    ]
+    # Keep each statement well under the bind parameter limit
+    for start in range(0, len(rows), 4000):
+        await db.execute(insert(StoreCluster).values(rows[start : start + 4000]))
+    await db.commit()
+
+    logger.info(f"Rebuilt {len(rows)} store cluster cells.")
+    return len(rows)
+
+
+async def get_clusters_in_bbox(
+    db: AsyncSession,
+    min_lon: float,
+    min_lat: float,
+    max_lon: float,
+    max_lat: float,
+    zoom: int,
+    limit: int,
+) -> list[StoreCluster]:
+    """Returns the precomputed cells covering a bounding box."""
+    zoom = clamp_zoom(zoom)
+    # y grows southward, so the north-west corner gives the minimum cell
+    x_min, y_min = cell_for(max_lat, min_lon, zoom)
+    x_max, y_max = cell_for(min_lat, max_lon, zoom)
+
+    stmt = (
+        select(StoreCluster)
+        .where(
+            StoreCluster.zoom == zoom,
+            StoreCluster.cell_x.between(x_min, x_max),
+            StoreCluster.cell_y.between(y_min, y_max),
+            StoreCluster.store_count > 0,
+        )
+        .order_by(StoreCluster.store_count.desc())
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return list(result.scalars().all())
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    from src.core.database import AsyncSessionLocal
+
+    async def _main():
+        async with AsyncSessionLocal() as db:
+            await rebuild_store_clusters(db)
+
+    asyncio.run(_main())
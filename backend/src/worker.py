@@ -0,0 +1,104 @@
+"""
+Background job worker.
+
+    python -m src.worker
+
+Runs JOB_WORKER_CONCURRENCY loops that lease batches from the jobs table
+(FOR UPDATE SKIP LOCKED, so any number of workers can run side by side).
+A batch left unfinished by a dead worker is picked up when its lease expires.
+Idle loops sleep until a NOTIFY announces a new job, or JOB_POLL_SECONDS for
+delayed and retried jobs. Prometheus metrics, including queue depth and age,
+are served on JOB_WORKER_METRICS_PORT.
+"""
+
+import asyncio
+import logging
+import signal
+
+from prometheus_client import Gauge, start_http_server
+
+import src.services.job_handlers  # noqa: F401 (registers the handlers)
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal, engine
+from src.core.job_queue import JOBS_CHANNEL, process_batch, queue_stats
+from src.core.mail_sender import mail_sender
+from src.core.notifications import PgNotificationListener
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUEUE_STATS_INTERVAL = 15.0
+
+QUEUE_DEPTH = Gauge(
+    "job_queue_depth", "Jobs in the queue by type and status", ["job_type", "status"]
+)
+QUEUE_AGE = Gauge(
+    "job_queue_oldest_age_seconds",
+    "Age of the oldest job by type and status",
+    ["job_type", "status"],
+)
+
+
+async def work(stopping: asyncio.Event, wake: asyncio.Event) -> None:
+    while not stopping.is_set():
+        try:
+            async with AsyncSessionLocal() as db:
+                processed = await process_batch(db)
+        except Exception:
+            logger.exception("Job batch failed, retrying after a pause")
+            processed = 0
+        if processed:
+            continue
+        # Queue empty: wait for a NOTIFY, the poll interval or shutdown
+        wake.clear()
+        try:
+            await asyncio.wait_for(wake.wait(), settings.JOB_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def report_queue_stats(stopping: asyncio.Event) -> None:
+    while not stopping.is_set():
+        try:
+            async with AsyncSessionLocal() as db:
+                stats = await queue_stats(db)
+            QUEUE_DEPTH.clear()
+            QUEUE_AGE.clear()
+            for row in stats:
+                QUEUE_DEPTH.labels(row["job_type"], row["status"]).set(row["depth"])
+                QUEUE_AGE.labels(row["job_type"], row["status"]).set(
+                    row["oldest_age_seconds"]
+                )
+        except Exception as e:
+            logger.error(f"Could not read queue stats: {e}")
+        try:
+            await asyncio.wait_for(stopping.wait(), QUEUE_STATS_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main() -> None:
+    stopping, wake = asyncio.Event(), asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        # Finish the batches in progress, then exit
+        loop.add_signal_handler(sig, lambda: (stopping.set(), wake.set()))
+
+    listener = PgNotificationListener()
+    listener.add_listener(JOBS_CHANNEL, lambda _: wake.set())
+    await listener.start()
+    start_http_server(settings.JOB_WORKER_METRICS_PORT)
+
+    logger.info(f"Job worker started with {settings.JOB_WORKER_CONCURRENCY} loops")
+    await asyncio.gather(
+        report_queue_stats(stopping),
+        *(work(stopping, wake) for _ in range(settings.JOB_WORKER_CONCURRENCY)),
+    )
+    await listener.stop()
+    await mail_sender.close()
+    await engine.dispose()
+    logger.info("Job worker stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
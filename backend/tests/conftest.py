@@ -0,0 +1,130 @@
+import os
+
+# Settings are read when src is first imported, so the test values go first.
+# Variables already set in the environment win, except the database name:
+# tests empty every table, so they only ever run against TEST_POSTGRES_DB.
+os.environ["POSTGRES_DB"] = os.environ.get("TEST_POSTGRES_DB", "centimos_test")
+for name, value in {
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "postgres",
+    "POSTGRES_SERVER": "localhost",
+    "SECRET_KEY": "test-secret-key",
+    "MAIL_USERNAME": "test",
+    "MAIL_PASSWORD": "test",
+    "MAIL_FROM": "noreply@example.com",
+    "MAIL_SERVER": "localhost",
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_KEY": "test-key",
+    "SCHEDULER_ENABLED": "false",
+}.items():
+    os.environ.setdefault(name, value)
+
+import asyncio  # noqa: E402
+import importlib  # noqa: E402
+import pkgutil  # noqa: E402
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+import src.models  # noqa: E402
+from src.core import security  # noqa: E402
+from src.core.config import settings  # noqa: E402
+from src.core.database import AsyncSessionLocal, engine  # noqa: E402
+from src.core.existence_cache import known_products, known_stores  # noqa: E402
+from src.core.invalidation import Invalidation, InvalidationKind  # noqa: E402
+from src.core.response_cache import response_cache  # noqa: E402
+from src.main import app  # noqa: E402
+from src.models.base import Base  # noqa: E402
+from src.models.user import User  # noqa: E402
+from src.services.rate_cache import rate_cache  # noqa: E402
+
+for module in pkgutil.iter_modules(src.models.__path__):
+    importlib.import_module(f"src.models.{module.name}")
+
+TABLES = [t for t in Base.metadata.sorted_tables if not t.info.get("is_view")]
+# Views are defined by the migrations; tests get empty ones with the same columns
+VIEWS = [t for t in Base.metadata.sorted_tables if t.info.get("is_view")]
+
+
+def _create_empty_view(conn, view) -> None:
+    columns = ", ".join(
+        f"CAST(NULL AS {column.type.compile(conn.dialect)}) AS {column.name}"
+        for column in view.columns
+    )
+    conn.exec_driver_sql(
+        f"CREATE OR REPLACE VIEW {view.name} AS SELECT {columns} WHERE false"
+    )
+
+
+@pytest.fixture
+async def client():
+    """HTTP client calling the app in-process (no lifespan)."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+async def _create_schema() -> None:
+    schema_engine = create_async_engine(
+        settings.SQLALCHEMY_DATABASE_URI, poolclass=NullPool
+    )
+    try:
+        try:
+            async with schema_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        except Exception as e:
+            pytest.skip(f"Test database unavailable: {e}")
+        async with schema_engine.begin() as conn:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS postgis"))
+            for view in VIEWS:
+                await conn.execute(text(f"DROP VIEW IF EXISTS {view.name}"))
+            await conn.run_sync(Base.metadata.drop_all, tables=TABLES)
+            await conn.run_sync(Base.metadata.create_all, tables=TABLES)
+            for view in VIEWS:
+                await conn.run_sync(_create_empty_view, view)
+    finally:
+        await schema_engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Creates the schema once per run; skips when Postgres is unreachable."""
+    asyncio.run(_create_schema())
+
+
+@pytest.fixture
+async def db(database):
+    """Session on emptied tables, with the in-process caches dropped too."""
+    tables = ", ".join(f'"{table.name}"' for table in TABLES)
+    async with engine.begin() as conn:
+        await conn.execute(text(f"TRUNCATE {tables} CASCADE"))
+    response_cache.clear()
+    rate_cache.invalidate()
+    known_products.handle_invalidation(Invalidation(InvalidationKind.PRODUCTS))
+    known_stores.handle_invalidation(Invalidation(InvalidationKind.STORES))
+
+    async with AsyncSessionLocal() as session:
+        yield session
+    # Pooled connections belong to this test's event loop
+    await engine.dispose()
+
+
+@pytest.fixture
+async def user(db) -> User:
+    user = User(
+        username="tester",
+        email="tester@example.com",
+        password_hash=security.get_password_hash("secret"),
+    )
+    db.add(user)
+    await db.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user) -> dict[str, str]:
+    token = security.create_access_token({"sub": str(user.user_id)})
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,169 @@
+import asyncio
+import time
+from decimal import Decimal
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, JSONResponse, Response
+from starlette.routing import Route
+
+from src.services import exchange_rate_updater as updater
+from tests.stand_ins import serve
+
+BCV_PAGE = """
+<div id="euro"><strong> 41,25000000 </strong></div>
+<div id="dolar"><strong> 36,50000000 </strong></div>
+"""
+BCV_RATES = {"EUR": Decimal("41.2500"), "USD": Decimal("36.5000")}
+DOLARAPI_RATES = {"USD": Decimal("37.1000")}
+
+
+class Source:
+    """Stand-in endpoint: answers each request with the next scripted reply."""
+
+    def __init__(self, *replies: tuple[float, Response]) -> None:
+        self.replies = list(replies)
+        self.hits: list[float] = []  # Arrival times, time.monotonic()
+
+    async def __call__(self, request) -> Response:
+        self.hits.append(time.monotonic())
+        delay, response = (
+            self.replies.pop(0) if len(self.replies) > 1 else self.replies[0]
+        )
+        await asyncio.sleep(delay)
+        return response
+
+
+def bcv(delay: float = 0.0, status: int = 200) -> tuple[float, Response]:
+    return delay, HTMLResponse(BCV_PAGE if status == 200 else "", status_code=status)
+
+
+def dolarapi(delay: float = 0.0, status: int = 200) -> tuple[float, Response]:
+    body = {"promedio": 37.1} if status == 200 else {}
+    return delay, JSONResponse(body, status_code=status)
+
+
+@pytest.fixture
+async def sources(monkeypatch):
+    """Points both rate sources at local servers; set `.bcv`/`.dolarapi` replies."""
+
+    class Sources:
+        bcv = Source(bcv())
+        dolarapi = Source(dolarapi())
+
+    async def bcv_page(request):
+        return await Sources.bcv(request)
+
+    async def dolarapi_rate(request):
+        return await Sources.dolarapi(request)
+
+    app = Starlette(routes=[Route("/bcv", bcv_page), Route("/dolarapi", dolarapi_rate)])
+    monkeypatch.setattr(updater, "RETRY_BACKOFF_SECONDS", 0.01)
+    async with serve(app) as base_url:
+        monkeypatch.setattr(updater, "BCV_URL", f"{base_url}/bcv")
+        monkeypatch.setattr(updater, "DOLARAPI_URL", f"{base_url}/dolarapi")
+        yield Sources
+        # Pooled clients are bound to this test's event loop
+        await updater.close_http_clients()
+
+
+async def test_primary_answers_before_hedge_delay(sources):
+    assert await updater._fetch_rate_hedged(hedge_delay=0.5) == (BCV_RATES, "BCV")
+    assert sources.dolarapi.hits == []
+
+
+async def test_hedge_starts_after_delay_and_primary_still_wins(sources):
+    sources.bcv = Source(bcv(delay=0.6))
+    started = time.monotonic()
+
+    assert await updater._fetch_rate_hedged(hedge_delay=0.2) == (BCV_RATES, "BCV")
+    # The hedge was sent after the delay, and its faster answer was not used
+    assert len(sources.dolarapi.hits) == 1
+    assert 0.2 <= sources.dolarapi.hits[0] - started < 0.5
+
+
+async def test_fails_over_without_waiting_for_hedge_delay(sources):
+    sources.bcv = Source(bcv(status=404))
+    started = time.monotonic()
+
+    assert await updater._fetch_rate_hedged(hedge_delay=5) == (
+        DOLARAPI_RATES,
+        "DolarAPI",
+    )
+    assert time.monotonic() - started < 1
+
+
+async def test_returns_none_when_every_source_fails(sources):
+    sources.bcv = Source(bcv(status=404))
+    sources.dolarapi = Source(dolarapi(status=404))
+
+    assert await updater._fetch_rate_hedged(hedge_delay=5) is None
+
+
+async def test_deadline_falls_back_to_lower_priority_result(sources):
+    sources.bcv = Source(bcv(delay=5))
+    started = time.monotonic()
+
+    result = await updater._fetch_rate_hedged(hedge_delay=0.1, deadline=0.5)
+
+    assert result == (DOLARAPI_RATES, "DolarAPI")
+    assert 0.5 <= time.monotonic() - started < 1.5
+
+
+async def test_deadline_without_any_result(sources):
+    sources.bcv = Source(bcv(delay=5))
+    sources.dolarapi = Source(dolarapi(delay=5))
+    started = time.monotonic()
+
+    assert await updater._fetch_rate_hedged(hedge_delay=0.1, deadline=0.5) is None
+    assert time.monotonic() - started < 1.5
+
+
+async def test_retries_5xx_then_succeeds(sources):
+    sources.bcv = Source(bcv(status=503), bcv(status=502), bcv())
+
+    assert await updater._fetch_rate_hedged(hedge_delay=5) == (BCV_RATES, "BCV")
+    assert len(sources.bcv.hits) == 1 + updater.MAX_RETRIES
+    assert sources.dolarapi.hits == []
+
+
+async def test_gives_up_after_max_retries(sources):
+    sources.bcv = Source(bcv(status=503))
+
+    assert await updater._fetch_rate_hedged(hedge_delay=5) == (
+        DOLARAPI_RATES,
+        "DolarAPI",
+    )
+    assert len(sources.bcv.hits) == 1 + updater.MAX_RETRIES
+
+
+async def test_does_not_retry_4xx(sources):
+    sources.bcv = Source(bcv(status=404))
+
+    await updater._fetch_rate_hedged(hedge_delay=5)
+    assert len(sources.bcv.hits) == 1
+
+
+def test_parses_every_bcv_block():
+    page = """
+    <div id="euro" class="col-sm-12"><div class="row recuadrotsmc">
+      <span> EUR </span><strong> 41,25000000 </strong></div></div>
+    <div id="yuan" class="col-sm-12"><strong> 5,06000000 </strong></div>
+    <div id="dolar" class="col-sm-12"><strong> 36,50000000 </strong></div>
+    """
+
+    assert updater._parse_bcv_rates(page) == {
+        "EUR": Decimal("41.2500"),
+        "CNY": Decimal("5.0600"),
+        "USD": Decimal("36.5000"),
+    }
+
+
+def test_bcv_block_without_value_is_skipped():
+    # The yuan block lost its value: it must not take the dollar's
+    page = """
+    <div id="yuan" class="col-sm-12"><span> CNY </span></div>
+    <div id="dolar" class="col-sm-12"><strong> 36,50000000 </strong></div>
+    """
+
+    assert updater._parse_bcv_rates(page) == {"USD": Decimal("36.5000")}
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from src.api.v1.endpoints import prices
+from src.core.idempotency import MAX_KEY_LENGTH
+from src.models.idempotency_key import IdempotencyKey
+from src.models.price import PriceLog
+from src.models.product import Product
+from src.models.store import Store
+
+BARCODE = "7591234567894"
+
+
+@pytest.fixture
+async def store(db):
+    store = Store(name="Bodega")
+    db.add_all([store, Product(barcode=BARCODE, name="Harina")])
+    await db.commit()
+    return store
+
+
+@pytest.fixture
+def report(client, auth_headers, store):
+    async def report(key: str, price: float = 2.5):
+        return await client.post(
+            "/api/v1/prices/",
+            json={
+                "product_barcode": BARCODE,
+                "store_id": str(store.store_id),
+                "price": price,
+            },
+            headers={**auth_headers, "Idempotency-Key": key},
+        )
+
+    return report
+
+
+async def logged_prices(db) -> int:
+    return await db.scalar(select(func.count()).select_from(PriceLog))
+
+
+async def test_retry_replays_stored_response(db, report):
+    first = await report("key-1")
+    retry = await report("key-1")
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert await logged_prices(db) == 1
+
+
+async def test_other_keys_run_again(db, report):
+    await report("key-1")
+    second = await report("key-2")
+
+    assert second.status_code == 200
+    assert "Idempotent-Replayed" not in second.headers
+    assert await logged_prices(db) == 2
+
+
+async def test_key_reused_for_different_body(db, report):
+    await report("key-1", price=2.5)
+    response = await report("key-1", price=3.0)
+
+    assert response.status_code == 422
+    assert await logged_prices(db) == 1
+
+
+async def test_retry_while_first_attempt_runs(db, report, monkeypatch):
+    publish = prices.publish_price_logged
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_publish(db, log):
+        started.set()
+        await release.wait()
+        await publish(db, log)
+
+    monkeypatch.setattr(prices, "publish_price_logged", slow_publish)
+    first = asyncio.create_task(report("key-1"))
+    await asyncio.wait_for(started.wait(), 5)
+
+    retry = await report("key-1")
+    release.set()
+
+    assert retry.status_code == 409
+    assert (await first).status_code == 200
+    assert await logged_prices(db) == 1
+
+
+async def test_failed_attempt_releases_key(db, report, monkeypatch):
+    async def failing_publish(db, log):
+        raise RuntimeError("broker down")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(prices, "publish_price_logged", failing_publish)
+        with pytest.raises(RuntimeError):
+            await report("key-1")
+    assert await db.scalar(select(func.count()).select_from(IdempotencyKey)) == 0
+
+    retry = await report("key-1")
+
+    assert retry.status_code == 200
+    assert "Idempotent-Replayed" not in retry.headers
+    assert await logged_prices(db) == 1
+
+
+async def test_rejects_overlong_key(db, report):
+    response = await report("k" * (MAX_KEY_LENGTH + 1))
+
+    assert response.status_code == 400
+    assert await logged_prices(db) == 0
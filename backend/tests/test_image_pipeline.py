@@ -0,0 +1,82 @@
+import io
+
+import pytest
+from PIL import Image
+
+from src.services.image_pipeline import (
+    VARIANT_SIZES,
+    InvalidImage,
+    load_pillow,
+    perceptual_hash,
+    process_image,
+    transcode_image,
+)
+
+
+def make_jpeg(width: int = 1600, height: int = 1200) -> bytes:
+    buffer = io.BytesIO()
+    Image.effect_noise((width, height), 64).convert("RGB").save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def test_transcodes_every_variant():
+    transcoded = transcode_image(make_jpeg())
+
+    names = {variant.name for variant in transcoded.variants}
+    assert names == {
+        f"{size}.{extension}" for size in VARIANT_SIZES for extension in ("jpg", "webp")
+    }
+    for variant in transcoded.variants:
+        assert variant.width == VARIANT_SIZES[variant.size]
+    assert len(transcoded.perceptual_hash) == 16
+
+
+async def test_reads_the_upload_from_a_path(tmp_path):
+    data = make_jpeg()
+    path = tmp_path / "upload"
+    path.write_bytes(data)
+
+    from_path = await process_image(str(path))
+
+    assert from_path == transcode_image(data)
+
+
+def test_hash_compares_neighbouring_pixels():
+    # Brighter on the left everywhere: every bit is set, at any size or mode
+    gradient = Image.linear_gradient("L").rotate(-90)
+
+    assert perceptual_hash(gradient) == "f" * 16
+    assert perceptual_hash(gradient.resize((1000, 700)).convert("RGB")) == "f" * 16
+    assert perceptual_hash(gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)) == (
+        "0" * 16
+    )
+
+
+def test_applies_exif_rotation_and_drops_metadata():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotated 90° clockwise
+    buffer = io.BytesIO()
+    Image.effect_noise((400, 200), 64).convert("RGB").save(buffer, "JPEG", exif=exif)
+
+    transcoded = transcode_image(buffer.getvalue())
+
+    for variant in transcoded.variants:
+        with Image.open(io.BytesIO(variant.data)) as image:
+            assert image.height > image.width
+            assert not image.getexif()
+    largest = max(transcoded.variants, key=lambda variant: variant.width)
+    # Never upscaled past the (rotated) source width
+    assert largest.width == 200
+
+
+def test_rejects_decompression_bombs(monkeypatch):
+    load_pillow()  # sets the pipeline's own limit on first use
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+
+    with pytest.raises(InvalidImage):
+        transcode_image(make_jpeg())
+
+
+def test_rejects_non_images():
+    with pytest.raises(InvalidImage):
+        transcode_image(b"not an image")
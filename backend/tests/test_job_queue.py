@@ -0,0 +1,154 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+
+from src.core.database import AsyncSessionLocal
+from src.core.job_queue import enqueue, job_handler, process_batch
+from src.models.job import Job
+from src.models.password_reset import PasswordReset
+
+calls: list[list[dict]] = []
+# Jobs with "wait" in their payload block the handler until `release` is set
+running: asyncio.Event
+release: asyncio.Event
+
+
+@job_handler("test_batch", batch_size=3)
+async def run_test_batch(payloads: list[dict]) -> list[BaseException | None]:
+    calls.append(payloads)
+    if any("wait" in payload for payload in payloads):
+        running.set()
+        await release.wait()
+    return [
+        RuntimeError("boom") if payload.get("fail") else None for payload in payloads
+    ]
+
+
+@pytest.fixture(autouse=True)
+def reset_handler():
+    global running, release
+    calls.clear()
+    running, release = asyncio.Event(), asyncio.Event()
+
+
+async def add_jobs(db, *payloads: dict, max_attempts: int = 3) -> None:
+    for payload in payloads:
+        await enqueue(db, "test_batch", payload, max_attempts=max_attempts)
+    await db.commit()
+
+
+async def jobs(db) -> list[Job]:
+    db.expire_all()
+    return (await db.scalars(select(Job).order_by(Job.job_id))).all()
+
+
+async def run_batch() -> int:
+    async with AsyncSessionLocal() as worker_db:
+        return await process_batch(worker_db)
+
+
+async def test_batch_succeeds_and_is_deleted(db):
+    await add_jobs(db, {"n": 1}, {"n": 2}, {"n": 3}, {"n": 4})
+
+    assert await run_batch() == 3
+    assert calls == [[{"n": 1}, {"n": 2}, {"n": 3}]]
+    assert [job.payload for job in await jobs(db)] == [{"n": 4}]
+
+
+async def test_handler_runs_outside_the_claim_transaction(db):
+    await add_jobs(db, {"wait": True})
+    batch = asyncio.create_task(run_batch())
+    await running.wait()
+
+    # Committed as leased, and no row lock is held while the handler runs
+    (job,) = await jobs(db)
+    assert job.status == "running"
+    assert job.attempts == 1
+    assert job.locked_until is not None
+    locked = await db.scalar(
+        select(Job.job_id).where(Job.job_id == job.job_id).with_for_update(nowait=True)
+    )
+    assert locked == job.job_id
+    await db.rollback()
+    # Nothing else to claim meanwhile
+    assert await run_batch() == 0
+
+    release.set()
+    assert await batch == 1
+    assert await jobs(db) == []
+
+
+async def test_failure_is_retried_later(db):
+    await add_jobs(db, {"fail": True}, {"n": 2})
+
+    assert await run_batch() == 2
+    (job,) = await jobs(db)
+    assert job.status == "queued"
+    assert job.attempts == 1
+    assert job.locked_until is None
+    assert job.last_error == "RuntimeError: boom"
+    assert job.run_at > await db.scalar(select(func.localtimestamp()))
+    assert await run_batch() == 0  # Not due yet
+
+
+async def test_failed_for_good_after_max_attempts(db):
+    await add_jobs(db, {"fail": True}, max_attempts=1)
+
+    assert await run_batch() == 1
+    (job,) = await jobs(db)
+    assert job.status == "failed"
+    assert job.attempts == 1
+
+
+async def test_expired_lease_is_claimed_again(db):
+    await add_jobs(db, {"wait": True})
+    stale = asyncio.create_task(run_batch())
+    await running.wait()
+
+    # The first worker hangs past its lease; the next claim fails the job
+    await db.execute(
+        update(Job).values(
+            locked_until=func.now() - timedelta(seconds=1), payload={"fail": True}
+        )
+    )
+    await db.commit()
+    assert await run_batch() == 1
+    (job,) = await jobs(db)
+    assert (job.status, job.attempts) == ("queued", 2)
+
+    # The first worker's late success doesn't own the job anymore
+    release.set()
+    assert await stale == 1
+    (job,) = await jobs(db)
+    assert (job.status, job.attempts) == ("queued", 2)
+
+
+async def test_lost_on_last_attempt_fails_without_running(db):
+    await add_jobs(db, {"n": 1}, max_attempts=1)
+    await db.execute(
+        update(Job).values(
+            status="running",
+            attempts=1,
+            locked_until=func.now() - timedelta(seconds=1),
+        )
+    )
+    await db.commit()
+
+    assert await run_batch() == 1
+    assert calls == []
+    (job,) = await jobs(db)
+    assert job.status == "failed"
+    assert "Lease expired" in job.last_error
+
+
+async def test_reset_code_job_references_the_reset(db, client, user):
+    response = await client.post(
+        "/api/v1/auth/forgot-password", json={"email": user.email}
+    )
+
+    assert response.status_code == 200
+    (job,) = await jobs(db)
+    reset = await db.scalar(select(PasswordReset))
+    assert job.payload == {"reset_id": str(reset.reset_id)}
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import asyncpg
+import pytest
+from sqlalchemy import select
+
+from src.core.config import settings
+from src.core.invalidation import INVALIDATION_CHANNEL
+from src.models.change_log import ChangeLogEntry
+from src.models.product import Product
+from src.models.shopping_list import ListItem, ShoppingList
+from src.models.store import Store
+from src.services.live_updates import PRICES_CHANNEL
+from src.services.rate_cache import RATES_CHANNEL
+
+BARCODES = ["7591234567894", "7590000000017"]
+
+
+@pytest.fixture
+async def notifications(db):
+    """NOTIFYs delivered on the app's channels, as (channel, decoded payload)."""
+    received = []
+    conn = await asyncpg.connect(settings.POSTGRES_DSN)
+
+    def collect(connection, pid, channel, payload):
+        received.append((channel, json.loads(payload)))
+
+    for channel in (PRICES_CHANNEL, RATES_CHANNEL, INVALIDATION_CHANNEL):
+        await conn.add_listener(channel, collect)
+    yield received
+    await conn.close()
+
+
+async def delivered(notifications, count: int) -> list:
+    for _ in range(50):
+        if len(notifications) >= count:
+            break
+        await asyncio.sleep(0.02)
+    return sorted(notifications, key=lambda item: (item[0], json.dumps(item[1])))
+
+
+@pytest.fixture
+async def store(db):
+    store = Store(name="Bodega")
+    db.add(store)
+    db.add_all(Product(barcode=barcode, name=barcode) for barcode in BARCODES)
+    await db.commit()
+    return store
+
+
+async def test_complete_list_publishes_everything(
+    db, client, user, auth_headers, store, notifications
+):
+    shopping_list = ShoppingList(user_id=user.user_id, name="Groceries")
+    shopping_list.items = [
+        ListItem(product_barcode=barcode, planned_price=n + 1)
+        for n, barcode in enumerate(BARCODES)
+    ]
+    db.add(shopping_list)
+    await db.commit()
+
+    response = await client.post(
+        f"/api/v1/lists/{shopping_list.list_id}/complete",
+        params={"store_id": str(store.store_id)},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+
+    received = await delivered(notifications, 4)
+    prices = [payload for channel, payload in received if channel == PRICES_CHANNEL]
+    invalidations = [
+        payload for channel, payload in received if channel == INVALIDATION_CHANNEL
+    ]
+    assert sorted(price["product_barcode"] for price in prices) == sorted(BARCODES)
+    assert sorted((event["kind"], event["key"]) for event in invalidations) == sorted(
+        ("prices", barcode) for barcode in BARCODES
+    )
+    changes = await db.execute(select(ChangeLogEntry.kind, ChangeLogEntry.entity_key))
+    assert sorted(changes.all()) == sorted(
+        [("list", str(shopping_list.list_id))]
+        + [("price", barcode) for barcode in BARCODES]
+    )
+
+
+async def test_new_rate_publishes_everything(db, client, notifications):
+    response = await client.post(
+        "/api/v1/exchange-rates/",
+        json={"currency_code": "usd", "rate_to_ves": "36.5", "source": "BCV"},
+    )
+    assert response.status_code == 201, response.text
+
+    received = await delivered(notifications, 2)
+    assert [channel for channel, _ in received] == [
+        INVALIDATION_CHANNEL,
+        RATES_CHANNEL,
+    ]
+    assert received[0][1]["key"] == "USD"
+    changes = await db.execute(select(ChangeLogEntry.kind, ChangeLogEntry.entity_key))
+    assert changes.all() == [("rate", "USD")]
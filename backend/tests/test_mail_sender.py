@@ -0,0 +1,189 @@
+import asyncio
+import socket
+from datetime import datetime, timedelta
+
+import aiosmtplib
+import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import SMTP
+
+from src.core.config import settings
+from src.core.email_utils import reset_code_message
+from src.core.mail_sender import SMTPSender
+from src.models.password_reset import PasswordReset
+from src.services import job_handlers
+
+
+class Mailbox:
+    """aiosmtpd handler: records each delivery and the connection it came over."""
+
+    def __init__(self) -> None:
+        self.connections: list[SMTP] = []
+        self.delivered: list[tuple[int, str]] = []  # (connection index, recipient)
+        self.refused: set[str] = set()
+        self.drop_next_mail = False
+
+    async def handle_RCPT(self, server, session, envelope, address, options):
+        if address in self.refused:
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        for address in envelope.rcpt_tos:
+            self.delivered.append((self.connections.index(server), address))
+        return "250 OK"
+
+    @property
+    def recipients(self) -> list[str]:
+        return [address for _, address in self.delivered]
+
+
+class StandInSMTP(SMTP):
+    def connection_made(self, transport) -> None:
+        super().connection_made(transport)
+        self.event_handler.connections.append(self)
+
+    async def smtp_MAIL(self, arg: str) -> None:
+        if self.event_handler.drop_next_mail:
+            # Like a server timing out a pooled connection mid-conversation
+            self.event_handler.drop_next_mail = False
+            self.transport.close()
+            return
+        await super().smtp_MAIL(arg)
+
+
+class StandInController(Controller):
+    def factory(self) -> SMTP:
+        return StandInSMTP(self.handler, **self.SMTP_kwargs)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def mailbox(monkeypatch):
+    mailbox = Mailbox()
+    controller = StandInController(mailbox, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    # Forget the controller's own readiness probe
+    mailbox.connections.clear()
+    monkeypatch.setattr(settings, "MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setattr(settings, "MAIL_PORT", controller.port)
+    monkeypatch.setattr(settings, "MAIL_STARTTLS", False)
+    monkeypatch.setattr(settings, "MAIL_SSL_TLS", False)
+    monkeypatch.setattr(settings, "MAIL_USE_CREDENTIALS", False)
+    mailbox.controller = controller
+    yield mailbox
+    controller.stop()
+
+
+@pytest.fixture
+async def sender():
+    sender = SMTPSender(pool_size=2, idle_timeout=60)
+    yield sender
+    await sender.close()
+
+
+def messages(*recipients: str):
+    return [reset_code_message(recipient, "123456") for recipient in recipients]
+
+
+def drop_connections(mailbox: Mailbox) -> None:
+    for server in mailbox.connections:
+        mailbox.controller.loop.call_soon_threadsafe(server.transport.close)
+
+
+async def test_batch_reuses_pooled_connections(mailbox, sender):
+    recipients = [f"user{n}@example.com" for n in range(10)]
+
+    assert await sender.send_many(messages(*recipients)) == [None] * 10
+    assert await sender.send_many(messages("late@example.com")) == [None]
+
+    assert sorted(mailbox.recipients) == sorted([*recipients, "late@example.com"])
+    # One connection per pool slot, kept open between batches
+    assert len(mailbox.connections) == 2
+
+
+async def test_batch_results_follow_message_order(mailbox, sender):
+    mailbox.refused = {"b@example.com", "e@example.com"}
+
+    results = await sender.send_many(
+        messages(*(f"{name}@example.com" for name in "abcde"))
+    )
+
+    assert [result is not None for result in results] == [
+        False,
+        True,
+        False,
+        False,
+        True,
+    ]
+    assert isinstance(results[1], aiosmtplib.SMTPRecipientsRefused)
+    assert sorted(mailbox.recipients) == [
+        "a@example.com",
+        "c@example.com",
+        "d@example.com",
+    ]
+    # A refused recipient doesn't cost the connection
+    assert len(mailbox.connections) == 2
+
+
+async def test_reconnects_after_idle_connections_drop(mailbox, sender):
+    await sender.send_many(messages("a@example.com", "b@example.com"))
+    drop_connections(mailbox)
+    await asyncio.sleep(0.1)  # Let the client notice
+
+    assert await sender.send_many(messages("c@example.com")) == [None]
+    assert mailbox.recipients[-1] == "c@example.com"
+    assert len(mailbox.connections) == 3
+
+
+async def test_reconnects_when_dropped_mid_send(mailbox, sender):
+    await sender.send(messages("a@example.com")[0])
+    mailbox.drop_next_mail = True
+
+    await sender.send(messages("b@example.com")[0])
+
+    assert mailbox.recipients == ["a@example.com", "b@example.com"]
+    assert len(mailbox.connections) == 2
+
+
+async def test_replaces_connections_idle_too_long(mailbox):
+    sender = SMTPSender(pool_size=1, idle_timeout=0)
+    try:
+        await sender.send(messages("a@example.com")[0])
+        await sender.send(messages("b@example.com")[0])
+    finally:
+        await sender.close()
+
+    assert [connection for connection, _ in mailbox.delivered] == [0, 1]
+
+
+async def test_unreachable_server_fails_whole_batch(mailbox, sender, monkeypatch):
+    monkeypatch.setattr(settings, "MAIL_PORT", free_port())
+
+    results = await sender.send_many(messages("a@example.com", "b@example.com"))
+
+    assert all(isinstance(error, aiosmtplib.SMTPConnectError) for error in results)
+
+
+async def test_sends_only_valid_reset_codes(db, user, mailbox, sender, monkeypatch):
+    monkeypatch.setattr(job_handlers, "mail_sender", sender)
+    expires = datetime.utcnow() + timedelta(minutes=15)
+    valid = PasswordReset(user_id=user.user_id, code="111111", expires_at=expires)
+    used = PasswordReset(
+        user_id=user.user_id, code="222222", expires_at=expires, is_used=True
+    )
+    db.add_all([valid, used])
+    await db.commit()
+
+    results = await job_handlers.send_reset_codes(
+        [{"reset_id": str(valid.reset_id)}, {"reset_id": str(used.reset_id)}]
+    )
+
+    assert results == [None, None]
+    assert mailbox.recipients == [user.email]
@@ -0,0 +1,112 @@
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from src.core.existence_cache import ExistenceCache, known_products, known_stores
+from src.core.query_budget import capture_queries, enforce_query_budgets
+from src.models.price import PriceLog
+from src.models.product import Product
+from src.models.store import Store
+
+BARCODE = "7591234567894"
+
+
+@pytest.fixture
+async def store(db):
+    store = Store(name="Bodega")
+    db.add_all([store, Product(barcode=BARCODE, name="Harina")])
+    await db.commit()
+    return store
+
+
+def price_report(barcode: str, store_id: uuid.UUID) -> dict:
+    return {"product_barcode": barcode, "store_id": str(store_id), "price": 2.5}
+
+
+async def logged_prices(db) -> int:
+    return await db.scalar(select(func.count()).select_from(PriceLog))
+
+
+async def test_report_price_within_budget(db, client, auth_headers, store):
+    with enforce_query_budgets(), capture_queries() as queries:
+        response = await client.post(
+            "/api/v1/prices/",
+            json=price_report(BARCODE, store.store_id),
+            headers=auth_headers,
+        )
+
+    assert response.status_code == 200
+    assert response.json()["product_barcode"] == BARCODE
+    assert queries.statements == 3
+    assert await logged_prices(db) == 1
+
+
+async def test_report_price_inserts_without_existence_checks(
+    db, client, auth_headers, store
+):
+    with capture_queries() as queries:
+        await client.post(
+            "/api/v1/prices/",
+            json=price_report(BARCODE, store.store_id),
+            headers=auth_headers,
+        )
+
+    assert any(shape.startswith("INSERT INTO price_logs") for shape in queries.shapes)
+    # The foreign keys do the checking
+    assert not [
+        shape
+        for shape in queries.shapes
+        if "FROM products" in shape or "FROM stores" in shape
+    ]
+
+
+async def test_report_price_unknown_product(db, client, auth_headers, store):
+    # A stale cache entry must not hide the violation, and is dropped after it
+    known_products.add("0000000000000")
+
+    response = await client.post(
+        "/api/v1/prices/",
+        json=price_report("0000000000000", store.store_id),
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Product not found. Scan it first!"
+    assert "0000000000000" not in known_products
+    assert await logged_prices(db) == 0
+
+
+async def test_report_price_unknown_store(db, client, auth_headers, store):
+    missing = uuid.uuid4()
+    known_stores.add(missing)
+
+    response = await client.post(
+        "/api/v1/prices/",
+        json=price_report(BARCODE, missing),
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Store not found."
+    assert missing not in known_stores
+    assert await logged_prices(db) == 0
+
+
+def test_existence_cache_is_bounded():
+    cache = ExistenceCache(max_entries=2, ttl=60)
+    cache.add("a")
+    cache.add("b")
+    assert "a" in cache  # Now the most recently used
+    cache.add("c")
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_existence_cache_expires_entries():
+    cache = ExistenceCache(max_entries=2, ttl=0)
+    cache.add("a")
+
+    assert "a" not in cache
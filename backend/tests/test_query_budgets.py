@@ -0,0 +1,166 @@
+import pytest
+from sqlalchemy import select
+
+from src.api.v1.endpoints import lists, prices, products, sync
+from src.core.query_budget import (
+    QueryBudgetExceeded,
+    assert_max_queries,
+    assert_no_n_plus_one,
+    capture_queries,
+    enforce_query_budgets,
+    get_query_budget,
+    statement_shape,
+)
+from src.models.product import Product
+from src.models.shopping_list import ListItem, ShoppingList
+from src.models.store import Store
+
+# Raising a budget should be a reviewed decision, not a silent edit
+BUDGETS = {
+    lists.get_my_lists: 3,
+    lists.get_list: 3,
+    lists.complete_list: 5,
+    prices.report_price: 3,
+    products.get_product: 4,
+    sync.sync: 6,
+}
+
+
+@pytest.fixture
+async def store(db):
+    store = Store(name="Bodega")
+    db.add(store)
+    await db.commit()
+    return store
+
+
+async def make_list(db, user, items: int, first: int = 0) -> ShoppingList:
+    barcodes = [f"75900000{n:05d}" for n in range(first, first + items)]
+    db.add_all(Product(barcode=barcode, name=barcode) for barcode in barcodes)
+    shopping_list = ShoppingList(user_id=user.user_id, name="Groceries")
+    shopping_list.items = [
+        ListItem(product_barcode=barcode, planned_price=n + 1)
+        for n, barcode in enumerate(barcodes)
+    ]
+    db.add(shopping_list)
+    await db.commit()
+    return shopping_list
+
+
+@pytest.mark.parametrize("endpoint, budget", BUDGETS.items())
+def test_declared_budgets(endpoint, budget):
+    assert get_query_budget(endpoint) == budget
+
+
+async def test_list_endpoints_within_budget(db, client, user, auth_headers):
+    shopping_list = await make_list(db, user, items=5)
+
+    with enforce_query_budgets():
+        mine = await client.get("/api/v1/lists/", headers=auth_headers)
+        one = await client.get(
+            f"/api/v1/lists/{shopping_list.list_id}", headers=auth_headers
+        )
+
+    assert mine.status_code == one.status_code == 200
+    assert len(one.json()["items"]) == 5
+
+
+@pytest.mark.parametrize("items", [1, 10])
+async def test_complete_list_within_budget(
+    db, client, user, auth_headers, store, items
+):
+    shopping_list = await make_list(db, user, items)
+
+    with enforce_query_budgets(), assert_no_n_plus_one():
+        response = await client.post(
+            f"/api/v1/lists/{shopping_list.list_id}/complete",
+            params={"store_id": str(store.store_id)},
+            headers=auth_headers,
+        )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "COMPLETED"
+
+
+async def test_complete_list_statements_dont_grow_with_items(
+    db, client, user, auth_headers, store
+):
+    small = await make_list(db, user, items=1)
+    large = await make_list(db, user, items=20, first=1)
+
+    counts = []
+    for shopping_list in (small, large):
+        with capture_queries() as stats:
+            response = await client.post(
+                f"/api/v1/lists/{shopping_list.list_id}/complete",
+                params={"store_id": str(store.store_id)},
+                headers=auth_headers,
+            )
+        assert response.status_code == 200, response.text
+        counts.append(stats.statements)
+    assert counts[0] == counts[1]
+
+
+async def test_product_within_budget(db, client, auth_headers):
+    db.add(Product(barcode="7591234567894", name="Harina"))
+    await db.commit()
+
+    with enforce_query_budgets():
+        response = await client.get(
+            "/api/v1/products/7591234567894", headers=auth_headers
+        )
+
+    assert response.status_code == 200, response.text
+
+
+async def test_sync_within_budget(db, client, user, auth_headers):
+    await make_list(db, user, items=5)
+
+    with enforce_query_budgets():
+        full = await client.get("/api/v1/sync", headers=auth_headers)
+        incremental = await client.get(
+            "/api/v1/sync", params={"since": 0}, headers=auth_headers
+        )
+
+    assert full.status_code == incremental.status_code == 200
+    assert len(full.json()["lists"]) == 1
+
+
+async def test_over_budget_request_fails(db, client, user, auth_headers, monkeypatch):
+    monkeypatch.setattr(lists.get_my_lists, "query_budget", 1)
+
+    with pytest.raises(QueryBudgetExceeded, match="budget is 1"):
+        with enforce_query_budgets():
+            await client.get("/api/v1/lists/", headers=auth_headers)
+
+
+async def test_detects_n_plus_one(db, user):
+    shopping_list = await make_list(db, user, items=3)
+
+    with pytest.raises(QueryBudgetExceeded, match="repeated 3\\+ times"):
+        with assert_no_n_plus_one():
+            for item in shopping_list.items:
+                await db.get(Product, item.product_barcode, populate_existing=True)
+
+
+async def test_assert_max_queries(db):
+    with assert_max_queries(2) as stats:
+        await db.execute(select(1))
+        await db.execute(select(2))
+    assert stats.statements == 2
+
+    with pytest.raises(QueryBudgetExceeded, match="3 statements executed, limit is 2"):
+        with assert_max_queries(2):
+            for n in range(3):
+                await db.execute(select(n))
+
+
+def test_statement_shape_collapses_literals_and_lists():
+    assert statement_shape(
+        "SELECT * FROM t WHERE a = $1::UUID AND b IN ($2, $3, $4) AND c = 'x'"
+    ) == statement_shape(
+        "SELECT * FROM t  WHERE a = $9::UUID AND b IN ($5) AND c = 'y'"
+    )
+    assert statement_shape("INSERT INTO t VALUES ($1), ($2)") == (
+        "INSERT INTO t VALUES (?)"
+    )
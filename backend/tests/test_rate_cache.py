@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from src.models.exchange_rate import ExchangeRate
+from src.services.rate_cache import LatestRateCache
+
+
+class InvalidatedWhileLoading:
+    """Session whose query is overtaken by an invalidation, like a NOTIFY
+    arriving between the SELECT and the cache write."""
+
+    def __init__(self, db, cache: LatestRateCache) -> None:
+        self.db = db
+        self.cache = cache
+
+    async def execute(self, stmt):
+        result = await self.db.execute(stmt)
+        self.cache.invalidate("USD")
+        return result
+
+
+async def add_rate(db, value: str) -> ExchangeRate:
+    rate = ExchangeRate(currency_code="USD", rate_to_ves=Decimal(value), source="BCV")
+    db.add(rate)
+    await db.commit()
+    return rate
+
+
+async def test_serves_cached_rate_until_invalidated(db):
+    cache = LatestRateCache()
+    await add_rate(db, "36.5")
+    assert (await cache.get(db, "usd")).rate_to_ves == Decimal("36.5")
+
+    await add_rate(db, "37.0")
+    assert (await cache.get(db, "USD")).rate_to_ves == Decimal("36.5")
+
+    cache.invalidate("USD")
+    assert (await cache.get(db, "USD")).rate_to_ves == Decimal("37.0")
+
+
+async def test_load_overtaken_by_invalidation_is_not_stored(db):
+    cache = LatestRateCache()
+    await add_rate(db, "36.5")
+
+    loaded = await cache.get(InvalidatedWhileLoading(db, cache), "USD")
+    await add_rate(db, "37.0")
+
+    assert loaded.rate_to_ves == Decimal("36.5")
+    assert (await cache.get(db, "USD")).rate_to_ves == Decimal("37.0")
+
+
+async def test_latest_rate_endpoint(db, client):
+    await add_rate(db, "36.5")
+
+    response = await client.get("/api/v1/exchange-rates/latest")
+
+    assert response.status_code == 200
+    assert Decimal(response.json()["rate_to_ves"]) == Decimal("36.5")
+    assert response.headers["Cache-Control"] == "public, max-age=300"
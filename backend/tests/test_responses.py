@@ -0,0 +1,20 @@
+import uuid
+from decimal import Decimal
+
+import orjson
+from asyncpg.pgproto.pgproto import UUID as AsyncpgUUID
+
+from src.core.responses import FastJSONResponse
+
+
+def test_serializes_orm_values():
+    value = uuid.uuid4()
+    response = FastJSONResponse(
+        {"id": AsyncpgUUID(str(value)), "other": value, "price": Decimal("1.50")}
+    )
+
+    assert orjson.loads(response.body) == {
+        "id": str(value),
+        "other": str(value),
+        "price": 1.5,
+    }
@@ -0,0 +1,33 @@
+import pytest
+
+from src.services.store_clusters import CELL_BITS, cell_for
+
+CLUSTERS_URL = "/api/v1/stores/clusters"
+
+
+@pytest.mark.parametrize(
+    "bbox",
+    [
+        "nan,10,-60,11",
+        "-67,inf,-60,11",
+        "-67,10,-60,-inf",
+        "-181,10,-60,11",
+        "-67,10,181,11",
+        "-67,-91,-60,11",
+        "-67,10,-60,90.5",
+        "-60,10,-67,11",  # min_lon > max_lon
+        "-67,10,-60",
+        "a,b,c,d",
+    ],
+)
+async def test_invalid_bbox_is_rejected(client, bbox):
+    response = await client.get(CLUSTERS_URL, params={"bbox": bbox, "zoom": 10})
+    assert response.status_code == 422
+    assert response.json()["detail"].startswith("Invalid bbox")
+
+
+def test_cell_for_covers_the_whole_valid_range():
+    n = 2 ** (10 + CELL_BITS)
+    for lat, lon in [(-90, -180), (90, 180), (0, 0), (10.5, -66.9)]:
+        x, y = cell_for(lat, lon, 10)
+        assert 0 <= x < n and 0 <= y < n
@@ -0,0 +1,247 @@
+import pytest
+from sqlalchemy import select
+
+from src.core.change_log import Change, ChangeKind, changes_since, record_changes
+from src.core.query_budget import capture_queries
+from src.models.product import Product
+from src.models.shopping_list import ListItem, ShoppingList
+from src.models.store import Store
+
+FOLLOWED = "7591234567894"
+OTHER = "7590000000017"
+
+
+@pytest.fixture
+async def store(db):
+    store = Store(name="Bodega")
+    db.add_all(
+        [
+            store,
+            Product(barcode=FOLLOWED, name="Harina"),
+            Product(barcode=OTHER, name="Café"),
+        ]
+    )
+    await db.commit()
+    return store
+
+
+@pytest.fixture
+async def shopping_list(db, user, store):
+    shopping_list = ShoppingList(user_id=user.user_id, name="Groceries")
+    shopping_list.items = [ListItem(product_barcode=FOLLOWED)]
+    db.add(shopping_list)
+    await db.commit()
+    return shopping_list
+
+
+@pytest.fixture
+def sync(client, auth_headers):
+    async def sync(since: int | None = None) -> dict:
+        params = {} if since is None else {"since": since}
+        response = await client.get("/api/v1/sync", params=params, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return sync
+
+
+@pytest.fixture
+def report_price(client, auth_headers, store):
+    async def report_price(barcode: str, price: float) -> None:
+        response = await client.post(
+            "/api/v1/prices/",
+            json={
+                "product_barcode": barcode,
+                "store_id": str(store.store_id),
+                "price": price,
+            },
+            headers=auth_headers,
+        )
+        assert response.status_code == 200, response.text
+
+    return report_price
+
+
+async def test_full_sync(shopping_list, sync, report_price):
+    await report_price(FOLLOWED, 2.5)
+    await report_price(OTHER, 4.0)
+
+    full = await sync()
+
+    assert [entry["list_id"] for entry in full["lists"]] == [str(shopping_list.list_id)]
+    assert [(log["product_barcode"], log["price"]) for log in full["prices"]] == [
+        (FOLLOWED, 2.5)
+    ]
+
+
+async def test_delta_returns_changes_from_cursor_on(
+    client, auth_headers, shopping_list, sync, report_price
+):
+    cursor = (await sync())["cursor"]
+
+    unchanged = await sync(cursor)
+    assert unchanged["lists"] == unchanged["prices"] == []
+    assert unchanged["cursor"] >= cursor
+
+    await client.put(
+        f"/api/v1/lists/{shopping_list.list_id}",
+        json={"name": "Weekend"},
+        headers=auth_headers,
+    )
+    await report_price(FOLLOWED, 3.0)
+    delta = await sync(unchanged["cursor"])
+
+    assert [entry["name"] for entry in delta["lists"]] == ["Weekend"]
+    assert [log["price"] for log in delta["prices"]] == [3.0]
+    assert delta["cursor"] > unchanged["cursor"]
+    # Seen changes aren't sent again
+    after = await sync(delta["cursor"])
+    assert after["lists"] == after["prices"] == []
+
+
+async def test_unchanged_sync_is_one_query(shopping_list, sync):
+    cursor = (await sync())["cursor"]
+
+    with capture_queries() as queries:
+        await sync(cursor)
+
+    change_log_queries = [shape for shape in queries.shapes if "change_log" in shape]
+    assert len(change_log_queries) == 1
+    assert not [shape for shape in queries.shapes if "price_logs" in shape]
+
+
+async def test_delta_reports_deleted_lists(client, auth_headers, shopping_list, sync):
+    cursor = (await sync())["cursor"]
+
+    response = await client.delete(
+        f"/api/v1/lists/{shopping_list.list_id}", headers=auth_headers
+    )
+    assert response.status_code == 204
+    delta = await sync(cursor)
+
+    assert delta["lists"] == []
+    assert delta["deleted_list_ids"] == [str(shopping_list.list_id)]
+
+
+async def test_delta_leaves_out_unfollowed_prices(shopping_list, sync, report_price):
+    cursor = (await sync())["cursor"]
+
+    await report_price(OTHER, 4.0)
+    delta = await sync(cursor)
+
+    assert delta["prices"] == []
+
+
+async def test_added_item_comes_with_its_current_prices(
+    client, auth_headers, shopping_list, sync, report_price
+):
+    # Logged before the cursor, so the price itself never shows as changed
+    await report_price(OTHER, 4.0)
+    cursor = (await sync())["cursor"]
+
+    response = await client.post(
+        f"/api/v1/lists/{shopping_list.list_id}/items",
+        json={"product_barcode": OTHER},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    delta = await sync(cursor)
+
+    assert len(delta["lists"]) == 1
+    assert [(log["product_barcode"], log["price"]) for log in delta["prices"]] == [
+        (OTHER, 4.0)
+    ]
+
+
+async def test_edited_list_comes_without_unchanged_prices(
+    client, auth_headers, shopping_list, sync, report_price
+):
+    await report_price(FOLLOWED, 2.5)
+    cursor = (await sync())["cursor"]
+    item = shopping_list.items[0]
+
+    renamed = await client.put(
+        f"/api/v1/lists/{shopping_list.list_id}",
+        json={"name": "Weekend"},
+        headers=auth_headers,
+    )
+    edited = await client.put(
+        f"/api/v1/lists/{shopping_list.list_id}/items/{item.item_id}",
+        json={"quantity": 3},
+        headers=auth_headers,
+    )
+    # Adding a product already on the list only raises its quantity
+    readded = await client.post(
+        f"/api/v1/lists/{shopping_list.list_id}/items",
+        json={"product_barcode": FOLLOWED},
+        headers=auth_headers,
+    )
+    assert renamed.status_code == edited.status_code == readded.status_code == 200
+    delta = await sync(cursor)
+
+    assert [entry["name"] for entry in delta["lists"]] == ["Weekend"]
+    assert delta["lists"][0]["items"][0]["quantity"] == 4
+    assert delta["prices"] == []
+
+
+async def test_reopened_list_comes_with_its_current_prices(
+    client, auth_headers, shopping_list, sync, report_price
+):
+    await client.put(
+        f"/api/v1/lists/{shopping_list.list_id}",
+        json={"status": "COMPLETED"},
+        headers=auth_headers,
+    )
+    cursor = (await sync())["cursor"]
+    # Not sent while the list is completed
+    await report_price(FOLLOWED, 3.0)
+    assert (await sync(cursor))["prices"] == []
+
+    response = await client.put(
+        f"/api/v1/lists/{shopping_list.list_id}",
+        json={"status": "ACTIVE"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    delta = await sync(cursor)
+
+    assert [log["price"] for log in delta["prices"]] == [3.0]
+
+
+async def test_completed_list_stops_following_prices(
+    client, auth_headers, shopping_list, sync, report_price
+):
+    await client.put(
+        f"/api/v1/lists/{shopping_list.list_id}",
+        json={"status": "COMPLETED"},
+        headers=auth_headers,
+    )
+    cursor = (await sync())["cursor"]
+
+    await report_price(FOLLOWED, 3.0)
+    delta = await sync(cursor)
+
+    assert delta["prices"] == []
+
+
+async def test_change_log_filters_prices_by_subscription(db, user, store):
+    cursor = (await changes_since(db, user.user_id, 0))[0]
+    await record_changes(
+        db,
+        Change(ChangeKind.PRICE, FOLLOWED),
+        Change(ChangeKind.PRICE, OTHER),
+        Change(ChangeKind.RATE, "VES"),
+    )
+    await db.commit()
+
+    _, changes = await changes_since(
+        db,
+        user.user_id,
+        cursor,
+        price_keys=select(Product.barcode).where(Product.barcode == FOLLOWED),
+    )
+
+    assert {(change.kind, change.key) for change in changes} == {
+        (ChangeKind.PRICE, FOLLOWED),
+        (ChangeKind.RATE, "VES"),
+    }
@@ -0,0 +1,265 @@
+import hashlib
+import io
+import os
+
+import httpx
+import pytest
+from PIL import Image
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from src.api.v1.endpoints import upload
+from src.core.config import settings
+from src.main import app
+from src.services.storage import StorageClient, StorageError
+from tests.stand_ins import serve
+
+
+class StorageStandIn:
+    """Supabase Storage object API: keeps uploaded objects in memory."""
+
+    def __init__(self) -> None:
+        self.objects: dict[str, bytes] = {}
+        self.requests: list[Request] = []
+        self.chunks: list[int] = []  # Size of each body chunk received
+        self.fail_with: int | None = None
+
+    async def upload(self, request: Request) -> JSONResponse:
+        self.requests.append(request)
+        body = bytearray()
+        async for chunk in request.stream():
+            if chunk:
+                self.chunks.append(len(chunk))
+            body.extend(chunk)
+        if self.fail_with:
+            return JSONResponse({"error": "boom"}, status_code=self.fail_with)
+        key = f"{request.path_params['bucket']}/{request.path_params['name']}"
+        self.objects[key] = bytes(body)
+        return JSONResponse({"Key": key})
+
+
+@pytest.fixture
+async def storage():
+    stand_in = StorageStandIn()
+    stand_in_app = Starlette(
+        routes=[
+            Route(
+                "/storage/v1/object/{bucket}/{name:path}",
+                stand_in.upload,
+                methods=["POST"],
+            )
+        ]
+    )
+    async with serve(stand_in_app) as base_url:
+        client = StorageClient(base_url, "test-key")
+        stand_in.client = client
+        yield stand_in
+        await client.aclose()
+
+
+def make_jpeg() -> bytes:
+    buffer = io.BytesIO()
+    Image.effect_noise((640, 480), 64).convert("RGB").save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def multipart_request(
+    files: dict, chunk_size: int = 256, disconnect: bool = False
+) -> Request:
+    """Request whose multipart body arrives in `chunk_size` pieces, optionally
+    followed by the client going away instead of the last piece."""
+    encoded = httpx.Request("POST", "http://test/", files=files)
+    body = encoded.read()
+    messages = [
+        {"type": "http.request", "body": body[i : i + chunk_size], "more_body": True}
+        for i in range(0, len(body), chunk_size)
+    ]
+    if disconnect:
+        messages[-1] = {"type": "http.disconnect"}
+    else:
+        messages.append({"type": "http.request", "body": b"", "more_body": False})
+
+    async def receive():
+        return messages.pop(0)
+
+    headers = [(b"content-type", encoded.headers["content-type"].encode())]
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive)
+
+
+async def test_client_uploads_bytes(storage):
+    url = await storage.client.upload("a/b.jpg", b"jpeg", "image/jpeg", upsert=True)
+
+    assert url.endswith("/storage/v1/object/public/pictures/a/b.jpg")
+    assert storage.objects == {"pictures/a/b.jpg": b"jpeg"}
+    headers = storage.requests[0].headers
+    assert headers["authorization"] == "Bearer test-key"
+    assert headers["content-type"] == "image/jpeg"
+    assert headers["x-upsert"] == "true"
+
+
+async def test_client_streams_chunks(storage):
+    async def chunks():
+        for _ in range(4):
+            yield b"x" * 1024
+
+    await storage.client.upload("big.bin", chunks(), "image/jpeg", content_length=4096)
+
+    assert storage.objects["pictures/big.bin"] == b"x" * 4096
+    assert storage.requests[0].headers["content-length"] == "4096"
+
+
+@pytest.mark.parametrize("status_code", [400, 409, 500, 503])
+async def test_client_maps_storage_errors(storage, status_code):
+    storage.fail_with = status_code
+
+    with pytest.raises(StorageError, match=str(status_code)):
+        await storage.client.upload("a.jpg", b"jpeg", "image/jpeg")
+
+
+async def test_client_propagates_errors_of_the_stream(storage):
+    async def chunks():
+        yield b"x" * 1024
+        raise upload.UploadCancelled()
+
+    with pytest.raises(upload.UploadCancelled):
+        await storage.client.upload("a.jpg", chunks(), "image/jpeg")
+    assert storage.objects == {}
+
+
+async def test_spool_enforces_size_limit(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1000)
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    request = multipart_request({"file": ("a.jpg", b"x" * 5000)})
+
+    with pytest.raises(upload.UploadTooLarge):
+        await upload._spool_limited(request)
+    assert os.listdir(tmp_path) == []
+    # Stopped at the limit instead of reading the whole body first
+    assert (await request.receive())["more_body"]
+
+
+async def test_spool_stops_when_client_disconnects(monkeypatch, tmp_path):
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    request = multipart_request({"file": ("a.jpg", b"x" * 1000)}, disconnect=True)
+
+    with pytest.raises(upload.UploadCancelled):
+        await upload._spool_limited(request)
+    assert os.listdir(tmp_path) == []
+
+
+async def test_spool_keeps_only_the_image_part(monkeypatch, tmp_path):
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    request = multipart_request(
+        {"note": (None, b"y" * 300), "file": ("a.jpg", b"x" * 1000)}
+    )
+
+    path, content_hash = await upload._spool_limited(request)
+    try:
+        with open(path, "rb") as spooled:
+            assert spooled.read() == b"x" * 1000
+    finally:
+        os.unlink(path)
+    assert content_hash == hashlib.sha256(b"x" * 1000).hexdigest()
+
+
+@pytest.mark.parametrize(
+    "files", [{"other": ("a.jpg", b"x")}, {"file": (None, b"not a file")}]
+)
+async def test_spool_requires_image_field(monkeypatch, tmp_path, files):
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+
+    with pytest.raises(upload.InvalidUpload):
+        await upload._spool_limited(multipart_request(files))
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.fixture
+async def upload_client(client, storage):
+    app.state.storage = storage.client
+    yield client
+    del app.state.storage
+
+
+async def test_rejects_too_large_upload(upload_client, storage, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1000)
+
+    response = await upload_client.post(
+        "/api/v1/upload/", files={"file": ("a.jpg", b"x" * 1001, "image/jpeg")}
+    )
+
+    assert response.status_code == 413
+    assert storage.requests == []
+
+
+async def test_uploads_variants(db, upload_client, storage):
+    response = await upload_client.post(
+        "/api/v1/upload/", files={"file": ("a.jpg", make_jpeg(), "image/jpeg")}
+    )
+
+    assert response.status_code == 200, response.text
+    variants = response.json()["variants"]
+    assert response.json()["url"] == variants["lg.jpg"]
+    assert len(storage.objects) == len(variants) == 6
+
+
+async def test_repeated_upload_skips_storage(db, upload_client, storage):
+    image = make_jpeg()
+    first = await upload_client.post(
+        "/api/v1/upload/", files={"file": ("a.jpg", image, "image/jpeg")}
+    )
+    uploads = len(storage.requests)
+
+    second = await upload_client.post(
+        "/api/v1/upload/", files={"file": ("b.jpg", image, "image/jpeg")}
+    )
+
+    assert second.json() == first.json()
+    assert len(storage.requests) == uploads
+
+
+async def test_maps_storage_errors(db, upload_client, storage):
+    storage.fail_with = 500
+
+    response = await upload_client.post(
+        "/api/v1/upload/", files={"file": ("a.jpg", make_jpeg(), "image/jpeg")}
+    )
+
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Failed to upload image to storage"
+
+
+async def test_rejects_invalid_image(db, upload_client, storage):
+    response = await upload_client.post(
+        "/api/v1/upload/", files={"file": ("a.jpg", b"not an image", "image/jpeg")}
+    )
+
+    assert response.status_code == 400
+    assert storage.requests == []
+
+
+async def test_rejects_non_multipart_body(upload_client, storage):
+    response = await upload_client.post("/api/v1/upload/", content=b"raw bytes")
+
+    assert response.status_code == 422
+    assert storage.requests == []
+
+
+async def test_similar_image_of_another_product_is_stored(db, upload_client, storage):
+    # Same dHash, different bytes: e.g. two flavours with the same packaging
+    gradient = Image.linear_gradient("L").rotate(-90).resize((640, 480))
+    jpeg, png = io.BytesIO(), io.BytesIO()
+    gradient.convert("RGB").save(jpeg, "JPEG")
+    gradient.save(png, "PNG")
+
+    first = await upload_client.post(
+        "/api/v1/upload/", files={"file": ("a.jpg", jpeg.getvalue(), "image/jpeg")}
+    )
+    second = await upload_client.post(
+        "/api/v1/upload/", files={"file": ("b.png", png.getvalue(), "image/png")}
+    )
+
+    assert first.status_code == second.status_code == 200
+    assert second.json()["url"] != first.json()["url"]
+    assert len(storage.objects) == 12